@@ -9,7 +9,10 @@ BASE_DIR = Path(__file__).parent
 sys.path.append(str(BASE_DIR))
 
 # Import RAG components
-from rag_pipeline_groq import rag_query
+from rag import RESOURCES, rag_query_stream
+from compliance_rag import metrics
+from compliance_rag.client import RAGClient
+from compliance_rag.config import SERVICE_URL
 
 # ============================================================
 # PAGE CONFIGURATION
@@ -244,6 +247,77 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ============================================================
+# SHARED RESOURCES
+# ============================================================
+# Streamlit re-runs this script on every interaction; the retriever,
+# embedding model and LLM client are loaded once per server process
+# and shared by all sessions. With RAG_SERVICE_URL set, queries go to
+# serve.py instead and nothing is loaded here.
+@st.cache_resource(show_spinner="📚 Loading regulatory index...")
+def get_resources():
+    if SERVICE_URL:
+        return RAGClient(SERVICE_URL)
+    return RESOURCES.warm(load_model=True)
+
+def query_events(question_text):
+    """Event stream of rag_query_stream, locally or via the query service"""
+    if not SERVICE_URL:
+        yield from rag_query_stream(question=question_text, top_k=3, filter_metadata=None)
+        return
+    
+    # The service answers in one piece: sources and answer arrive together
+    start_time = time.perf_counter()
+    result = get_resources().ask(question_text, top_k=3)
+    total = time.perf_counter() - start_time
+    yield {'type': 'sources', 'sources': result['sources'], 'retrieval_time': total}
+    yield {'type': 'token', 'text': result['answer']}
+    yield {
+        'type': 'done',
+        'answer': result['answer'],
+        'sources': result['sources'],
+        'cached': result.get('cached', False),
+        'timings': {'retrieval': total, 'ttft': total, 'total': total},
+        'usage': result.get('usage'),
+    }
+
+def format_bytes(n):
+    if n is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+def stage_latency():
+    """Per-stage latency histograms of this process or of the query service"""
+    if SERVICE_URL:
+        return get_resources().stage_summary()
+    return metrics.stage_summary()
+
+def render_stage_histogram(stats):
+    # Trim empty buckets at both ends; keep the bucket order on the axis
+    buckets = list(stats['buckets'].items())
+    filled = [i for i, (_, n) in enumerate(buckets) if n]
+    rows = [{'latency': label, 'calls': n} for label, n in buckets[filled[0]:filled[-1] + 1]]
+    st.vega_lite_chart(spec={
+        'data': {'values': rows},
+        'mark': 'bar',
+        'height': 140,
+        'encoding': {
+            'x': {'field': 'latency', 'type': 'ordinal', 'sort': None, 'title': None},
+            'y': {'field': 'calls', 'type': 'quantitative', 'title': None},
+        },
+    }, use_container_width=True)
+
+try:
+    resources = get_resources()
+    resource_status = resources.status()
+    resource_error = None
+except Exception as e:
+    resources = resource_status = None
+    resource_error = e
+
 # ============================================================
 # INITIALIZE SESSION STATE
 # ============================================================
@@ -274,6 +348,49 @@ with st.sidebar:
     with col2:
         st.metric("History", len(st.session_state.chat_history))
     
+    try:
+        stages = stage_latency()
+    except Exception:
+        stages = {}
+    if stages:
+        names = list(stages)
+        stage = st.selectbox(
+            "Stage latency", names,
+            index=names.index("hybrid_search") if "hybrid_search" in names else 0,
+        )
+        render_stage_histogram(stages[stage])
+        for name, stats in stages.items():
+            st.caption(f"{name}: p50 {stats['p50_ms']:.0f} ms • "
+                       f"p95 {stats['p95_ms']:.0f} ms • {stats['count']} calls")
+    
+    # Index / process status
+    st.markdown("### ⚙️ System")
+    if SERVICE_URL:
+        st.caption(f"Query service {SERVICE_URL}")
+    if resource_status is None:
+        st.error(f"❌ Index not loaded: {resource_error}")
+    else:
+        status = resource_status
+        st.caption(
+            f"Index loaded {status['loaded_at']:%Y-%m-%d %H:%M:%S} "
+            f"({status['load_seconds']:.1f}s)"
+        )
+        st.caption(
+            f"{status['num_chunks']:,} chunks • "
+            f"Memory {format_bytes(status['memory_bytes'])} • "
+            f"Chunk store {format_bytes(status['chunk_store_bytes'])}"
+        )
+        if st.button("🔄 Reload Index", use_container_width=True):
+            try:
+                with st.spinner("Reloading index..."):
+                    resources.reload()
+                reloaded = True
+            except Exception as e:
+                reloaded = False
+                st.error(f"❌ Reload failed: {str(e)}")
+            if reloaded:
+                st.rerun()
+    
     st.markdown("<div style='margin: 2rem 0;'></div>", unsafe_allow_html=True)
     
     # Action Buttons
@@ -314,6 +431,57 @@ if len(st.session_state.chat_history) == 0:
     </div>
     """, unsafe_allow_html=True)
 
+# ============================================================
+# RENDER HELPERS
+# ============================================================
+def render_sources(sources, key_prefix):
+    """Reference documents panel with a download button per PDF"""
+    if not sources:
+        return
+    
+    # Remove duplicate documents
+    seen_docs = set()
+    unique_sources = []
+    for source in sources:
+        doc_key = (source['source'], source['regulator'])
+        if doc_key not in seen_docs:
+            seen_docs.add(doc_key)
+            unique_sources.append(source)
+    
+    # Display unique sources
+    with st.expander(f"📚 Reference Documents ({len(unique_sources)})", expanded=False):
+        for source in unique_sources:
+            # Get file path
+            pdf_path = BASE_DIR / "data" / source['source']
+            
+            st.markdown(f"""
+            <div class="source-box">
+                <strong>📄 {source['source']}</strong><br>
+                <span style="color: #78350f; font-size: 0.9rem;">
+                    {source['regulator']}
+                </span>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Add download button for each source
+            if pdf_path.exists():
+                with open(pdf_path, "rb") as pdf_file:
+                    st.download_button(
+                        label=f"⬇️ Download {source['source']}",
+                        data=pdf_file,
+                        file_name=source['source'],
+                        mime="application/pdf",
+                        key=f"download_{key_prefix}_{source['source']}"
+                    )
+
+def render_answer(placeholder, answer):
+    placeholder.markdown(f"""
+    <div class="assistant-message">
+        <strong>Response</strong>
+        {answer}
+    </div>
+    """, unsafe_allow_html=True)
+
 # ============================================================
 # CHAT HISTORY
 # ============================================================
@@ -336,42 +504,16 @@ for i, chat in enumerate(st.session_state.chat_history):
     </div>
     """, unsafe_allow_html=True)
     
+    # Timings
+    if chat.get('ttft') is not None:
+        caption = f"⏱️ First token {chat['ttft']:.2f}s • Total {chat['time']:.2f}s"
+        if chat.get('usage') and chat['usage']['input_tokens']:
+            caption += (f" • {chat['usage']['input_tokens']:,} tokens in / "
+                        f"{chat['usage']['output_tokens']:,} out")
+        st.caption(caption)
+    
     # Sources - With download note
-    if chat.get('sources'):
-        # Remove duplicate documents
-        seen_docs = set()
-        unique_sources = []
-        for source in chat['sources']:
-            doc_key = (source['source'], source['regulator'])
-            if doc_key not in seen_docs:
-                seen_docs.add(doc_key)
-                unique_sources.append(source)
-        
-        # Display unique sources
-        with st.expander(f"📚 Reference Documents ({len(unique_sources)})", expanded=False):
-            for source in unique_sources:
-                # Get file path
-                pdf_path = BASE_DIR / "data" / source['source']
-                
-                st.markdown(f"""
-                <div class="source-box">
-                    <strong>📄 {source['source']}</strong><br>
-                    <span style="color: #78350f; font-size: 0.9rem;">
-                        {source['regulator']}
-                    </span>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Add download button for each source
-                if pdf_path.exists():
-                    with open(pdf_path, "rb") as pdf_file:
-                        st.download_button(
-                            label=f"⬇️ Download {source['source']}",
-                            data=pdf_file,
-                            file_name=source['source'],
-                            mime="application/pdf",
-                            key=f"download_{i}_{source['source']}"
-                        )
+    render_sources(chat.get('sources'), key_prefix=i)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -399,29 +541,55 @@ def process_question(question_text):
         st.warning("⚠️ Please enter a question.")
         return
     
-    with st.spinner("🔍 Analyzing regulatory documents..."):
-        try:
-            start_time = time.time()
-            result = rag_query(
-                question=question_text,
-                top_k=3,
-                filter_metadata=None
-            )
-            end_time = time.time()
-            
-            st.session_state.chat_history.append({
-                'question': question_text,
-                'answer': result['answer'],
-                'sources': result['sources'],
-                'time': end_time - start_time
-            })
-            
-            st.session_state.total_queries += 1
-            st.success(f"✅ Response generated in {end_time - start_time:.2f}s")
-            st.rerun()
-            
-        except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
+    # Question, then placeholders filled in as the stream arrives:
+    # sources as soon as retrieval is done, the answer token by token.
+    st.markdown(f"""
+    <div class="user-message">
+        <strong>Question</strong>
+        {question_text}
+    </div>
+    """, unsafe_allow_html=True)
+    status = st.empty()
+    answer_slot = st.empty()
+    sources_slot = st.container()
+    
+    status.info("🔍 Analyzing regulatory documents...")
+    
+    try:
+        answer = ""
+        result = None
+        for event in query_events(question_text):
+            if event['type'] == 'sources':
+                with sources_slot:
+                    render_sources(event['sources'], key_prefix="live")
+                status.info("✍️ Generating answer...")
+            elif event['type'] == 'token':
+                answer += event['text']
+                render_answer(answer_slot, answer + " ▌")
+            else:
+                result = event
+        
+        timings = result['timings']
+        render_answer(answer_slot, result['answer'])
+        
+        st.session_state.chat_history.append({
+            'question': question_text,
+            'answer': result['answer'],
+            'sources': result['sources'],
+            'ttft': timings['ttft'],
+            'time': timings['total'],
+            'usage': result.get('usage')
+        })
+        
+        st.session_state.total_queries += 1
+        status.success(
+            f"✅ First token in {timings['ttft']:.2f}s, "
+            f"response generated in {timings['total']:.2f}s"
+        )
+        st.rerun()
+        
+    except Exception as e:
+        status.error(f"❌ Error: {str(e)}")
 
 if submit_button:
     process_question(user_question)
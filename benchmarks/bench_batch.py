@@ -0,0 +1,78 @@
+# benchmarks/bench_batch.py
+"""
+Queries/second of hybrid_search (one by one) vs hybrid_search_batch.
+
+Every run starts with an empty, memory-only query-embedding cache and
+uses distinct query strings, so embedding cost is included in both
+modes.
+
+Before timing, sparse_search_batch is checked against sparse_search
+query by query - the results must be identical, ties included.
+
+Usage:
+    python benchmarks/bench_batch.py --batch-sizes 1 32 512
+"""
+import argparse
+import time
+
+from common import QUESTIONS
+
+from compliance_rag import load_index
+from compliance_rag.embedding_cache import QueryEmbeddingCache
+from compliance_rag.embeddings import LazyEmbeddingFunction
+
+
+def make_queries(n, offset=0):
+    return [f"{QUESTIONS[i % len(QUESTIONS)]} (review item {offset + i})" for i in range(n)]
+
+
+def fresh_cache(embed_fn):
+    return QueryEmbeddingCache(embed_fn, path=None)
+
+
+def check_sparse_batch(retriever, queries, top_k):
+    """Exit with an error unless sparse_search_batch == sparse_search per query"""
+    batch = retriever.sparse_search_batch(queries, top_k=top_k)
+    for query, batch_scores in zip(queries, batch):
+        single = retriever.sparse_search(query, top_k=top_k)
+        if list(single.items()) != list(batch_scores.items()):
+            raise SystemExit(f"❌ sparse_search_batch differs from sparse_search for {query!r}")
+    print(f"✅ sparse_search_batch matches sparse_search on {len(queries)} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch query API benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 512])
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    retriever = load_index(embedding_cache=False)
+    embed_fn = LazyEmbeddingFunction()
+    embed_fn(["warm up"])  # model load is not part of the measurement
+
+    print("=" * 70)
+    print("📦 BATCH QUERY BENCHMARK")
+    print("=" * 70)
+    check_sparse_batch(retriever, list(QUESTIONS), top_k=retriever.candidate_k)
+    print(f"{'batch':>6} {'mode':<8} {'time (s)':>9} {'queries/s':>10}")
+
+    offset = 0
+    for size in args.batch_sizes:
+        for mode in ("single", "batch"):
+            queries = make_queries(size, offset)
+            offset += size
+            retriever.embedding_cache = fresh_cache(embed_fn)
+
+            start = time.perf_counter()
+            if mode == "single":
+                for query in queries:
+                    retriever.hybrid_search(query, top_k=args.top_k)
+            else:
+                retriever.hybrid_search_batch(queries, top_k=args.top_k)
+            seconds = time.perf_counter() - start
+
+            print(f"{size:>6} {mode:<8} {seconds:>9.3f} {size / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_bm25.py
+"""
+SparseBM25 vs rank_bm25.BM25Okapi on synthetic corpora.
+
+Documents are drawn from a Zipf-distributed vocabulary (like real
+regulatory text) and queries from mid-frequency terms. For every size
+the script reports build time, per-query latency, speedup and whether
+the two engines return identical scores.
+
+BM25Okapi keeps one Python dict per document and loops over all of
+them per query token, so it is skipped above --okapi-max-docs.
+
+Usage:
+    python benchmarks/bench_bm25.py --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import percentiles
+
+from compliance_rag.bm25 import SparseBM25, top_k_indices
+
+
+def synthetic_corpus(n_docs, vocab_size, doc_len, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    ranks = np.arange(1, vocab_size + 1)
+    probs = 1.0 / ranks ** 1.1
+    probs /= probs.sum()
+
+    lengths = rng.poisson(doc_len, size=n_docs).clip(min=1)
+    tokens = rng.choice(vocab_size, size=int(lengths.sum()), p=probs)
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    corpus = [[vocab[t] for t in tokens[bounds[i]:bounds[i + 1]]] for i in range(n_docs)]
+    return corpus, vocab
+
+
+def synthetic_queries(vocab, n_queries, seed=1):
+    rng = np.random.default_rng(seed)
+    # Mid-frequency terms: neither stopword-like nor unseen
+    pool = vocab[20:2000]
+    return [list(rng.choice(pool, size=rng.integers(3, 9))) for _ in range(n_queries)]
+
+
+def time_queries(engine, queries, top_k=20):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        scores = engine.get_scores(query)
+        top_k_indices(scores, top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(scores)
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 engine benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--vocab-size", type=int, default=50_000)
+    parser.add_argument("--doc-len", type=int, default=120,
+                        help="Mean tokens per chunk")
+    parser.add_argument("--okapi-max-docs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print("📑 BM25 ENGINE BENCHMARK")
+    print("=" * 78)
+    print(f"{'docs':>9} {'engine':<10} {'build (s)':>10} {'p50 (ms)':>10} "
+          f"{'p95 (ms)':>10} {'speedup':>8} {'identical':>10}")
+
+    for n_docs in args.sizes:
+        corpus, vocab = synthetic_corpus(n_docs, args.vocab_size, args.doc_len)
+        queries = synthetic_queries(vocab, args.queries)
+
+        start = time.perf_counter()
+        sparse_engine = SparseBM25(corpus)
+        sparse_build = time.perf_counter() - start
+        sparse_times, sparse_scores = time_queries(sparse_engine, queries)
+        sparse_stats = percentiles(sparse_times)
+
+        okapi_stats = None
+        if n_docs <= args.okapi_max_docs:
+            from rank_bm25 import BM25Okapi
+
+            start = time.perf_counter()
+            okapi = BM25Okapi(corpus)
+            okapi_build = time.perf_counter() - start
+            okapi_times, okapi_scores = time_queries(okapi, queries)
+            okapi_stats = percentiles(okapi_times)
+            identical = all(np.array_equal(a, b) for a, b in zip(okapi_scores, sparse_scores))
+            print(f"{n_docs:>9} {'okapi':<10} {okapi_build:>10.2f} {okapi_stats['p50']:>10.2f} "
+                  f"{okapi_stats['p95']:>10.2f} {'1.0x':>8} {'-':>10}")
+
+        speedup = f"{okapi_stats['p50'] / sparse_stats['p50']:.1f}x" if okapi_stats else "-"
+        same = ("yes" if identical else "NO") if okapi_stats else "-"
+        print(f"{n_docs:>9} {'sparse':<10} {sparse_build:>10.2f} {sparse_stats['p50']:>10.2f} "
+              f"{sparse_stats['p95']:>10.2f} {speedup:>8} {same:>10}")
+
+        del corpus, sparse_engine
+
+
+if __name__ == "__main__":
+    main()
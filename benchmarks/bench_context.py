@@ -0,0 +1,72 @@
+# benchmarks/bench_context.py
+"""
+Prompt context size: unpacked vs packed at several token budgets.
+
+For every labeled question the top-k hybrid results are formatted the
+old way (one full block per chunk) and with the context packer. The
+table reports mean context tokens and fact retention: the share of the
+labeled phrases present in the unpacked context that are still present
+after packing.
+
+Usage:
+    python benchmarks/bench_context.py --top-k 3 6 --budgets 400 600 900
+"""
+import argparse
+import statistics
+import time
+
+from eval_recall import load_labels
+
+import rag
+from compliance_rag.context import pack_context
+from compliance_rag.tokens import count_tokens, token_counter_name
+
+
+def facts(text, label):
+    text = text.lower()
+    return {phrase for phrase in label.get('contains', []) if phrase.lower() in text}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Context packing benchmark")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[400, 600, 900])
+    args = parser.parse_args()
+
+    labels = load_labels()
+    retriever = rag.get_retriever()
+
+    print("=" * 70)
+    print(f"✂️  CONTEXT PACKING BENCHMARK ({len(labels)} questions, "
+          f"tokens: {token_counter_name()})")
+    print("=" * 70)
+    print(f"{'top_k':>5} {'budget':>8} {'tokens':>8} {'saved':>7} {'facts kept':>11} {'pack ms':>8}")
+
+    for top_k in args.top_k:
+        docs_per_label = [retriever.hybrid_search(label['question'], top_k=top_k)
+                          for label in labels]
+        raw = [rag.format_documents(docs, label['question'], pack=False)
+               for docs, label in zip(docs_per_label, labels)]
+        raw_tokens = statistics.mean(count_tokens(text) for text in raw)
+        print(f"{top_k:>5} {'unpacked':>8} {raw_tokens:>8.0f} {'':>7} {'':>11} {'':>8}")
+
+        for budget in [None] + args.budgets:
+            tokens, kept, total, timings = [], 0, 0, []
+            for docs, label, unpacked in zip(docs_per_label, labels, raw):
+                start = time.perf_counter()
+                context, stats = pack_context(docs, label['question'], budget)
+                timings.append((time.perf_counter() - start) * 1000)
+                tokens.append(stats['tokens'])
+                before = facts(unpacked, label)
+                kept += len(before & facts(context, label))
+                total += len(before)
+
+            mean_tokens = statistics.mean(tokens)
+            retention = kept / total if total else 1.0
+            print(f"{top_k:>5} {budget or 'merge':>8} {mean_tokens:>8.0f} "
+                  f"{1 - mean_tokens / raw_tokens:>7.0%} {retention:>11.0%} "
+                  f"{statistics.mean(timings):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_dense_index.py
+"""
+Dense search backends: exact scan vs HNSW at several settings.
+
+Ground truth is the exact top-k (brute-force cosine). For every HNSW
+configuration (M x ef_construction) the script reports build time and
+index memory, then recall@k and single-query latency / QPS for each
+ef_search value. Recall vs latency is the knob: raise ef_search until
+recall is good enough.
+
+Vectors come from the corpus (the dense index, or the ChromaDB
+collection when there is none) or, with --synthetic N, from N clustered
+random vectors - useful to see how the backends scale past the current
+corpus. Queries are corpus vectors plus noise, so they have close but
+not identical neighbours, like real questions.
+
+Usage:
+    python benchmarks/bench_dense_index.py
+    python benchmarks/bench_dense_index.py --synthetic 200000 --m 16 32 --ef-search 32 64 128
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from common import percentiles
+
+from compliance_rag.dense_index import ExactIndex, build_dense_index, load_dense_index, normalize
+
+
+def corpus_vectors():
+    index = load_dense_index()
+    if index is not None:
+        return np.asarray(index.vectors), "dense index"
+
+    from create_embeddings import collection_vectors
+    from compliance_rag.index import get_collection, load_chunks
+    chunks = load_chunks()
+    return normalize(collection_vectors(get_collection(), chunks)), "ChromaDB"
+
+
+def synthetic_vectors(n, dim, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return normalize(centers[labels] + rng.normal(scale=0.6, size=(n, dim)))
+
+
+def make_queries(vectors, n, noise=0.3, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), size=n)]
+    return normalize(picks + rng.normal(scale=noise / np.sqrt(vectors.shape[1]), size=picks.shape))
+
+
+def time_search(index, queries, k):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = index.search(query[None, :], k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(rows[0])
+    return timings, results
+
+
+def recall(results, truth):
+    hits = sum(len(set(r.tolist()) & set(t.tolist())) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense index benchmark")
+    parser.add_argument("--synthetic", type=int, default=None,
+                        help="Use N synthetic vectors instead of the corpus")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors, origin = synthetic_vectors(args.synthetic, args.dim), "synthetic"
+    else:
+        vectors, origin = corpus_vectors()
+    queries = make_queries(vectors, args.queries)
+
+    print("=" * 70)
+    print(f"🧭 DENSE INDEX BENCHMARK ({len(vectors):,} x {vectors.shape[1]} {origin} "
+          f"vectors, {len(queries)} queries, recall@{args.k})")
+    print("=" * 70)
+    print(f"{'backend':<22} {'build s':>8} {'MB':>7} {'ef':>5} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'QPS':>8} {'recall':>7}")
+
+    exact = ExactIndex(vectors)
+    timings, truth = time_search(exact, queries, args.k)
+    p = percentiles(timings)
+    print(f"{'exact':<22} {'-':>8} {exact.nbytes() / 1e6:>7.1f} {'-':>5} {p['p50']:>8.2f} "
+          f"{p['p95']:>8.2f} {1000 / np.mean(timings):>8.0f} {1.0:>7.3f}")
+
+    try:
+        import hnswlib  # noqa: F401
+    except ImportError:
+        print("\n⚠️  hnswlib not installed (pip install hnswlib) - HNSW rows skipped")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for m in args.m:
+            for ef_construction in args.ef_construction:
+                start = time.perf_counter()
+                index = build_dense_index(vectors, backend="hnsw", index_dir=f"{tmp}/hnsw",
+                                          M=m, ef_construction=ef_construction)
+                build = f"{time.perf_counter() - start:.1f}"
+                name = f"hnsw M={m} efc={ef_construction}"
+                for ef_search in args.ef_search:
+                    index.ef_search = ef_search
+                    timings, results = time_search(index, queries, args.k)
+                    p = percentiles(timings)
+                    print(f"{name:<22} {build:>8} {index.nbytes() / 1e6:>7.1f} "
+                          f"{ef_search:>5} {p['p50']:>8.2f} {p['p95']:>8.2f} "
+                          f"{1000 / np.mean(timings):>8.0f} {recall(results, truth):>7.3f}")
+                    name, build = "", ""
+
+    print("\n   MB = vectors + graph links (HNSW keeps the float rows for filtered queries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_embedding_build.py
+"""
+Embedding build throughput in chunks/second.
+
+    chroma-style   file order, 100 texts per call, batch size 32 - what
+                   collection.add() did when ChromaDB embedded the chunks
+    bucketed       the embedding stage: length-bucketed batches written
+                   through the resumable checkpoint
+    N processes    same, with a multi-process encoding pool
+    onnx           same, on the ONNX runtime (--onnx, optional file)
+
+Only encoding is timed (plus checkpoint writes for the stage); ChromaDB
+inserts are the same for every variant.
+
+Usage:
+    python benchmarks/bench_embedding_build.py --limit 2000 --batch-sizes 64 256 --processes 2 4
+    python benchmarks/bench_embedding_build.py --onnx --onnx-file onnx/model_qint8_avx512_vnni.onnx
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from common import BASE_DIR  # noqa: F401  (puts the repo on sys.path)
+
+from compliance_rag.embedding_build import embed_texts, load_encoder
+from compliance_rag.index import load_chunks
+
+
+def chroma_style(model, texts):
+    for start in range(0, len(texts), 100):
+        model.encode(texts[start:start + 100], convert_to_numpy=True)
+
+
+def stage(model, texts, batch_size, processes=1, backend="torch", onnx_file=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = embed_texts(texts, model=model, backend=backend, onnx_file=onnx_file,
+                                 batch_size=batch_size, processes=processes,
+                                 checkpoint_dir=f"{tmp}/checkpoint", log=lambda _: None)
+        return np.array(checkpoint.vectors)
+
+
+def report(name, texts, run):
+    start = time.perf_counter()
+    vectors = run()
+    seconds = time.perf_counter() - start
+    print(f"{name:<26} {seconds:>9.1f} {len(texts) / seconds:>10.0f}")
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding build throughput")
+    parser.add_argument("--limit", type=int, default=2000, help="Chunks to embed")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--processes", type=int, nargs="*", default=[],
+                        help="Also run with these pool sizes")
+    parser.add_argument("--onnx", action="store_true", help="Also run the ONNX backend")
+    parser.add_argument("--onnx-file", default=None)
+    args = parser.parse_args()
+
+    chunks = load_chunks()
+    texts = [chunks[i]['content'] for i in range(min(args.limit, len(chunks)))]
+    lengths = [len(text) for text in texts]
+
+    print("=" * 70)
+    print(f"🧮 EMBEDDING BUILD BENCHMARK ({len(texts)} chunks, "
+          f"{min(lengths)}-{max(lengths)} chars)")
+    print("=" * 70)
+    print(f"{'variant':<26} {'seconds':>9} {'chunks/s':>10}")
+
+    model = load_encoder()
+    model.encode(texts[:32])         # warm up
+
+    report("chroma-style (100 x 32)", texts, lambda: chroma_style(model, texts))
+    reference = None
+    for batch_size in args.batch_sizes:
+        reference = report(f"bucketed, batch {batch_size}", texts,
+                           lambda: stage(model, texts, batch_size))
+
+    batch_size = args.batch_sizes[-1]
+    for processes in args.processes:
+        report(f"{processes} processes, batch {batch_size}", texts,
+               lambda: stage(model, texts, batch_size, processes))
+
+    if args.onnx:
+        onnx_model = load_encoder(backend="onnx", onnx_file=args.onnx_file)
+        onnx_model.encode(texts[:32])
+        vectors = report(f"onnx, batch {batch_size}", texts,
+                         lambda: stage(onnx_model, texts, batch_size, backend="onnx",
+                                       onnx_file=args.onnx_file))
+        # Query vectors still come from the torch model: check they agree
+        cosine = np.sum(vectors * reference, axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1))
+        print(f"\n   ONNX vs torch cosine: min {cosine.min():.4f}, mean {cosine.mean():.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_embedding_cache.py
+"""
+Dense-search latency with and without the query-embedding cache.
+
+    uncached - ChromaDB encodes every query (query_texts=...)
+    cold     - cache enabled, empty: first pass pays for encoding
+    warm     - cache enabled, populated: vectors come from memory/disk
+
+Usage:
+    python benchmarks/bench_embedding_cache.py --repeats 20
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import QUESTIONS, percentiles
+
+from compliance_rag import load_index
+
+
+def time_dense(retriever, questions, repeats):
+    timings = []
+    for _ in range(repeats):
+        for question in questions:
+            start = time.perf_counter()
+            retriever.dense_search(question, top_k=20)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    stats = percentiles(timings)
+    print(f"{label:<10} {len(timings):>8} {stats['p50']:>10.2f} {stats['p95']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-embedding cache benchmark")
+    parser.add_argument("--repeats", type=int, default=10,
+                        help="Passes over the question set per scenario")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🧠 QUERY EMBEDDING CACHE BENCHMARK")
+    print("=" * 70)
+    print(f"{'scenario':<10} {'queries':>8} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+
+    uncached = load_index(embedding_cache=False)
+    # Warm up the model once so model loading is not counted
+    uncached.dense_search(QUESTIONS[0])
+    report("uncached", time_dense(uncached, QUESTIONS, args.repeats))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cached = load_index(embedding_cache_file=Path(tmp) / "bench_cache.sqlite3")
+        cached.embedding_cache.embed_fn(["warm up"])
+        report("cold", time_dense(cached, QUESTIONS, 1))
+        report("warm", time_dense(cached, QUESTIONS, args.repeats))
+
+        stats = cached.embedding_cache.stats()
+        print(f"\n📊 Cache: {stats['hits']} hits / {stats['misses']} misses "
+              f"(hit rate {stats['hit_rate']:.1%})")
+        cached.embedding_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_quantization.py
+"""
+Quantized dense index: memory per vector, recall loss and latency.
+
+Every method is built into a temporary dense index and searched with the
+same queries. Recall@k is measured against the exact float32 top-k:
+
+    float32          exact scan of the float matrix (ground truth)
+    int8 / binary    code scan only (rescore factor 1: the top-k of the
+                     codes, no float rescoring)
+    int8 / binary xN code scan, then the best N * k candidates rescored
+                     with the float rows
+
+"bytes/vec" is what the scan keeps in memory; the float rows of a
+quantized index stay on disk and only candidate rows are read. int8
+trades latency for memory: its code scan decodes blocks to float32.
+
+Usage:
+    python benchmarks/bench_quantization.py
+    python benchmarks/bench_quantization.py --synthetic 500000 --rescore 1 4 10 20
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from bench_dense_index import corpus_vectors, make_queries, recall, synthetic_vectors, time_search
+from common import percentiles
+
+from compliance_rag.dense_index import ExactIndex, build_dense_index
+
+
+def report(name, index, queries, truth, k, build="-"):
+    timings, results = time_search(index, queries, k)
+    p = percentiles(timings)
+    per_vector = index.nbytes() / len(index)
+    print(f"{name:<16} {build:>8} {per_vector:>10.0f} {index.nbytes() / 1e6:>8.1f} "
+          f"{p['p50']:>8.2f} {p['p95']:>8.2f} {recall(results, truth):>7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense index quantization benchmark")
+    parser.add_argument("--synthetic", type=int, default=None,
+                        help="Use N synthetic vectors instead of the corpus")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--methods", nargs="+", default=["int8", "binary"])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 10],
+                        help="Rescore factors (1 = ranking by the codes alone)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors, origin = synthetic_vectors(args.synthetic, args.dim), "synthetic"
+    else:
+        vectors, origin = corpus_vectors()
+    queries = make_queries(vectors, args.queries)
+
+    print("=" * 70)
+    print(f"🗜️  QUANTIZATION BENCHMARK ({len(vectors):,} x {vectors.shape[1]} {origin} "
+          f"vectors, {len(queries)} queries, recall@{args.k})")
+    print("=" * 70)
+    print(f"{'index':<16} {'build s':>8} {'bytes/vec':>10} {'RAM MB':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+
+    exact = ExactIndex(vectors)
+    _, truth = time_search(exact, queries, args.k)
+    report("float32", exact, queries, truth, args.k)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for method in args.methods:
+            start = time.perf_counter()
+            index = build_dense_index(vectors, backend="exact", index_dir=f"{tmp}/{method}",
+                                      quantization=method)
+            build = f"{time.perf_counter() - start:.1f}"
+            for factor in args.rescore:
+                index.rescore_factor = factor
+                name = method if factor == 1 else f"{method} x{factor}"
+                report(name, index, queries, truth, args.k, build)
+                build = ""
+
+    print("\n   Quantized indexes keep vectors.npy memory-mapped for rescoring; "
+          "RAM MB counts the codes only")
+    print("   int8 saves memory only - its scan decodes codes to float32 and costs "
+          "latency compared to float32")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_rerank.py
+"""
+Cross-encoder reranking: latency, prompt size and recall.
+
+For the labeled questions, compares sending the top-k hybrid results
+straight to the LLM with reranking a wider candidate set down to k:
+
+    hybrid top-k      retrieval time, prompt tokens, recall@k
+    rerank N -> k     + reranker time (cold: empty score cache,
+                        warm: every pair cached), same metrics
+
+Prompt tokens count the full RAG prompt (template + context + question).
+
+Usage:
+    python benchmarks/bench_rerank.py --top-k 3 --baseline-k 3 8 --candidates 10 20 40
+"""
+import argparse
+import statistics
+import time
+
+from common import percentiles
+from eval_recall import is_relevant, load_labels
+
+import rag
+from compliance_rag.tokens import count_tokens, token_counter_name
+
+
+def prompt_tokens(question, docs):
+    return count_tokens(rag.RAG_TEMPLATE.format(
+        context=rag.format_documents(docs, question), question=question
+    ))
+
+
+def recalled(retriever, docs, label):
+    return any(is_relevant(retriever.chunks[doc['chunk_index']], label) for doc in docs)
+
+
+def run_config(retriever, reranker, labels, top_k, candidates=None):
+    retrieval_ms, rerank_cold_ms, rerank_warm_ms, tokens, hits = [], [], [], [], 0
+    if reranker is not None:
+        reranker.clear()
+
+    for label in labels:
+        question = label['question']
+        start = time.perf_counter()
+        docs = retriever.hybrid_search(question, top_k=candidates or top_k)
+        retrieval_ms.append((time.perf_counter() - start) * 1000)
+
+        if candidates:
+            start = time.perf_counter()
+            reranked = reranker.rerank(question, docs, top_k)
+            rerank_cold_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            reranker.rerank(question, docs, top_k)
+            rerank_warm_ms.append((time.perf_counter() - start) * 1000)
+            docs = reranked
+
+        tokens.append(prompt_tokens(question, docs))
+        hits += recalled(retriever, docs, label)
+
+    return {
+        'retrieval_ms': retrieval_ms,
+        'rerank_cold_ms': rerank_cold_ms,
+        'rerank_warm_ms': rerank_warm_ms,
+        'tokens': statistics.mean(tokens),
+        'recall': hits / len(labels),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-encoder reranking benchmark")
+    parser.add_argument("--top-k", type=int, default=3,
+                        help="Chunks sent to the LLM after reranking")
+    parser.add_argument("--baseline-k", type=int, nargs="+", default=[3, 8],
+                        help="top_k values for plain hybrid search")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 20, 40],
+                        help="Candidate budgets scored by the cross-encoder")
+    args = parser.parse_args()
+
+    labels = load_labels()
+    retriever = rag.get_retriever()
+    reranker = rag.RESOURCES.reranker
+    retriever.hybrid_search(labels[0]['question'])           # warm up embedding model
+    reranker.score(labels[0]['question'], ["warm up"])       # load cross-encoder
+    reranker.clear()
+
+    print("=" * 70)
+    print(f"🏅 RERANKING BENCHMARK ({len(labels)} labeled questions, "
+          f"tokens: {token_counter_name()})")
+    print("=" * 70)
+    print(f"{'config':<16} {'retr p50':>9} {'rerank p50':>11} {'rerank p95':>11} "
+          f"{'warm p50':>9} {'tokens':>7} {'recall':>7}")
+
+    configs = [(f"hybrid top-{k}", k, None) for k in args.baseline_k]
+    configs += [(f"rerank {n}->{args.top_k}", args.top_k, n) for n in args.candidates]
+
+    for name, top_k, candidates in configs:
+        row = run_config(retriever, reranker if candidates else None, labels, top_k, candidates)
+        retrieval = percentiles(row['retrieval_ms'])
+        cold = percentiles(row['rerank_cold_ms'])
+        warm = percentiles(row['rerank_warm_ms'])
+        rerank_cols = (f"{cold['p50']:>11.1f} {cold['p95']:>11.1f} {warm['p50']:>9.2f}"
+                       if candidates else f"{'-':>11} {'-':>11} {'-':>9}")
+        print(f"{name:<16} {retrieval['p50']:>9.1f} {rerank_cols} "
+              f"{row['tokens']:>7.0f} {row['recall']:>7.2f}")
+
+    print(f"\n   Times in ms; recall = share of questions with a relevant chunk in the prompt")
+    print(f"   Score cache: {reranker.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_startup.py
+"""
+Startup-time benchmark.
+
+Every scenario runs in a fresh interpreter so import caches do not
+leak between runs:
+
+    import   - `import rag` (must not touch disk, ChromaDB or BM25)
+    load     - `import rag` + `load_index()` (new cold start)
+    rebuild  - `build_index()` + `load_index()` (what importing the old
+               hybrid_search.py did before the first question)
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "import": "import rag",
+    "load": "import rag; from compliance_rag import load_index; load_index()",
+    "rebuild": (
+        "import rag; from compliance_rag import build_index, load_index; "
+        "build_index(); load_index()"
+    ),
+}
+
+TIMER = (
+    "import time; _t = time.perf_counter(); {body}; "
+    "print(time.perf_counter() - _t)"
+)
+
+
+def time_scenario(body, runs):
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(body=body)],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS),
+                        choices=list(SCENARIOS))
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("⏱️  STARTUP BENCHMARK")
+    print("=" * 70)
+    print(f"{'scenario':<10} {'median (s)':>12} {'min (s)':>10} {'max (s)':>10}")
+
+    for name in args.scenarios:
+        timings = time_scenario(SCENARIOS[name], args.runs)
+        print(f"{name:<10} {statistics.median(timings):>12.3f} "
+              f"{min(timings):>10.3f} {max(timings):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
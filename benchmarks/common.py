@@ -0,0 +1,36 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+# Compliance questions our analysts ask repeatedly
+QUESTIONS = [
+    "What is the Liquidity Coverage Ratio?",
+    "What are high-quality liquid assets?",
+    "What is the minimum LCR requirement?",
+    "What is Customer Due Diligence?",
+    "When should enhanced due diligence be applied?",
+    "What are Politically Exposed Persons?",
+    "What is the risk-based approach in banking?",
+    "How should banks assess money laundering risks?",
+    "What are red flags for suspicious transactions?",
+    "How do FATF recommendations relate to Basel requirements?",
+    "What are common compliance requirements in banking?",
+    "What is the minimum CET1 capital ratio?",
+    "KYC requirements for bank accounts",
+    "How to report suspicious transactions?",
+]
+
+
+def percentiles(timings_ms, points=(50, 95)):
+    """Return {"p50": ..., "p95": ...} for a list of millisecond timings"""
+    if not timings_ms:
+        return {f"p{p}": 0.0 for p in points}
+    values = np.percentile(np.asarray(timings_ms, dtype=np.float64), points)
+    return {f"p{p}": float(v) for p, v in zip(points, values)}
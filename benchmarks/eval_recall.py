@@ -0,0 +1,152 @@
+# benchmarks/eval_recall.py
+"""
+Offline retrieval evaluation: recall@k per fusion method and candidate depth.
+
+A chunk is relevant to a labeled question when it comes from the
+labeled regulator (if given) and its text contains one of the labeled
+phrases, or when its chunk_id is listed under "chunk_ids". A question
+counts as recalled at k when any relevant chunk is in the top k.
+
+The table shows, per fusion method and candidate depth (candidates
+taken from each of dense and sparse search), recall@k, MRR and mean
+hybrid_search latency. The summary names the smallest depth that
+reaches the best recall@k for each method.
+
+Usage:
+    python benchmarks/eval_recall.py
+    python benchmarks/eval_recall.py --fusion weighted rrf --depths 5 10 20 50
+    python benchmarks/eval_recall.py --fit-fusion     # fit + save learned fusion weights
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from common import BASE_DIR  # noqa: F401 - puts the repo on sys.path
+
+import numpy as np
+
+from compliance_rag import load_index
+from compliance_rag.config import FUSION_WEIGHTS_FILE
+from compliance_rag.fusion import FUSION_METHODS, LinearFusion, candidate_arrays, fusion_features
+
+LABELS_FILE = Path(__file__).resolve().parent / "labeled_questions.json"
+
+
+def load_labels(path=LABELS_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+
+def is_relevant(chunk, label):
+    if label.get('chunk_ids'):
+        return chunk.get('chunk_id') in label['chunk_ids']
+    if label.get('regulator') and chunk['regulator'] != label['regulator']:
+        return False
+    content = chunk['content'].lower()
+    return any(phrase.lower() in content for phrase in label.get('contains', []))
+
+
+def evaluate(retriever, labels, fusion, depth, ks):
+    """recall@k for each k, MRR and per-query latency for one configuration"""
+    hits = {k: 0 for k in ks}
+    reciprocal_ranks = []
+    timings = []
+    for label in labels:
+        start = time.perf_counter()
+        results = retriever.hybrid_search(label['question'], top_k=max(ks),
+                                          fusion=fusion, candidate_k=depth)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        first = next(
+            (rank for rank, result in enumerate(results, 1)
+             if is_relevant(retriever.chunks[result['chunk_index']], label)),
+            None,
+        )
+        reciprocal_ranks.append(1 / first if first else 0.0)
+        for k in ks:
+            if first is not None and first <= k:
+                hits[k] += 1
+
+    return {
+        'recall': {k: hits[k] / len(labels) for k in ks},
+        'mrr': statistics.mean(reciprocal_ranks),
+        'mean_ms': statistics.mean(timings),
+    }
+
+
+def fit_fusion(retriever, labels, depth, l2):
+    """Fit LinearFusion on every (question, candidate) pair at `depth`"""
+    features, targets = [], []
+    for label in labels:
+        dense = retriever.dense_search(label['question'], top_k=depth)
+        sparse = retriever.sparse_search(label['question'], top_k=depth)
+        indices, dense_arr, sparse_arr = candidate_arrays(dense, sparse)
+        if not len(indices):
+            continue
+        features.append(fusion_features(dense_arr, sparse_arr))
+        targets.extend(float(is_relevant(retriever.chunks[int(i)], label)) for i in indices)
+
+    model = LinearFusion.fit(np.vstack(features), targets, l2=l2)
+    model.save(FUSION_WEIGHTS_FILE)
+    return model, len(targets), int(sum(targets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k evaluation of hybrid fusion")
+    parser.add_argument("--labels", type=Path, default=LABELS_FILE)
+    parser.add_argument("--fusion", nargs="+", choices=FUSION_METHODS, default=None,
+                        help="Fusion methods to compare (default: all available)")
+    parser.add_argument("--depths", type=int, nargs="+", default=[5, 10, 20, 50],
+                        help="Candidate depths (per search) to compare")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--fit-fusion", action="store_true",
+                        help="Fit the learned linear fusion on the labels first")
+    parser.add_argument("--fit-depth", type=int, default=50)
+    parser.add_argument("--l2", type=float, default=1.0)
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    retriever = load_index()
+    retriever.hybrid_search(labels[0]['question'])  # warm up model + caches
+
+    print("=" * 70)
+    print(f"🎯 RETRIEVAL EVALUATION ({len(labels)} labeled questions)")
+    print("=" * 70)
+
+    if args.fit_fusion:
+        model, n, positives = fit_fusion(retriever, labels, args.fit_depth, args.l2)
+        retriever.fusion_model = model
+        print(f"\n🧮 Learned fusion fitted on {n} candidates ({positives} relevant)")
+        print(f"   Saved to {FUSION_WEIGHTS_FILE}")
+        print("   (evaluated below on the same questions - expect optimistic numbers)")
+
+    methods = args.fusion or [
+        m for m in FUSION_METHODS if m != "learned" or FUSION_WEIGHTS_FILE.exists()
+    ]
+    ks = sorted(args.k)
+
+    header = f"\n{'fusion':<9} {'depth':>5} " + " ".join(f"{'R@' + str(k):>6}" for k in ks)
+    print(header + f" {'MRR':>6} {'ms/query':>9}")
+    print("-" * (len(header) + 16))
+
+    summary = {}
+    for method in methods:
+        for depth in sorted(args.depths):
+            row = evaluate(retriever, labels, method, depth, ks)
+            summary.setdefault(method, []).append((depth, row))
+            recalls = " ".join(f"{row['recall'][k]:>6.2f}" for k in ks)
+            print(f"{method:<9} {depth:>5} {recalls} {row['mrr']:>6.3f} {row['mean_ms']:>9.1f}")
+
+    top_k = ks[-1]
+    print(f"\n📌 Smallest depth reaching the best recall@{top_k}:")
+    for method, rows in summary.items():
+        best = max(row['recall'][top_k] for _, row in rows)
+        depth, row = next((d, r) for d, r in rows if r['recall'][top_k] >= best)
+        print(f"   {method:<9} depth {depth:>3}  recall@{top_k} {best:.2f}  "
+              f"{row['mean_ms']:.1f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/load_test.py
+"""
+Load test for the async RAG pipeline with a local stub LLM.
+
+1. Latency breakdown: mean dense and sparse retrieval time, then the
+   end-to-end time of rag_query (sequential retrieval + blocking LLM)
+   vs arag_query (concurrent retrieval + async LLM).
+2. Throughput: N requests through arag_query with C requests in
+   flight on one event loop, reporting requests/s and p50/p95 latency.
+
+The answer cache is bypassed so every request reaches the (stub) LLM.
+
+Usage:
+    python benchmarks/load_test.py --requests 200 --concurrency 1 8 32 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+
+from common import QUESTIONS, percentiles
+
+import rag
+from compliance_rag.llm import StubLLM
+
+
+def mean_ms(fn, questions):
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        fn(question)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(timings)
+
+
+async def run_load(questions, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(question):
+        async with semaphore:
+            start = time.perf_counter()
+            await rag.arag_query(question, use_cache=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in questions))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async RAG load test (stub LLM)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--llm-latency", type=float, default=0.5,
+                        help="Simulated LLM latency in seconds")
+    args = parser.parse_args()
+
+    rag.set_llm(StubLLM(latency=args.llm_latency))
+    retriever = rag.get_retriever()
+    retriever.hybrid_search(QUESTIONS[0])  # warm up model + caches
+
+    print("=" * 70)
+    print(f"🚦 ASYNC RAG LOAD TEST (stub LLM, {args.llm_latency * 1000:.0f} ms)")
+    print("=" * 70)
+
+    dense = mean_ms(retriever.dense_search, QUESTIONS)
+    sparse = mean_ms(retriever.sparse_search, QUESTIONS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_e2e = mean_ms(lambda q: rag.rag_query(q, use_cache=False), QUESTIONS)
+    async_e2e = mean_ms(lambda q: asyncio.run(rag.arag_query(q, use_cache=False)), QUESTIONS)
+
+    llm_ms = args.llm_latency * 1000
+    print(f"\n   Dense retrieval        : {dense:8.1f} ms")
+    print(f"   Sparse retrieval       : {sparse:8.1f} ms")
+    print(f"   Stub LLM               : {llm_ms:8.1f} ms")
+    print(f"   rag_query  (sum)       : {sync_e2e:8.1f} ms  (ideal {dense + sparse + llm_ms:.1f})")
+    print(f"   arag_query (max)       : {async_e2e:8.1f} ms  (ideal {max(dense, sparse) + llm_ms:.1f})")
+
+    print(f"\n{'in flight':>10} {'requests':>9} {'req/s':>8} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.requests)]
+    for concurrency in args.concurrency:
+        seconds, latencies = asyncio.run(run_load(questions, concurrency))
+        stats = percentiles(latencies)
+        print(f"{concurrency:>10} {len(questions):>9} {len(questions) / seconds:>8.1f} "
+              f"{stats['p50']:>10.1f} {stats['p95']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
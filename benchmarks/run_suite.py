@@ -0,0 +1,321 @@
+# benchmarks/run_suite.py
+"""
+End-to-end benchmark suite with a latency breakdown per pipeline stage.
+
+Every question of test_rag_questions.TEST_SETS (plus the shared
+benchmark questions) goes through the query path one stage at a time:
+
+    tokenize       query tokenization for BM25
+    bm25           BM25 scoring + top candidates
+    embed          query embedding (model call, no embedding cache)
+    vector_query   dense search with the precomputed vector
+    fusion         score fusion + result formatting
+    format         prompt building (context packing + template)
+    llm            local StubLLM (simulated latency / token rate)
+    total          sum of the above for one question
+
+The report shows p50/p95/p99 per stage, questions/s and peak RSS. The
+results are saved as JSON; --baseline compares them with an earlier run
+and flags every stage (and throughput / memory) that got worse by more
+than --tolerance. The exit status is 1 when something regressed, so the
+suite can gate CI.
+
+Usage:
+    python benchmarks/run_suite.py --repeat 5
+    python benchmarks/run_suite.py --baseline benchmarks/results/suite_20250101-120000.json
+    python benchmarks/run_suite.py --compare old.json new.json
+    python benchmarks/run_suite.py --llm-latency 0.3 --tokens-per-second 50
+    python benchmarks/run_suite.py --no-metrics   # instrumentation overhead
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from common import BASE_DIR, QUESTIONS, percentiles
+
+import rag
+from compliance_rag import metrics
+from compliance_rag.index import tokenize
+from compliance_rag.llm import StubLLM
+from compliance_rag.resources import process_memory
+from compliance_rag.tokens import token_counter_name
+from test_rag_questions import TEST_SETS
+
+STAGES = ("tokenize", "bm25", "embed", "vector_query", "fusion", "format", "llm", "total")
+POINTS = (50, 95, 99)
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+
+def question_set():
+    """[(category, question)]: the test_rag_questions sets, then the shared questions"""
+    items = [(category, q) for category, questions in TEST_SETS.items() for q in questions]
+    seen = {q for _, q in items}
+    return items + [("Benchmark", q) for q in QUESTIONS if q not in seen]
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes (None if unknown)"""
+    try:
+        import resource
+    except ImportError:
+        return process_memory()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================================
+# RUN
+# ============================================================
+def run_question(retriever, embedding_fn, llm, question, top_k, candidate_k):
+    """Milliseconds per stage for one question"""
+    timings = {}
+    clock = time.perf_counter
+
+    start = clock()
+    tokens = tokenize(question)
+    timings['tokenize'] = clock() - start
+
+    start = clock()
+    sparse = retriever._sparse_scores(retriever.bm25.get_scores(tokens), None, candidate_k)
+    timings['bm25'] = clock() - start
+
+    start = clock()
+    vector = embedding_fn.encode([question])
+    timings['embed'] = clock() - start
+
+    start = clock()
+    dense = retriever.dense_search_batch([question], top_k=candidate_k, embeddings=vector)[0]
+    timings['vector_query'] = clock() - start
+
+    start = clock()
+    docs = retriever._fuse(dense, sparse, top_k)
+    timings['fusion'] = clock() - start
+
+    start = clock()
+    messages = rag._messages(question, docs)
+    timings['format'] = clock() - start
+
+    start = clock()
+    if llm is not None:
+        llm.invoke(messages)
+    timings['llm'] = clock() - start
+
+    timings = {stage: seconds * 1000 for stage, seconds in timings.items()}
+    timings['total'] = sum(timings.values())
+    return timings
+
+
+def run_suite(args):
+    if args.no_metrics:
+        metrics.configure(enabled=False)
+    load_started = time.perf_counter()
+    retriever = rag.get_retriever()
+    embedding_fn = rag.RESOURCES.embedding_fn
+    load_seconds = time.perf_counter() - load_started
+    llm = None if args.no_llm else StubLLM(latency=args.llm_latency,
+                                           tokens_per_second=args.tokens_per_second)
+    candidate_k = args.candidate_k or retriever.candidate_k
+    questions = question_set()
+
+    # Warm-up rounds load the model and fill the OS page cache
+    for _ in range(args.warmup):
+        for _, question in questions:
+            run_question(retriever, embedding_fn, llm, question, args.top_k, candidate_k)
+    rss_after_warmup = process_memory()
+
+    samples = {stage: [] for stage in STAGES}
+    by_category = {}
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for category, question in questions:
+            timings = run_question(retriever, embedding_fn, llm, question,
+                                   args.top_k, candidate_k)
+            for stage, ms in timings.items():
+                samples[stage].append(ms)
+            by_category.setdefault(category, []).append(timings['total'])
+    wall = time.perf_counter() - started
+
+    stages = {}
+    for stage in STAGES:
+        values = samples[stage]
+        stages[stage] = {
+            **percentiles(values, POINTS),
+            'mean': sum(values) / len(values),
+            'max': max(values),
+        }
+
+    dense_backend = (type(retriever.dense_index).__name__
+                     if retriever.dense_index is not None else "chroma")
+    return {
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'questions': len(questions),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'top_k': args.top_k,
+            'candidate_k': candidate_k,
+            'llm': None if llm is None else {'backend': "stub",
+                                             'latency': args.llm_latency,
+                                             'tokens_per_second': args.tokens_per_second},
+            'dense_backend': dense_backend,
+            'metrics': metrics.registry().enabled,
+            'num_chunks': len(retriever.chunks),
+            'corpus_id': retriever.corpus_id,
+            'token_counter': token_counter_name(),
+        },
+        'load_seconds': load_seconds,
+        'stages_ms': stages,
+        'categories_ms': {category: percentiles(values, POINTS)
+                          for category, values in by_category.items()},
+        'throughput_qps': len(samples['total']) / wall,
+        'rss_bytes': rss_after_warmup,
+        'peak_rss_bytes': peak_rss(),
+    }
+
+
+# ============================================================
+# REPORT
+# ============================================================
+def print_report(result):
+    settings = result['settings']
+    print(f"\n{'stage':<14} " + " ".join(f"{f'p{p} ms':>10}" for p in POINTS)
+          + f" {'mean ms':>10} {'share':>7}")
+    total_mean = result['stages_ms']['total']['mean'] or 1
+    for stage, stats in result['stages_ms'].items():
+        share = "" if stage == "total" else f"{stats['mean'] / total_mean:.0%}"
+        print(f"{stage:<14} " + " ".join(f"{stats[f'p{p}']:>10.2f}" for p in POINTS)
+              + f" {stats['mean']:>10.2f} {share:>7}")
+
+    print(f"\n{'category':<28} " + " ".join(f"{f'p{p} ms':>10}" for p in POINTS))
+    for category, stats in result['categories_ms'].items():
+        print(f"{category[:28]:<28} " + " ".join(f"{stats[f'p{p}']:>10.2f}" for p in POINTS))
+
+    peak = result['peak_rss_bytes']
+    print(f"\n   Throughput   : {result['throughput_qps']:.1f} questions/s "
+          f"({settings['questions']} questions x {settings['repeat']})")
+    print(f"   Peak RSS     : {peak / 1e6:.0f} MB" if peak else "   Peak RSS     : unknown")
+    print(f"   Index        : {settings['num_chunks']:,} chunks, dense: {settings['dense_backend']}, "
+          f"loaded in {result['load_seconds']:.1f}s")
+
+
+def compare(baseline, result, tolerance, min_delta_ms):
+    """
+    Regressions of `result` against `baseline`.
+
+    A stage regresses when its p50 or p95 grew by more than `tolerance`
+    (relative) and by more than min_delta_ms (absolute, to ignore
+    timer noise on sub-millisecond stages).
+
+    Returns:
+        List of human-readable regression lines
+    """
+    regressions = []
+    print(f"\n{'stage':<14} {'metric':>6} {'baseline':>10} {'current':>10} {'change':>8}")
+    for stage, stats in result['stages_ms'].items():
+        old_stats = baseline.get('stages_ms', {}).get(stage)
+        if old_stats is None:
+            continue
+        for metric in ("p50", "p95"):
+            old, new = old_stats[metric], stats[metric]
+            change = (new - old) / old if old else 0.0
+            flag = change > tolerance and new - old > min_delta_ms
+            print(f"{stage:<14} {metric:>6} {old:>10.2f} {new:>10.2f} {change:>+8.0%}"
+                  + ("  ⚠️" if flag else ""))
+            if flag:
+                regressions.append(f"{stage} {metric}: {old:.2f} -> {new:.2f} ms ({change:+.0%})")
+
+    old_qps, new_qps = baseline.get('throughput_qps'), result['throughput_qps']
+    if old_qps and (old_qps - new_qps) / old_qps > tolerance:
+        regressions.append(f"throughput: {old_qps:.1f} -> {new_qps:.1f} questions/s")
+
+    old_rss, new_rss = baseline.get('peak_rss_bytes'), result['peak_rss_bytes']
+    if old_rss and new_rss and (new_rss - old_rss) / old_rss > tolerance:
+        regressions.append(f"peak RSS: {old_rss / 1e6:.0f} -> {new_rss / 1e6:.0f} MB")
+
+    if baseline.get('settings') != result.get('settings'):
+        print("\n   ⚠️  Settings differ from the baseline - timings may not be comparable")
+    return regressions
+
+
+def load_result(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def report_regressions(regressions, tolerance):
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print(f"\n✅ No regressions beyond {tolerance:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end RAG benchmark suite")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured rounds over the questions")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured rounds first")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--candidate-k", type=int, default=None,
+                        help="Dense and sparse candidates (default: the retriever's)")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Simulated StubLLM latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Simulated StubLLM token rate (0 = instant)")
+    parser.add_argument("--no-llm", action="store_true", help="Skip the LLM stage")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="Turn off the compliance_rag.metrics instrumentation")
+    parser.add_argument("--output", default=None,
+                        help="Result file (default: benchmarks/results/suite_<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier result file to compare with")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Only compare two saved result files")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative slowdown flagged as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, result = (load_result(path) for path in args.compare)
+        regressions = compare(baseline, result, args.tolerance, args.min_delta_ms)
+        sys.exit(report_regressions(regressions, args.tolerance))
+
+    print("=" * 70)
+    print("🏁 END-TO-END BENCHMARK SUITE")
+    print("=" * 70)
+
+    result = run_suite(args)
+    print_report(result)
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"suite_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Saved to {output}")
+
+    if args.baseline:
+        regressions = compare(load_result(args.baseline), result,
+                              args.tolerance, args.min_delta_ms)
+        sys.exit(report_regressions(regressions, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+# compliance_rag/__init__.py
+"""
+Retrieval library for the banking compliance chatbot.
+
+Importing this package has no side effects; indexes are built by
+`python hybrid_search.py` and loaded with `load_index()`.
+"""
+from .index import build_index, load_chunks, load_index, tokenize
+from .retriever import HybridRetriever
+
+__all__ = [
+    "HybridRetriever",
+    "build_index",
+    "load_chunks",
+    "load_index",
+    "tokenize",
+]
@@ -0,0 +1,152 @@
+# compliance_rag/answer_cache.py
+"""
+Answer cache for rag_query.
+
+An answer is reused when the same (normalized) question retrieved the
+same chunks with the same prompt template, model and temperature on
+the same corpus build. Optionally, a differently worded question also
+hits when its query embedding is close enough (cosine similarity) to a
+cached question that retrieved the same chunks.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .embedding_cache import normalize_query
+
+
+def text_hash(text):
+    """Short stable hash used for prompt templates and corpora"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def retrieval_fingerprint(chunk_indices, prompt_hash, model, temperature, corpus_id=None):
+    """Everything besides the question that determines the LLM output"""
+    indices = ",".join(str(int(i)) for i in sorted(chunk_indices))
+    return text_hash(f"{corpus_id}|{indices}|{prompt_hash}|{model}|{temperature}")
+
+
+class AnswerCache:
+    """
+    In-memory answer cache with TTL and LRU size eviction.
+
+    Args:
+        max_entries: Maximum number of cached answers (LRU eviction)
+        ttl_seconds: Entries older than this are ignored and dropped
+            (None = never expire)
+        similarity_threshold: Cosine similarity above which a different
+            question with the same retrieval fingerprint is treated as a
+            near-duplicate (None = exact matches only)
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=24 * 3600,
+                 similarity_threshold=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self.corpus_id = None
+        self._entries = OrderedDict()   # (fingerprint, question) -> entry
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------
+    def check_corpus(self, corpus_id):
+        """Drop every entry when the chunk corpus has been rebuilt"""
+        with self._lock:
+            if corpus_id != self.corpus_id:
+                self._entries.clear()
+                self.corpus_id = corpus_id
+
+    def _expired(self, entry, now):
+        return self.ttl_seconds is not None and now - entry['created_at'] > self.ttl_seconds
+
+    def _purge_expired(self, now):
+        if self.ttl_seconds is None:
+            return
+        stale = [key for key, entry in self._entries.items() if self._expired(entry, now)]
+        for key in stale:
+            del self._entries[key]
+
+    # ------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------
+    def get(self, question, fingerprint, query_embedding=None):
+        """Return the cached value or None"""
+        key = (fingerprint, normalize_query(question))
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['value']
+
+            if self.similarity_threshold is not None and query_embedding is not None:
+                match = self._nearest(fingerprint, query_embedding, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.near_hits += 1
+                    return self._entries[match]['value']
+
+            self.misses += 1
+            return None
+
+    def _nearest(self, fingerprint, query_embedding, now):
+        query = _unit(query_embedding)
+        best_key, best_sim = None, self.similarity_threshold
+        for key, entry in self._entries.items():
+            if key[0] != fingerprint or entry['embedding'] is None:
+                continue
+            if self._expired(entry, now):
+                continue
+            similarity = float(np.dot(query, entry['embedding']))
+            if similarity >= best_sim:
+                best_key, best_sim = key, similarity
+        return best_key
+
+    def put(self, question, fingerprint, value, query_embedding=None):
+        key = (fingerprint, normalize_query(question))
+        now = time.time()
+        embedding = _unit(query_embedding) if query_embedding is not None else None
+
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'embedding': embedding,
+                'created_at': now,
+            }
+            self._entries.move_to_end(key)
+            self._purge_expired(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.near_hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+        }
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,189 @@
+# compliance_rag/bm25.py
+"""
+Vectorized BM25 (Okapi) over a sparse term-document matrix.
+
+Scores are identical to `rank_bm25.BM25Okapi` with the same k1, b and
+epsilon: IDF (including the epsilon floor for negative IDFs) and the
+document length normalization are folded into the matrix at build
+time, so a query only touches the postings of its own terms instead of
+looping over every document in Python.
+"""
+import math
+
+import numpy as np
+from scipy import sparse
+
+
+class SparseBM25:
+    """
+    BM25Okapi-compatible index stored as a CSR term-document matrix.
+
+    Row t of `term_doc` holds, for every document d containing term t,
+    the precomputed weight idf(t) * tf * (k1 + 1) / (tf + k1 * norm(d)).
+
+    Args:
+        corpus: List of tokenized documents (lists of strings)
+        k1, b, epsilon: Same meaning and defaults as BM25Okapi
+    """
+
+    def __init__(self, corpus, k1=1.5, b=0.75, epsilon=0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self._build([term_frequencies(document) for document in corpus])
+
+    @classmethod
+    def from_term_frequencies(cls, frequencies, k1=1.5, b=0.75, epsilon=0.25):
+        """
+        Build from per-document {term: count} dicts (see term_frequencies),
+        so unchanged documents do not have to be re-tokenized.
+        """
+        index = cls.__new__(cls)
+        index.k1 = k1
+        index.b = b
+        index.epsilon = epsilon
+        index._build(frequencies)
+        return index
+
+    def _build(self, doc_frequencies):
+        vocab = {}
+        doc_ids, term_ids, freqs, doc_len = [], [], [], []
+        for d, frequencies in enumerate(doc_frequencies):
+            doc_len.append(sum(frequencies.values()))
+            for word, freq in frequencies.items():
+                term_ids.append(vocab.setdefault(word, len(vocab)))
+                doc_ids.append(d)
+                freqs.append(freq)
+
+        self.vocab = vocab
+        self.corpus_size = len(doc_len)
+        self.doc_len = np.asarray(doc_len, dtype=np.int64)
+        self.avgdl = int(self.doc_len.sum()) / self.corpus_size
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        tf = np.asarray(freqs, dtype=np.float64)
+
+        self.idf = self._calc_idf(np.bincount(term_ids, minlength=len(vocab)))
+
+        # Same operation order as BM25Okapi.get_scores -> bit-identical scores
+        doc_norm = self.k1 * (1 - self.b + self.b * self.doc_len / self.avgdl)
+        weights = self.idf[term_ids] * (tf * (self.k1 + 1) / (tf + doc_norm[doc_ids]))
+
+        self.term_doc = sparse.csr_matrix(
+            (weights, (term_ids, doc_ids)),
+            shape=(len(vocab), self.corpus_size),
+        )
+        self.term_doc.sort_indices()
+
+    def _calc_idf(self, doc_freq):
+        # Python floats + math.log, exactly as BM25Okapi._calc_idf
+        idf = np.array(
+            [math.log(self.corpus_size - n + 0.5) - math.log(n + 0.5)
+             for n in doc_freq.tolist()],
+            dtype=np.float64,
+        )
+        self.average_idf = float(sum(idf.tolist())) / len(idf) if len(idf) else 0.0
+        idf[idf < 0] = self.epsilon * self.average_idf
+        return idf
+
+    # ------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------
+    def query_term_ids(self, query):
+        """Vocabulary ids of the query tokens (unknown tokens dropped, repeats kept)"""
+        return [self.vocab[q] for q in query if q in self.vocab]
+
+    def get_scores(self, query, doc_ids=None):
+        """
+        BM25 score of every document for a tokenized query.
+
+        Args:
+            query: List of query tokens
+            doc_ids: Optional sorted int array; only these documents are
+                scored and the result has one entry per id
+        """
+        indptr, indices, data = self.term_doc.indptr, self.term_doc.indices, self.term_doc.data
+        scores = np.zeros(self.corpus_size if doc_ids is None else len(doc_ids))
+
+        for t in self.query_term_ids(query):
+            start, end = indptr[t], indptr[t + 1]
+            rows = indices[start:end]
+            weights = data[start:end]
+            if doc_ids is not None:
+                pos = np.searchsorted(doc_ids, rows)
+                pos[pos == len(doc_ids)] = 0
+                hit = doc_ids[pos] == rows if len(doc_ids) else np.zeros(len(rows), bool)
+                rows, weights = pos[hit], weights[hit]
+            scores[rows] += weights
+        return scores
+
+    def _position_matrices(self, queries):
+        """
+        One (n_queries x vocab) CSR per query token position: matrix j
+        selects the j-th known term of every query that has one.
+        """
+        term_ids = [self.query_term_ids(query) for query in queries]
+        for position in range(max(map(len, term_ids), default=0)):
+            rows = [q for q, ids in enumerate(term_ids) if len(ids) > position]
+            cols = [term_ids[q][position] for q in rows]
+            data = np.ones(len(rows), dtype=np.float64)
+            yield sparse.csr_matrix((data, (rows, cols)), shape=(len(queries), len(self.vocab)))
+
+    def iter_scores_batch(self, queries, doc_ids=None, max_cells=1 << 24):
+        """
+        Scores of many tokenized queries as sparse matrix products.
+
+        Yields dense (block x docs) score arrays, with blocks sized so a
+        block never holds more than `max_cells` floats. Each query token
+        position is added as its own product, so the weights are summed
+        in the same order as get_scores() and rows are bit-identical.
+        """
+        matrix = self.term_doc if doc_ids is None else self.term_doc[:, doc_ids]
+        n_docs = matrix.shape[1]
+        block = max(1, max_cells // max(n_docs, 1))
+        for start in range(0, len(queries), block):
+            chunk = queries[start:start + block]
+            scores = np.zeros((len(chunk), n_docs))
+            for position_matrix in self._position_matrices(chunk):
+                scores += (position_matrix @ matrix).toarray()
+            yield scores
+
+    def get_scores_batch(self, queries, doc_ids=None):
+        """(n_queries x docs) score matrix, see iter_scores_batch"""
+        blocks = list(self.iter_scores_batch(queries, doc_ids=doc_ids))
+        if not blocks:
+            return np.zeros((0, self.corpus_size if doc_ids is None else len(doc_ids)))
+        return np.vstack(blocks)
+
+    def top_n(self, query, n=20, doc_ids=None):
+        """
+        Indices and scores of the n best documents, best first.
+
+        Uses argpartition, so only the n winners are sorted.
+        """
+        scores = self.get_scores(query, doc_ids=doc_ids)
+        indices = top_k_indices(scores, n)
+        if doc_ids is not None:
+            return doc_ids[indices], scores[indices]
+        return indices, scores[indices]
+
+
+def term_frequencies(document):
+    """{term: count} of a tokenized document, in first-occurrence order"""
+    frequencies = {}
+    for word in document:
+        frequencies[word] = frequencies.get(word, 0) + 1
+    return frequencies
+
+
+def top_k_indices(scores, k):
+    """Indices of the k largest scores in descending order"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates], kind="stable")[::-1]]
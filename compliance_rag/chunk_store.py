@@ -0,0 +1,248 @@
+# compliance_rag/chunk_store.py
+"""
+Columnar on-disk chunk store (replaces chunks.pkl).
+
+Layout of the store directory:
+
+    meta.json                 count, field order, column kinds, dictionaries
+    content.bin               UTF-8 text of every chunk, back to back
+    content.offsets.npy       int64 byte offsets (count + 1)
+    chunk_id.bin / .offsets.npy
+    source.codes.npy          int32 dictionary codes (-1 = missing)
+    regulator.codes.npy       ...
+    chunk_number.npy          int64
+
+Opening a store reads meta.json and memory-maps the arrays and text
+blobs; nothing is decoded until a chunk is accessed, so loading is O(1)
+in the number of chunks and processes share the same page cache.
+"""
+import json
+import mmap
+import os
+import shutil
+
+import numpy as np
+
+TEXT_COLUMNS = ("content", "chunk_id")
+STORE_VERSION = 1
+
+
+# ============================================================
+# WRITING
+# ============================================================
+def _column_kind(name, values):
+    if name in TEXT_COLUMNS:
+        return "text"
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "int"
+    return "dict"
+
+
+def write_chunk_store(chunks, store_dir):
+    """
+    Write chunks (list of dicts) as a columnar store.
+
+    The store is written next to `store_dir` and swapped in with a
+    rename, so readers never see a half-written store.
+    """
+    store_dir = os.fspath(store_dir)
+    tmp_dir = store_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    fields = []
+    for chunk in chunks:
+        for key in chunk:
+            if key not in fields:
+                fields.append(key)
+
+    kinds, dictionaries = {}, {}
+    for name in fields:
+        values = [chunk.get(name) for chunk in chunks]
+        kind = _column_kind(name, values)
+        kinds[name] = kind
+
+        if kind == "text":
+            offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            with open(os.path.join(tmp_dir, f"{name}.bin"), "wb") as f:
+                for i, value in enumerate(values):
+                    data = (value or "").encode("utf-8")
+                    f.write(data)
+                    offsets[i + 1] = offsets[i] + len(data)
+            np.save(os.path.join(tmp_dir, f"{name}.offsets.npy"), offsets)
+
+        elif kind == "int":
+            column = np.array([v if v is not None else -1 for v in values], dtype=np.int64)
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), column)
+
+        else:
+            lookup, codes = {}, np.empty(len(values), dtype=np.int32)
+            for i, value in enumerate(values):
+                codes[i] = -1 if value is None else lookup.setdefault(value, len(lookup))
+            dictionaries[name] = list(lookup)
+            np.save(os.path.join(tmp_dir, f"{name}.codes.npy"), codes)
+
+    meta = {
+        'version': STORE_VERSION,
+        'count': len(chunks),
+        'fields': fields,
+        'kinds': kinds,
+        'dictionaries': dictionaries,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    # Swap in atomically; open readers keep their (unlinked) mappings
+    old_dir = store_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(store_dir):
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+# ============================================================
+# READING
+# ============================================================
+class _TextColumn:
+    """Memory-mapped UTF-8 blob + offsets"""
+
+    def __init__(self, store_dir, name):
+        self.offsets = np.load(os.path.join(store_dir, f"{name}.offsets.npy"), mmap_mode="r")
+        path = os.path.join(store_dir, f"{name}.bin")
+        if os.path.getsize(path):
+            with open(path, "rb") as f:
+                self.blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.blob = b""
+
+    def __getitem__(self, i):
+        return self.blob[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def nbytes(self):
+        return len(self.blob) + self.offsets.nbytes
+
+    def close(self):
+        if isinstance(self.blob, mmap.mmap):
+            self.blob.close()
+        self.blob = b""
+
+
+class ChunkStore:
+    """
+    Read-only, lazily loaded view of a columnar chunk store.
+
+    Behaves like the old list of chunk dicts: len(store), store[i],
+    iteration and slicing all work and return plain dicts.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = os.fspath(store_dir)
+        with open(os.path.join(self.store_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.count = meta['count']
+        self.fields = meta['fields']
+        self.kinds = meta['kinds']
+        self.dictionaries = meta['dictionaries']
+
+        self._text, self._ints, self._codes = {}, {}, {}
+        for name, kind in self.kinds.items():
+            if kind == "text":
+                self._text[name] = _TextColumn(self.store_dir, name)
+            elif kind == "int":
+                self._ints[name] = np.load(os.path.join(self.store_dir, f"{name}.npy"),
+                                           mmap_mode="r")
+            else:
+                self._codes[name] = np.load(os.path.join(self.store_dir, f"{name}.codes.npy"),
+                                            mmap_mode="r")
+
+    # ------------------------------------------------------------
+    # List-of-dicts compatibility
+    # ------------------------------------------------------------
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        i = int(i)
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("chunk index out of range")
+
+        chunk = {}
+        for name in self.fields:
+            kind = self.kinds[name]
+            if kind == "text":
+                chunk[name] = self._text[name][i]
+            elif kind == "int":
+                chunk[name] = int(self._ints[name][i])
+            else:
+                code = int(self._codes[name][i])
+                if code >= 0:
+                    chunk[name] = self.dictionaries[name][code]
+        return chunk
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def __reduce__(self):
+        # Pickle by path - never copy the data
+        return (ChunkStore, (self.store_dir,))
+
+    # ------------------------------------------------------------
+    # Column access
+    # ------------------------------------------------------------
+    def text(self, name, i):
+        """One text value (e.g. content) without building the whole dict"""
+        return self._text[name][i]
+
+    def strings(self, name):
+        """All values of a text or dictionary column as a list"""
+        if name in self._text:
+            column = self._text[name]
+            return [column[i] for i in range(self.count)]
+        dictionary = self.dictionaries[name]
+        return [dictionary[c] if c >= 0 else None for c in self._codes[name].tolist()]
+
+    def codes(self, name):
+        """Dictionary codes of a categorical column (int32, memory-mapped)"""
+        return self._codes[name]
+
+    def code_of(self, name, value):
+        """Dictionary code of `value` in column `name`, or None"""
+        try:
+            return self.dictionaries[name].index(value)
+        except (KeyError, ValueError):
+            return None
+
+    def close(self):
+        """Release the memory maps (needed before replacing the store on Windows)"""
+        for column in self._text.values():
+            column.close()
+        self._ints.clear()
+        self._codes.clear()
+
+    def nbytes(self):
+        """On-disk size of the columns (what a process maps, not what it copies)"""
+        total = sum(column.nbytes() for column in self._text.values())
+        total += sum(column.nbytes for column in self._ints.values())
+        total += sum(column.nbytes for column in self._codes.values())
+        return total
+
+
+# ============================================================
+# MIGRATION
+# ============================================================
+def migrate_pickle(pickle_file, store_dir):
+    """One-time conversion of the old chunks.pkl into a chunk store"""
+    import pickle
+
+    with open(pickle_file, "rb") as f:
+        chunks = pickle.load(f)
+    write_chunk_store(chunks, store_dir)
+    return len(chunks)
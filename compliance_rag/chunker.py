@@ -0,0 +1,266 @@
+# compliance_rag/chunker.py
+"""
+Structure-aware chunking.
+
+The sliding window in ingest.stream_chunks cuts every 1,300 characters
+wherever that lands - mid-sentence, mid-clause. structured_chunks():
+
+1. Finds section headings in one regex pass: numbered clauses
+   ("3.2.1 Liquidity risk"), upper-case numbered headings ("4. CAPITAL
+   ADEQUACY") and keyword headings ("Recommendation 10", "Paragraph 45",
+   "Article", "Section", "Chapter", "Annex", "Part", "Principle", ...).
+2. Merges sections too small to stand alone into the next one.
+3. Splits each section into sentences (one regex pass; common
+   abbreviations such as "e.g." and "Rs." do not end a sentence).
+4. Packs whole sentences into chunks of at most `token_budget` tokens.
+   A chunk never straddles two sections; only a sentence longer than
+   the budget is cut, at word boundaries.
+
+Each step is a single left-to-right pass with bounded regexes, so the
+cost is linear in the document length. Chunks carry section_title,
+chunk_in_section and total_section_chunks.
+
+iter_structured_chunks() does the same over a stream of pages, keeping
+only the open section's unchunked text (see MAX_BUFFER_CHARS).
+"""
+import math
+import re
+
+from .tokens import count_tokens
+
+CHUNK_TOKENS = 384          # max tokens per chunk
+MIN_SECTION_TOKENS = 40     # smaller sections are merged into the next one
+MAX_TITLE_CHARS = 100
+MAX_BUFFER_CHARS = 1 << 16  # open-section text kept before complete chunks are cut off
+
+_KEYWORDS = (r"Recommendation|Paragraph|Para|Article|Section|Chapter|Annex(?:ure)?|"
+             r"Appendix|Part|Principle|Rule|Schedule|Regulation|Clause")
+_HEADING = re.compile(
+    r"^[ \t]*(?:"
+    # 3.2.1 Title  /  3.2 Title
+    r"\d{1,3}(?:\.\d{1,3}){1,4}\.?[ \t]+[A-Z(][^\n]{1,150}"
+    # 4. CAPITAL ADEQUACY  /  IV. DEFINITIONS
+    r"|(?:\d{1,2}|[IVX]{1,5}|[A-H])[.)][ \t]+[A-Z][A-Z0-9 ,&'/()\-]{3,100}"
+    # Recommendation 10 - Customer due diligence  /  Paragraph 45
+    r"|(?i:" + _KEYWORDS + r")[ \t]+(?:\d{1,3}[A-Za-z]?|[IVXLC]{1,6})\b"
+    r"(?:[ \t]*[-–—:.][^\n]{0,120}|[ \t]+[A-Z(][^\n]{0,120})?"
+    r")[ \t]*$",
+    re.MULTILINE,
+)
+# Wrapped lines of running text look like headings; they end like this
+_CONTINUATION = re.compile(r"(?:,|\b(?:and|or|of|the|to|by|in|for|with|a|an|under|that))$")
+
+_SENTENCE_END = re.compile(
+    # The cheap [.!?;] check comes first; the abbreviation checks only
+    # run after a full stop
+    r"(?<=[.!?;])"
+    r"(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\betc\.)(?<!\bviz\.)(?<!\bNo\.)(?<!\bno\.)"
+    r"(?<!\bRs\.)(?<!\bSr\.)(?<!\bpara\.)(?<!\bart\.)(?<!\bsec\.)(?<!\bvol\.)"
+    r"\s+(?=[\"'(\[]?[A-Z0-9•])"
+    r"|\n[ \t]*\n\s*"
+)
+
+
+# ============================================================
+# SECTIONS
+# ============================================================
+def _title(line):
+    return " ".join(line.split())[:MAX_TITLE_CHARS]
+
+
+def split_sections(text):
+    """
+    Split a document at its headings.
+
+    Returns:
+        List of (title, text) - the text starts with the heading line;
+        text before the first heading gets the title ""
+    """
+    sections, title, start = [], "", 0
+    for match in _HEADING.finditer(text):
+        line = match.group().strip()
+        if _CONTINUATION.search(line):
+            continue
+        if text[start:match.start()].strip():
+            sections.append((title, text[start:match.start()]))
+        title, start = _title(line), match.start()
+    if text[start:].strip():
+        sections.append((title, text[start:]))
+    return sections
+
+
+def merge_small_sections(sections, min_tokens=MIN_SECTION_TOKENS):
+    """Fold sections under min_tokens (e.g. a bare chapter heading) into the next one"""
+    merged, carry = [], ""
+    for i, (title, body) in enumerate(sections):
+        body = carry + body
+        if i + 1 < len(sections) and count_tokens(body) < min_tokens:
+            carry = body.rstrip() + "\n"
+            continue
+        carry = ""
+        merged.append((title, body))
+    return merged
+
+
+# ============================================================
+# SENTENCES
+# ============================================================
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def _split_long(sentence, tokens, token_budget):
+    """Cut an over-long sentence (tables, lists) into even word runs"""
+    words = sentence.split()
+    pieces = math.ceil(tokens / token_budget)
+    size = math.ceil(len(words) / pieces)
+    return [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+
+def _pack(sentences, token_budget):
+    """pack_sentences() -> [(index of the chunk's first sentence, chunk)]"""
+    chunks, current, first, used = [], [], 0, 0
+    for i, sentence in enumerate(sentences):
+        tokens = count_tokens(sentence)
+        if current and used + tokens > token_budget:
+            chunks.append((first, " ".join(current)))
+            current, used = [], 0
+        if tokens > token_budget:
+            chunks.extend((i, piece) for piece in _split_long(sentence, tokens, token_budget))
+            continue
+        if not current:
+            first = i
+        current.append(sentence)
+        used += tokens
+    if current:
+        chunks.append((first, " ".join(current)))
+    return chunks
+
+
+def pack_sentences(sentences, token_budget=CHUNK_TOKENS):
+    """Greedily pack whole sentences into chunks of at most token_budget tokens"""
+    return [chunk for _, chunk in _pack(sentences, token_budget)]
+
+
+# ============================================================
+# CHUNKS
+# ============================================================
+def structured_chunks(text, token_budget=CHUNK_TOKENS, min_section_tokens=MIN_SECTION_TOKENS):
+    """
+    Chunk a document along its sections and sentences.
+
+    Returns:
+        List of {'content', 'section_title', 'chunk_in_section',
+        'total_section_chunks'} in document order
+    """
+    return list(iter_structured_chunks([text], token_budget, min_section_tokens))
+
+
+def iter_structured_chunks(pieces, token_budget=CHUNK_TOKENS,
+                           min_section_tokens=MIN_SECTION_TOKENS,
+                           max_buffer_chars=MAX_BUFFER_CHARS):
+    """
+    structured_chunks() over a stream of text pieces (e.g. pages).
+
+    Yields the same chunks as structured_chunks("".join(pieces)). Only
+    the open section's unchunked text is buffered: a section is chunked
+    as soon as the next heading shows up, and once its text passes
+    max_buffer_chars every chunk that later text cannot change is cut
+    off. The chunks of an open section are held back until it ends,
+    because total_section_chunks is not known before.
+    """
+    section = _OpenSection(token_budget, min_section_tokens)
+    text, scan = "", 0       # open section text; headings searched up to scan
+    for piece in pieces:
+        text += piece
+        # Headings are whole lines - only search up to the last newline
+        end = text.rfind("\n") + 1
+        text, scan, chunks = _split_at_headings(section, text, scan, end)
+        yield from chunks
+        if scan > max_buffer_chars:
+            cut = section.flush(text[:scan])
+            text, scan = text[cut:], scan - cut
+
+    text, scan, chunks = _split_at_headings(section, text, scan, len(text))
+    yield from chunks
+    yield from section.close(text, last=True)
+
+
+def _split_at_headings(section, text, scan, end):
+    """Close the open section at every heading in text[scan:end]"""
+    chunks = []
+    while True:
+        match = _HEADING.search(text, scan, end)
+        if match is None:
+            return text, end, chunks
+        line = match.group().strip()
+        if _CONTINUATION.search(line):
+            scan = match.end()
+            continue
+        chunks.extend(section.close(text[:match.start()], last=False))
+        prefix = section.take_carry()
+        section.open(_title(line))
+        text = prefix + text[match.start():]
+        shift = len(prefix) - match.start()
+        scan, end = match.end() + shift, end + shift
+
+
+class _OpenSection:
+    """Title and already packed chunks of the section being read"""
+
+    def __init__(self, token_budget, min_section_tokens):
+        self.token_budget = token_budget
+        self.min_section_tokens = min_section_tokens
+        self.title = ""
+        self.done = []       # final chunk texts cut off by flush()
+        self.carry = ""      # small sections waiting to merge into the next one
+
+    def open(self, title):
+        self.title = title
+        self.done = []
+
+    def take_carry(self):
+        carry, self.carry = self.carry, ""
+        return carry
+
+    def flush(self, text):
+        """
+        Chunk the complete sentences of `text` (the start of the section
+        body) and keep the chunks later text cannot change.
+
+        Returns:
+            Offset in `text` where the unchunked rest starts
+        """
+        boundaries = [m for m in _SENTENCE_END.finditer(text) if m.end() < len(text)]
+        starts = [0] + [m.end() for m in boundaries]
+        sentences, offsets = [], []
+        for start, m in zip(starts, boundaries):   # the last segment may continue
+            sentence = text[start:m.start()].strip()
+            if sentence:
+                sentences.append(sentence)
+                offsets.append(start)
+
+        packed = _pack(sentences, self.token_budget)
+        if len(packed) < 2:
+            return 0
+        # The last chunk may still grow; everything before it is final
+        last = packed[-1][0]
+        self.done.extend(chunk for first, chunk in packed if first < last)
+        return offsets[last]
+
+    def close(self, body, last):
+        """Chunk dicts of the finished section (none while it is carried)"""
+        if not self.done and not body.strip():
+            return []
+        if not last and not self.done and count_tokens(body) < self.min_section_tokens:
+            self.carry = body.rstrip() + "\n"
+            return []
+
+        packed = self.done + pack_sentences(split_sentences(body), self.token_budget)
+        self.done = []
+        return [{
+            'content': content,
+            'section_title': self.title,
+            'chunk_in_section': i,
+            'total_section_chunks': len(packed),
+        } for i, content in enumerate(packed, 1)]
@@ -0,0 +1,124 @@
+# compliance_rag/client.py
+"""
+Client for the HTTP query service (serve.py).
+
+Uses only the standard library so that front ends (app.py, test
+scripts) can talk to a shared, preloaded index without importing the
+retrieval stack at all.
+"""
+import json
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+
+class ServiceError(RuntimeError):
+    """Non-2xx response from the query service"""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RAGClient:
+    """
+    Thin JSON client for serve.py.
+
+    Args:
+        base_url: e.g. "http://127.0.0.1:8000"
+        timeout: Socket timeout in seconds per request
+    """
+
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.last_timings = {}
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def status(self):
+        """Index status in the shape of ResourceManager.status()"""
+        status = self.health()['index']
+        if status.get('loaded_at'):
+            status['loaded_at'] = datetime.fromisoformat(status['loaded_at'])
+        return status
+
+    def stage_summary(self):
+        """Per-stage latency of the server (compliance_rag.metrics.stage_summary)"""
+        return self.health().get('stages', {})
+
+    def reload(self):
+        """Make the server swap in the index currently on disk"""
+        return self._request("POST", "/reload", {})
+
+    def search(self, query, top_k=5, filter_metadata=None, fusion=None, candidate_k=None):
+        """hybrid_search on the server - returns the list of result dicts"""
+        body = {
+            'query': query,
+            'top_k': top_k,
+            'filter': filter_metadata,
+            'fusion': fusion,
+            'candidate_k': candidate_k,
+        }
+        return self._request("POST", "/search", body)['results']
+
+    def ask(self, question, top_k=3, filter_metadata=None, use_cache=True, rerank=None):
+        """rag_query on the server - returns {'answer', 'sources', 'cached'}"""
+        body = {
+            'question': question,
+            'top_k': top_k,
+            'filter': filter_metadata,
+            'use_cache': use_cache,
+            'rerank': rerank,
+        }
+        return self._request("POST", "/ask", body)
+
+    def batch(self, questions, top_k=3, filter_metadata=None, mode="ask"):
+        """
+        Several questions in one request.
+
+        Args:
+            mode: "ask" for full answers, "search" for retrieval only
+        """
+        body = {
+            'questions': list(questions),
+            'top_k': top_k,
+            'filter': filter_metadata,
+            'mode': mode,
+        }
+        return self._request("POST", "/batch", body)['results']
+
+    def _request(self, method, path, body=None):
+        data = None
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers['Content-Type'] = 'application/json'
+
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers=headers, method=method
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                self.last_timings = parse_server_timing(response.headers.get("Server-Timing"))
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise ServiceError(e.code, message, e.headers.get("Retry-After")) from None
+
+
+def parse_server_timing(header):
+    """'queue;dur=1.2, app;dur=30.5' -> {'queue': 1.2, 'app': 30.5} (ms)"""
+    timings = {}
+    for metric in (header or "").split(","):
+        name, _, params = metric.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if name and key == "dur":
+                timings[name] = float(value)
+    return timings
@@ -0,0 +1,96 @@
+# compliance_rag/config.py
+import os
+from pathlib import Path
+
+# ============================================================
+# PATHS
+# ============================================================
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+PROCESSED_DIR = DATA_DIR / "processed"
+CHROMA_DIR = DATA_DIR / "chroma_db"
+
+CHUNKS_FILE = PROCESSED_DIR / "chunks.pkl"          # legacy, migrated on first load
+CHUNK_STORE_DIR = PROCESSED_DIR / "chunk_store"
+RAW_CHUNK_STORE_DIR = PROCESSED_DIR / "chunk_store_raw"   # before de-duplication
+DEDUP_REPORT_FILE = PROCESSED_DIR / "dedup_report.json"
+BM25_FILE = PROCESSED_DIR / "bm25_index.pkl"
+RETRIEVER_FILE = PROCESSED_DIR / "retriever_components.pkl"
+INDEX_META_FILE = PROCESSED_DIR / "index_meta.json"
+MANIFEST_FILE = PROCESSED_DIR / "manifest.json"
+BM25_TERM_CACHE_FILE = PROCESSED_DIR / "bm25_term_cache.pkl"
+DENSE_INDEX_DIR = PROCESSED_DIR / "dense_index"     # optional, see create_embeddings.py
+EMBEDDING_CHECKPOINT_DIR = PROCESSED_DIR / "embedding_checkpoint"   # resumable embedding build
+
+# ============================================================
+# RETRIEVAL SETTINGS
+# ============================================================
+COLLECTION_NAME = "banking_compliance"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DENSE_WEIGHT = 0.5   # 50% weight to semantic search
+SPARSE_WEIGHT = 0.5  # 50% weight to keyword search
+FUSION_METHOD = "weighted"   # weighted | rrf | zscore | minmax | learned
+CANDIDATE_K = 20             # dense and sparse candidates fused per query
+FUSION_WEIGHTS_FILE = PROCESSED_DIR / "fusion_weights.json"
+
+# ============================================================
+# EMBEDDING BUILD (create_embeddings.py)
+# ============================================================
+EMBED_BATCH_SIZE = 256       # texts per model call (length-bucketed)
+EMBED_BACKEND = "torch"      # torch | onnx (needs optimum[onnxruntime])
+INSERT_BATCH_SIZE = 5000     # precomputed vectors per ChromaDB upsert
+
+# ============================================================
+# PROMPT CONTEXT
+# ============================================================
+CONTEXT_PACKING = True       # merge neighbouring chunks, drop repeated text
+CONTEXT_TOKEN_BUDGET = 900   # max context tokens (None = no limit)
+
+# ============================================================
+# RERANKING
+# ============================================================
+RERANK_ENABLED = False       # rag_query default; override per call with rerank=
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 20       # hybrid_search results scored by the cross-encoder
+RERANK_BATCH_SIZE = 32
+RERANK_CACHE_ITEMS = 4096    # (question, chunk) scores kept in memory
+
+# ============================================================
+# CACHES
+# ============================================================
+QUERY_EMBEDDING_CACHE_FILE = PROCESSED_DIR / "query_embeddings.sqlite3"
+QUERY_EMBEDDING_MEMORY_ITEMS = 1024
+
+ANSWER_CACHE_MAX_ENTRIES = 512
+ANSWER_CACHE_TTL_SECONDS = 24 * 3600
+ANSWER_CACHE_SIMILARITY = None   # exact normalized question matches only; set a
+                                 # cosine threshold (e.g. 0.95) to opt in to near matches
+
+# ============================================================
+# QUERY SERVICE (serve.py)
+# ============================================================
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8000
+SERVICE_WORKERS = 4
+SERVICE_QUEUE_SIZE = 16          # requests waiting for a worker before 503
+SERVICE_MAX_BODY_BYTES = 1 << 20
+SERVICE_REJECT_QUEUE_SIZE = 32   # 503s waiting to be written; beyond it connections are closed
+SERVICE_REJECT_TIMEOUT = 2.0     # seconds a rejected client gets to send its request
+SERVICE_URL = os.getenv("RAG_SERVICE_URL")   # set to make app.py a client
+
+# ============================================================
+# LLM BACKEND (rag.py)
+# ============================================================
+# groq: ChatGroq (needs GROQ_API_KEY)
+# stub: local StubLLM that echoes the context - no network, no API key
+# none: retrieval-only; the prompt is still built, no answer is generated
+LLM_BACKEND = os.getenv("RAG_LLM_BACKEND", "groq")
+STUB_LLM_LATENCY = float(os.getenv("RAG_STUB_LATENCY", "0"))                    # seconds before the first token
+STUB_LLM_TOKENS_PER_SECOND = float(os.getenv("RAG_STUB_TOKENS_PER_SECOND", "0"))  # 0 = whole answer at once
+
+# ============================================================
+# METRICS / TRACING (compliance_rag.metrics)
+# ============================================================
+METRICS_ENABLED = os.getenv("RAG_METRICS", "1").lower() not in ("0", "false", "off")
+TRACE_FILE = os.getenv("RAG_TRACE_FILE")      # OTLP/JSON lines; unset = no traces
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
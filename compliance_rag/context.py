@@ -0,0 +1,226 @@
+# compliance_rag/context.py
+"""
+Context packing for the LLM prompt.
+
+Retrieved chunks overlap (the chunker's 200-character window overlap)
+and each one used to carry its own Source / Regulator / Jurisdiction
+header. pack_context():
+
+1. Groups chunks by source and merges neighbours (consecutive
+   original chunk numbers - the one in chunk_id, since de-duplication
+   renumbers chunk_number), cutting the span the two chunks share.
+2. Splits the passages into sentences and drops exact duplicates.
+3. If the result exceeds the token budget, keeps the sentences with the
+   highest query-term density (sentences with figures get a small
+   bonus - thresholds and ratios are what answers cite), in their
+   original order, until the budget is spent.
+4. Writes one Source / Regulator / Jurisdiction header per source.
+"""
+import re
+
+from .index import tokenize
+from .tokens import count_tokens
+
+MAX_OVERLAP = 400          # longest shared span looked for between neighbours
+_PROBE = 32
+_SEPARATOR_TOKENS = 3      # "\n…\n" between passages of one source
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+(?=[\"'(\[]?[A-Z0-9•\-])|\n{2,}")
+_NUMBER = re.compile(r"\d")
+_ORIGINAL_NUMBER = re.compile(r"::chunk_(\d+)$")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or "
+    "should the their there these this to under what when where which who "
+    "why with".split()
+)
+
+
+# ============================================================
+# MERGING
+# ============================================================
+def _position(doc):
+    """Chunk number the chunk was built with (chunk_id survives dedup)"""
+    match = _ORIGINAL_NUMBER.search(doc.get('chunk_id') or "")
+    if match:
+        return int(match.group(1))
+    number = doc.get('chunk_number')
+    return number if number is not None else doc.get('chunk_index', 0)
+
+
+def overlap_length(left, right, max_overlap=MAX_OVERLAP):
+    """Length of the longest suffix of `left` that starts `right`"""
+    probe = right[:_PROBE]
+    if len(probe) < 8:
+        return 0
+    start = max(0, len(left) - max_overlap)
+    pos = left.find(probe, start)
+    while pos != -1:
+        tail = left[pos:]
+        if right.startswith(tail):
+            return len(tail)
+        pos = left.find(probe, pos + 1)
+    return 0
+
+
+def merge_passages(docs):
+    """
+    Group docs by source and merge runs of neighbouring chunks.
+
+    Returns:
+        List of passages {'source', 'regulator', 'jurisdiction', 'text',
+        'rank'} ordered by the best retrieval rank among their chunks
+    """
+    by_source = {}
+    for rank, doc in enumerate(docs):
+        by_source.setdefault(doc['source'], []).append((rank, doc))
+
+    passages = []
+    for source, items in by_source.items():
+        items.sort(key=lambda item: _position(item[1]))
+        current = None
+        for rank, doc in items:
+            number = _position(doc)
+            if current is not None and number - current['last'] <= 1:
+                if number != current['last']:
+                    shared = overlap_length(current['text'], doc['content'])
+                    current['text'] += (
+                        doc['content'][shared:] if shared else "\n" + doc['content']
+                    )
+                current['last'] = number
+                current['rank'] = min(current['rank'], rank)
+                continue
+            current = {
+                'source': source,
+                'regulator': doc['regulator'],
+                'jurisdiction': doc['jurisdiction'],
+                'text': doc['content'],
+                'rank': rank,
+                'last': number,
+            }
+            passages.append(current)
+
+    passages.sort(key=lambda passage: passage['rank'])
+    return passages
+
+
+# ============================================================
+# SENTENCE SELECTION
+# ============================================================
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def query_terms(question):
+    return {t.strip("?,.!;:()\"'") for t in tokenize(question)} - _STOPWORDS - {""}
+
+
+def sentence_density(sentence, terms):
+    """Share of the sentence's words that are query terms (+ figure bonus)"""
+    words = [w.strip("?,.!;:()\"'") for w in tokenize(sentence)]
+    if not words:
+        return 0.0
+    density = sum(1 for w in words if w in terms) / len(words)
+    if _NUMBER.search(sentence):
+        density += 0.05
+    return density
+
+
+def _header(index, passage):
+    return (f"Document {index}: {passage['source']} | {passage['regulator']} | "
+            f"{passage['jurisdiction']}")
+
+
+def _header_tokens(passages):
+    """Header cost per source (numbered in retrieval order)"""
+    costs = {}
+    for passage in passages:
+        if passage['source'] not in costs:
+            costs[passage['source']] = (
+                count_tokens(_header(len(costs) + 1, passage)) + 2
+            )
+    return costs
+
+
+def pack_context(docs, question="", token_budget=None):
+    """
+    Pack retrieved docs into a compact prompt context.
+
+    Args:
+        docs: hybrid_search results (content, source, regulator,
+            jurisdiction and chunk_id / chunk_number / chunk_index)
+        question: Query whose terms decide which sentences are kept
+        token_budget: Max context tokens (None = no limit, only merging
+            and de-duplication)
+
+    Returns:
+        (context text, stats) - stats has input_chunks, sources,
+        sentences_kept, sentences_total, raw_tokens and tokens
+    """
+    passages = merge_passages(docs)
+    terms = query_terms(question)
+
+    seen = set()
+    sentences = []        # (passage no, position, text, tokens, density)
+    for p, passage in enumerate(passages):
+        for position, sentence in enumerate(split_sentences(passage['text'])):
+            key = " ".join(sentence.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+            sentences.append((p, position, sentence, count_tokens(sentence) + 1,
+                              sentence_density(sentence, terms)))
+
+    headers = _header_tokens(passages)
+    raw_tokens = (sum(headers.values()) + sum(s[3] for s in sentences)
+                  + (len(passages) - len(headers)) * _SEPARATOR_TOKENS)
+
+    if token_budget is None or raw_tokens <= token_budget:
+        kept = sentences
+    else:
+        kept, used, used_passages, used_sources = [], 0, set(), set()
+        # Best density first; earlier passages (better retrieval rank) break ties
+        for sentence in sorted(sentences, key=lambda s: (-s[4], s[0], s[1])):
+            source = passages[sentence[0]]['source']
+            # The header is paid by whichever passage of a source is emitted
+            # first; every further passage of that source adds a separator
+            cost = sentence[3]
+            if source not in used_sources:
+                cost += headers[source]
+            elif sentence[0] not in used_passages:
+                cost += _SEPARATOR_TOKENS
+            if used + cost > token_budget:
+                continue
+            kept.append(sentence)
+            used += cost
+            used_passages.add(sentence[0])
+            used_sources.add(source)
+        if not kept and sentences:
+            # Budget smaller than any sentence: still send the best one
+            kept.append(max(sentences, key=lambda s: s[4]))
+        kept.sort(key=lambda s: (s[0], s[1]))
+
+    blocks = {}          # source -> (header passage, rendered passages)
+    for p, passage in enumerate(passages):
+        chosen = [s for s in kept if s[0] == p]
+        if not chosen:
+            continue
+        parts, previous = [], None
+        for _, position, sentence, _, _ in chosen:
+            if previous is not None and position != previous + 1:
+                parts.append("…")
+            parts.append(sentence)
+            previous = position
+        blocks.setdefault(passage['source'], (passage, []))[1].append(" ".join(parts))
+
+    blocks = [
+        _header(index, passage) + "\n" + "\n…\n".join(texts)
+        for index, (passage, texts) in enumerate(blocks.values(), 1)
+    ]
+    context = "\n\n".join(blocks)
+    return context, {
+        'input_chunks': len(docs),
+        'sources': len(blocks),
+        'sentences_kept': len(kept),
+        'sentences_total': len(sentences),
+        'raw_tokens': raw_tokens,
+        'tokens': count_tokens(context),
+    }
@@ -0,0 +1,238 @@
+# compliance_rag/dedup.py
+"""
+Near-duplicate removal and page-furniture stripping at ingest.
+
+Regulatory PDFs repeat themselves: running headers and footers on every
+page, disclaimers, and whole paragraphs restated across documents (RBI
+master directions, FATF guidance quoting the Recommendations).
+
+strip_page_furniture() / iter_strip_page_furniture()
+    Per document: lines at the top or bottom of a page that recur (digits
+    ignored, so "Page 3 of 40" matches "Page 4 of 40") on at least half
+    of the pages are removed before chunking. At ingest the recurring
+    lines are learned from the first FURNITURE_SAMPLE_PAGES pages, so
+    pages stream through instead of the whole document being held.
+
+deduplicate_chunks()
+    Across the corpus: MinHash signatures of word 5-gram shingles,
+    LSH banding to find candidate pairs, and a signature-similarity
+    check against DEDUP_THRESHOLD (estimated Jaccard). Each cluster of
+    near-duplicates collapses into its first chunk in corpus order. The
+    canonical chunk keeps every source in its `sources` field
+    ("a.pdf; b.pdf"), so source filters still find it. The surviving
+    chunks of each source are renumbered (chunk_number / total_chunks);
+    chunk_id keeps the number the chunk was built with.
+
+Shingles are hashed with crc32 and permutations use a fixed seed, so
+results are the same on every run and machine.
+"""
+import itertools
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+LSH_BANDS = 16              # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+DEDUP_THRESHOLD = 0.85      # estimated Jaccard needed to merge two chunks
+SOURCES_SEPARATOR = "; "
+
+FURNITURE_EDGE_LINES = 3    # lines checked at the top and bottom of each page
+FURNITURE_MIN_SHARE = 0.5   # share of pages a line must appear on
+FURNITURE_MIN_PAGES = 4
+FURNITURE_SAMPLE_PAGES = 32  # pages furniture is learned from while ingesting
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+
+
+# ============================================================
+# PAGE FURNITURE
+# ============================================================
+def _line_key(line):
+    return _DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def _edges(lines, edge_lines):
+    """Positions of the first / last edge_lines non-blank lines (a third of a short page at most)"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    n = min(edge_lines, len(filled) // 3)
+    return set(filled[:n] + filled[len(filled) - n:]) if n else set()
+
+
+def strip_page_furniture(page_texts, edge_lines=FURNITURE_EDGE_LINES,
+                         min_share=FURNITURE_MIN_SHARE, min_pages=FURNITURE_MIN_PAGES):
+    """
+    Remove running headers / footers / page numbers from one document,
+    judged on all of its pages.
+
+    Returns:
+        (page texts, number of lines removed)
+    """
+    stats = {}
+    pages = list(iter_strip_page_furniture(page_texts, stats, None, edge_lines,
+                                           min_share, min_pages))
+    return pages, stats['lines']
+
+
+def iter_strip_page_furniture(page_texts, stats=None, sample_pages=FURNITURE_SAMPLE_PAGES,
+                              edge_lines=FURNITURE_EDGE_LINES, min_share=FURNITURE_MIN_SHARE,
+                              min_pages=FURNITURE_MIN_PAGES):
+    """
+    Page-by-page strip_page_furniture().
+
+    Furniture is learned from the first `sample_pages` pages (None = all
+    pages), which are the only ones buffered; every page is then
+    stripped and yielded in order.
+
+    Args:
+        stats: Optional dict; stats['lines'] is set to the number of
+            lines removed once the pages are exhausted
+    """
+    pages = iter(page_texts)
+    sample = [text.splitlines() for text in itertools.islice(pages, sample_pages)]
+    filled = sum(1 for lines in sample if lines)
+
+    furniture = set()
+    if filled >= min_pages:
+        counts = Counter()
+        for lines in sample:
+            counts.update({_line_key(lines[i]) for i in _edges(lines, edge_lines)})
+        furniture = {key for key, count in counts.items() if count >= min_share * filled}
+
+    removed = 0
+    for lines in itertools.chain(sample, (text.splitlines() for text in pages)):
+        drop = {i for i in _edges(lines, edge_lines) if _line_key(lines[i]) in furniture}
+        removed += len(drop)
+        yield "\n".join(line for i, line in enumerate(lines) if i not in drop)
+    if stats is not None:
+        stats['lines'] = removed
+
+
+# ============================================================
+# MINHASH / LSH
+# ============================================================
+def shingles(text, k=SHINGLE_WORDS):
+    """crc32 hashes of the word k-grams of `text` (lower-cased)"""
+    words = _WORD.findall(text.lower())
+    if len(words) <= k:
+        grams = [" ".join(words)]
+    else:
+        grams = (" ".join(words[i:i + k]) for i in range(len(words) - k + 1))
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams),
+                                 dtype=np.uint64))
+
+
+class MinHasher:
+    """
+    MinHash signatures with num_perm universal hash functions.
+
+    Args:
+        num_perm: Signature length
+        seed: Permutation seed (fixed, so signatures are reproducible)
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        # a < 2^31 and hashes < 2^32, so a * h + b fits in uint64
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % _PRIME).min(axis=1)
+
+    def signatures(self, texts, k=SHINGLE_WORDS):
+        if not texts:
+            return np.empty((0, len(self.a)), dtype=np.uint64)
+        return np.stack([self.signature(shingles(text, k)) for text in texts])
+
+
+def lsh_candidates(signatures, bands=LSH_BANDS):
+    """Candidate pairs (i, j), i < j, that share at least one band bucket"""
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        buckets = {}
+        for i, key in enumerate(map(bytes, block)):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            # Compare with the bucket's first member; clusters are joined transitively
+            for j in members[1:]:
+                pairs.add((members[0], j))
+    return pairs
+
+
+def find_duplicates(texts, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, bands=LSH_BANDS):
+    """
+    Cluster near-duplicate texts.
+
+    Returns:
+        int array: canonical[i] is the first text of i's cluster (i itself
+        when it has no earlier near-duplicate)
+    """
+    signatures = MinHasher(num_perm).signatures(texts)
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in lsh_candidates(signatures, bands):
+        if np.mean(signatures[i] == signatures[j]) >= threshold:
+            root_i, root_j = find(i), find(j)
+            # The earliest chunk is the root, so it becomes the canonical copy
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    return np.array([find(i) for i in range(len(texts))], dtype=np.int64)
+
+
+def chunk_sources(chunk):
+    """Every source of a chunk (more than one for collapsed duplicates)"""
+    sources = chunk.get('sources')
+    return sources.split(SOURCES_SEPARATOR) if sources else [chunk['source']]
+
+
+def deduplicate_chunks(chunks, threshold=DEDUP_THRESHOLD):
+    """
+    Collapse near-duplicate chunks into one canonical chunk each.
+
+    Args:
+        chunks: Chunk dicts in corpus order
+
+    Returns:
+        (kept chunks, report) - kept chunks are renumbered 1..n per
+        source; report maps each source to {'chunks', 'removed', 'kept'}
+    """
+    chunks = list(chunks)
+    canonical = find_duplicates([chunk['content'] for chunk in chunks], threshold)
+
+    sources = {}
+    for i, root in enumerate(canonical.tolist()):
+        for source in chunk_sources(chunks[i]):
+            if source not in sources.setdefault(root, []):
+                sources[root].append(source)
+
+    report = {}
+    kept = []
+    for i, chunk in enumerate(chunks):
+        stats = report.setdefault(chunk['source'], {'chunks': 0, 'removed': 0, 'kept': 0})
+        stats['chunks'] += 1
+        if canonical[i] != i:
+            stats['removed'] += 1
+            continue
+        stats['kept'] += 1
+        chunk = {key: value for key, value in chunk.items() if key != 'sources'}
+        if len(sources[i]) > 1:
+            chunk['sources'] = SOURCES_SEPARATOR.join(sources[i])
+        chunk['chunk_number'] = stats['kept']
+        kept.append(chunk)
+
+    for chunk in kept:
+        chunk['total_chunks'] = report[chunk['source']]['kept']
+    return kept, report
@@ -0,0 +1,353 @@
+# compliance_rag/dense_index.py
+"""
+Local dense (embedding) indexes behind HybridRetriever.dense_search.
+
+Row i of an index is chunk i of the chunk store, so results need no ID
+mapping. Vectors are L2-normalized and scored by cosine similarity.
+
+Backends:
+    exact   float32 matrix (memory-mapped), batched matmul + argpartition
+    hnsw    hnswlib graph with tunable M / ef_construction / ef_search
+            (optional dependency); filtered queries over a small subset
+            fall back to an exact scan of the subset
+
+The exact backend can store int8 or binary codes instead of scanning the
+float matrix (quantization="int8" / "binary", see quantization.py): the
+codes are scanned in memory and the best candidates are rescored with
+the float rows, read from the memory-mapped vectors.npy.
+This saves memory only - the int8 scan is slower than scanning the
+float matrix, so quantize when the float rows do not fit in RAM.
+
+Without a dense index, dense_search keeps using the ChromaDB collection.
+
+On-disk layout (DENSE_INDEX_DIR):
+    meta.json      backend, dim, count, corpus_id, model, params
+    vectors.npy    float32, one normalized row per chunk
+    hnsw.bin       hnswlib graph (hnsw backend only)
+    codes.npy      quantized rows (quantized exact backend only)
+    quantizer.npz  quantizer parameters (same)
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from .bm25 import top_k_indices
+from .config import DENSE_INDEX_DIR, EMBEDDING_MODEL
+from .quantization import (
+    QUANTIZATION_METHODS,
+    RESCORE_FACTOR,
+    fit_quantizer,
+    load_quantizer,
+)
+
+DENSE_BACKENDS = ("exact", "hnsw")
+HNSW_DEFAULTS = {'M': 16, 'ef_construction': 200, 'ef_search': 64}
+MAX_SCORE_CELLS = 1 << 24      # query x vector scores computed per block
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+class ExactIndex:
+    """
+    Brute-force cosine search over a float32 matrix.
+
+    Args:
+        vectors: (n, dim) normalized float32 array (may be a memmap)
+    """
+
+    backend = "exact"
+
+    def __init__(self, vectors, meta=None):
+        self.vectors = vectors
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def search(self, queries, k, allowed=None):
+        """
+        Top-k rows per query.
+
+        Args:
+            queries: (q, dim) float32 query vectors
+            k: Results per query
+            allowed: Sorted row indices to restrict the search to (None = all)
+
+        Returns:
+            (indices, similarities) - lists with one array per query,
+            best first
+        """
+        queries = normalize(np.atleast_2d(queries))
+        if allowed is not None:
+            allowed = np.asarray(allowed, dtype=np.int64)
+            matrix = self.vectors[allowed]
+        else:
+            matrix = self.vectors
+
+        all_indices, all_scores = [], []
+        rows = max(1, MAX_SCORE_CELLS // max(1, len(matrix)))
+        for start in range(0, len(queries), rows):
+            block = queries[start:start + rows] @ matrix.T
+            for scores in block:
+                top = top_k_indices(scores, k)
+                all_indices.append(allowed[top] if allowed is not None else top)
+                all_scores.append(scores[top])
+        return all_indices, all_scores
+
+    def nbytes(self):
+        return self.vectors.nbytes
+
+
+class HNSWIndex(ExactIndex):
+    """
+    hnswlib graph over the same vectors.
+
+    Args:
+        graph: hnswlib.Index (space "ip" over normalized vectors)
+        vectors: The float32 rows, for filtered exact fallback
+        ef_search: Candidate list size at query time (recall vs speed)
+        exact_filter_limit: Filtered queries over at most this many rows
+            are answered by an exact scan of those rows
+    """
+
+    backend = "hnsw"
+
+    def __init__(self, graph, vectors, meta=None, ef_search=HNSW_DEFAULTS['ef_search'],
+                 exact_filter_limit=20000):
+        super().__init__(vectors, meta)
+        self.graph = graph
+        self.exact_filter_limit = exact_filter_limit
+        self.ef_search = ef_search
+
+    @property
+    def ef_search(self):
+        return self._ef_search
+
+    @ef_search.setter
+    def ef_search(self, value):
+        self._ef_search = value
+        self.graph.set_ef(value)
+
+    def search(self, queries, k, allowed=None):
+        if allowed is not None and len(allowed) <= self.exact_filter_limit:
+            return super().search(queries, k, allowed)
+
+        queries = normalize(np.atleast_2d(queries))
+        k = min(k, len(self) if allowed is None else len(allowed))
+        if k <= 0:
+            return [np.empty(0, dtype=np.int64)] * len(queries), [np.empty(0)] * len(queries)
+        if self._ef_search < k:
+            self.graph.set_ef(k)
+
+        query_filter = None
+        if allowed is not None:
+            allowed_set = set(np.asarray(allowed).tolist())
+            query_filter = allowed_set.__contains__
+
+        try:
+            labels, distances = self.graph.knn_query(queries, k=k, filter=query_filter)
+        except RuntimeError:
+            # The filter left fewer than k reachable rows
+            return super().search(queries, k, allowed)
+        finally:
+            if self._ef_search < k:
+                self.graph.set_ef(self._ef_search)
+        # "ip" distance is 1 - inner product
+        return ([row.astype(np.int64) for row in labels],
+                [1.0 - row for row in distances])
+
+    def nbytes(self):
+        # Graph: vectors + M * 2 links of 4 bytes per element on level 0
+        m = self.meta.get('params', {}).get('M', HNSW_DEFAULTS['M'])
+        return self.vectors.nbytes + len(self) * (self.dim * 4 + m * 2 * 4)
+
+
+class QuantizedIndex(ExactIndex):
+    """
+    Two-stage search: scan int8 / binary codes, rescore with float rows.
+
+    Args:
+        codes: Quantized rows, held in memory
+        quantizer: Int8Quantizer or BinaryQuantizer that produced them
+        vectors: Float rows (memory-mapped); only candidates are read
+        rescore_factor: Candidates rescored per requested result
+    """
+
+    def __init__(self, codes, quantizer, vectors, meta=None, rescore_factor=None):
+        super().__init__(vectors, meta)
+        self.codes = codes
+        self.quantizer = quantizer
+        self.rescore_factor = rescore_factor or RESCORE_FACTOR[quantizer.method]
+
+    def search(self, queries, k, allowed=None):
+        queries = normalize(np.atleast_2d(queries))
+        if allowed is not None:
+            allowed = np.asarray(allowed, dtype=np.int64)
+            codes = self.codes[allowed]
+        else:
+            codes = self.codes
+        n_candidates = max(k, k * self.rescore_factor)
+
+        all_indices, all_scores = [], []
+        rows = max(1, MAX_SCORE_CELLS // max(1, len(codes)))
+        for start in range(0, len(queries), rows):
+            block = queries[start:start + rows]
+            for query, approx in zip(block, self.quantizer.scores(codes, block)):
+                candidates = top_k_indices(approx, n_candidates)
+                if allowed is not None:
+                    candidates = allowed[candidates]
+                candidates = np.sort(candidates)          # sequential reads from the memmap
+                scores = np.asarray(self.vectors[candidates]) @ query
+                top = top_k_indices(scores, k)
+                all_indices.append(candidates[top])
+                all_scores.append(scores[top])
+        return all_indices, all_scores
+
+    def nbytes(self):
+        # Float rows stay on disk; only the candidates are paged in
+        return self.codes.nbytes
+
+
+# ============================================================
+# BUILD / LOAD
+# ============================================================
+def _hnsw_graph(vectors, M, ef_construction, num_threads=-1):
+    import hnswlib
+
+    graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+    graph.init_index(max_elements=max(1, len(vectors)), M=M, ef_construction=ef_construction)
+    if len(vectors):
+        graph.add_items(vectors, np.arange(len(vectors)), num_threads=num_threads)
+    return graph
+
+
+def build_dense_index(vectors, backend="exact", index_dir=DENSE_INDEX_DIR, corpus_id=None,
+                      model_name=EMBEDDING_MODEL, quantization="none", **params):
+    """
+    Write a dense index for `vectors` (row i = chunk i).
+
+    Args:
+        backend: "exact" or "hnsw"
+        corpus_id: Corpus fingerprint; load_dense_index ignores the index
+            when it does not match the chunk store
+        quantization: "none", "int8" or "binary" (exact backend only)
+        params: HNSW M / ef_construction / ef_search (defaults in
+            HNSW_DEFAULTS); rescore_factor for a quantized index
+
+    Returns:
+        The loaded index
+    """
+    if backend not in DENSE_BACKENDS:
+        raise ValueError(f"unknown dense backend {backend!r} - use one of {DENSE_BACKENDS}")
+    if quantization not in QUANTIZATION_METHODS:
+        raise ValueError(f"unknown quantization {quantization!r} - "
+                         f"use one of {QUANTIZATION_METHODS}")
+    if backend == "hnsw" and quantization != "none":
+        raise ValueError("quantization is only supported by the exact backend")
+
+    vectors = normalize(vectors)
+    params = {k: v for k, v in params.items() if v is not None}
+    if backend == "hnsw":
+        params = {**HNSW_DEFAULTS, **params}
+    elif quantization != "none":
+        params = {'rescore_factor': params.get('rescore_factor', RESCORE_FACTOR[quantization])}
+    else:
+        params = {}
+
+    index_dir = os.fspath(index_dir)
+    tmp_dir = index_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    start = time.perf_counter()
+    np.save(os.path.join(tmp_dir, "vectors.npy"), vectors)
+    if backend == "hnsw":
+        graph = _hnsw_graph(vectors, params['M'], params['ef_construction'])
+        graph.save_index(os.path.join(tmp_dir, "hnsw.bin"))
+    if quantization != "none":
+        quantizer = fit_quantizer(quantization, vectors)
+        np.save(os.path.join(tmp_dir, "codes.npy"), quantizer.encode(vectors))
+        np.savez(os.path.join(tmp_dir, "quantizer.npz"), **quantizer.state())
+
+    meta = {
+        'backend': backend,
+        'dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        'count': len(vectors),
+        'corpus_id': corpus_id,
+        'model': model_name,
+        'metric': "cosine",
+        'quantization': quantization,
+        'params': params,
+        'build_seconds': time.perf_counter() - start,
+        'built_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap in atomically, like the chunk store
+    old_dir = index_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(index_dir):
+        os.replace(index_dir, old_dir)
+    os.replace(tmp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    return load_dense_index(index_dir)
+
+
+def read_dense_meta(index_dir=DENSE_INDEX_DIR):
+    meta_file = os.path.join(os.fspath(index_dir), "meta.json")
+    if not os.path.exists(meta_file):
+        return {}
+    with open(meta_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_dense_index(index_dir=DENSE_INDEX_DIR, ef_search=None, rescore_factor=None):
+    """
+    Open a dense index written by build_dense_index (None if there is none).
+
+    Args:
+        ef_search: Override the HNSW ef_search chosen at build time
+        rescore_factor: Override the quantized index's rescore factor
+    """
+    meta = read_dense_meta(index_dir)
+    if not meta:
+        return None
+
+    index_dir = os.fspath(index_dir)
+    vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+
+    if meta['backend'] == "hnsw":
+        import hnswlib
+
+        graph = hnswlib.Index(space="ip", dim=meta['dim'])
+        graph.load_index(os.path.join(index_dir, "hnsw.bin"), max_elements=max(1, meta['count']))
+        return HNSWIndex(graph, vectors, meta,
+                         ef_search=ef_search or meta['params'].get('ef_search',
+                                                                   HNSW_DEFAULTS['ef_search']))
+
+    quantization = meta.get('quantization', "none")
+    if quantization != "none":
+        with np.load(os.path.join(index_dir, "quantizer.npz")) as state:
+            quantizer = load_quantizer(quantization, dict(state))
+        codes = np.load(os.path.join(index_dir, "codes.npy"))
+        return QuantizedIndex(codes, quantizer, vectors, meta,
+                              rescore_factor=rescore_factor
+                              or meta['params'].get('rescore_factor'))
+    return ExactIndex(vectors, meta)
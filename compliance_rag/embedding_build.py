@@ -0,0 +1,246 @@
+# compliance_rag/embedding_build.py
+"""
+Embedding stage of create_embeddings.py.
+
+ChromaDB used to embed the chunks itself, 100 documents per
+collection.add() call in file order. This module embeds them up front:
+
+1. length_batches() sorts the texts by length and cuts them into large
+   batches of similar length, so little compute goes to padding.
+2. The model encodes each batch on every CPU core (torch threads,
+   optionally several worker processes or the ONNX runtime).
+3. Each finished batch is written to an EmbeddingCheckpoint on disk.
+   After a crash the next run only encodes the rows that are missing.
+4. bulk_upsert() sends the precomputed vectors to ChromaDB in large
+   batches, so ChromaDB never runs the model.
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from .answer_cache import text_hash
+from .config import (
+    EMBED_BACKEND,
+    EMBED_BATCH_SIZE,
+    EMBEDDING_CHECKPOINT_DIR,
+    EMBEDDING_MODEL,
+    INSERT_BATCH_SIZE,
+)
+
+EMBED_BACKENDS = ("torch", "onnx")
+
+
+def length_batches(texts, batch_size=EMBED_BATCH_SIZE):
+    """Positions of `texts` grouped into batches of similar length"""
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def load_encoder(model_name=EMBEDDING_MODEL, backend=EMBED_BACKEND, onnx_file=None, threads=None):
+    """
+    SentenceTransformer on CPU.
+
+    Args:
+        backend: "torch" or "onnx" (sentence-transformers >= 3.2 with
+            optimum[onnxruntime])
+        onnx_file: ONNX file in the model repo, e.g. a quantized
+            "onnx/model_qint8_avx512_vnni.onnx" (default: onnx/model.onnx)
+        threads: torch threads (default: all cores)
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads or os.cpu_count() or 1)
+        return SentenceTransformer(model_name, device="cpu")
+    if backend == "onnx":
+        model_kwargs = {'file_name': onnx_file} if onnx_file else None
+        return SentenceTransformer(model_name, device="cpu", backend="onnx",
+                                   model_kwargs=model_kwargs)
+    raise ValueError(f"unknown embedding backend {backend!r} - use one of {EMBED_BACKENDS}")
+
+
+# ============================================================
+# CHECKPOINT
+# ============================================================
+class EmbeddingCheckpoint:
+    """
+    Resumable on-disk embedding matrix for one list of texts.
+
+    Rows are keyed by text hash, so a run over a different list (e.g.
+    after part of the vectors were already inserted) still reuses every
+    vector it has.
+
+    Files in `directory`:
+        progress.json   model, dim, count, done
+        keys.json       text hash per row
+        vectors.npy     float32 rows (memory-mapped)
+        done.npy        bool per row (memory-mapped)
+
+    Args:
+        keys: text_hash() of each text, in row order
+        dim: Embedding dimension
+        model_id: Model + backend; vectors of another model are discarded
+    """
+
+    def __init__(self, directory, keys, dim, model_id):
+        self.directory = os.fspath(directory)
+        self.keys = list(keys)
+        self.dim = dim
+        self.model_id = model_id
+
+        progress = self._read_json("progress.json")
+        if (progress.get('model') == model_id and progress.get('dim') == dim
+                and self._read_json("keys.json") == self.keys):
+            self.vectors = np.load(self._path("vectors.npy"), mmap_mode="r+")
+            self.done = np.load(self._path("done.npy"), mmap_mode="r+")
+        else:
+            self._create(self._reusable_rows(progress))
+        self.resumed = int(self.done.sum())
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_json(self, name):
+        try:
+            with open(self._path(name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _reusable_rows(self, progress):
+        """{key: vector} of finished rows from a checkpoint of another text list"""
+        if progress.get('model') != self.model_id or progress.get('dim') != self.dim:
+            return {}
+        try:
+            old_keys = self._read_json("keys.json") or []
+            vectors = np.load(self._path("vectors.npy"), mmap_mode="r")
+            done = np.load(self._path("done.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return {}
+        wanted = set(self.keys)
+        return {
+            key: np.array(vectors[row])
+            for row, key in enumerate(old_keys)
+            if done[row] and key in wanted
+        }
+
+    def _create(self, reuse):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        with open(self._path("keys.json"), "w", encoding="utf-8") as f:
+            json.dump(self.keys, f)
+
+        shape = (len(self.keys), self.dim)
+        self.vectors = np.lib.format.open_memmap(self._path("vectors.npy"), mode="w+",
+                                                 dtype=np.float32, shape=shape)
+        self.done = np.lib.format.open_memmap(self._path("done.npy"), mode="w+",
+                                              dtype=np.bool_, shape=(len(self.keys),))
+        rows = [row for row, key in enumerate(self.keys) if key in reuse]
+        if rows:
+            self.vectors[rows] = np.stack([reuse[self.keys[row]] for row in rows])
+            self.done[rows] = True
+        self._flush()
+
+    def pending(self):
+        """Rows still to be encoded"""
+        return np.flatnonzero(~np.asarray(self.done))
+
+    def write(self, rows, vectors):
+        self.vectors[rows] = vectors
+        self.vectors.flush()
+        # Rows count as done only once their vectors are on disk
+        self.done[rows] = True
+        self._flush()
+
+    def _flush(self):
+        self.done.flush()
+        progress = {
+            'model': self.model_id,
+            'dim': self.dim,
+            'count': len(self.keys),
+            'done': int(np.count_nonzero(self.done)),
+            'updated_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        tmp_file = self._path("progress.json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(progress, f)
+        os.replace(tmp_file, self._path("progress.json"))
+
+    def remove(self):
+        """Delete the checkpoint (after the vectors were stored)"""
+        self.vectors = self.done = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# ============================================================
+# ENCODING
+# ============================================================
+def embed_texts(texts, model=None, model_name=EMBEDDING_MODEL, backend=EMBED_BACKEND,
+                onnx_file=None, batch_size=EMBED_BATCH_SIZE, processes=1,
+                checkpoint_dir=EMBEDDING_CHECKPOINT_DIR, log=print):
+    """
+    Encode texts through a resumable checkpoint.
+
+    Args:
+        model: Loaded SentenceTransformer (default: load_encoder())
+        processes: Worker processes (> 1 uses sentence-transformers'
+            multi-process pool, each worker on its own cores)
+        log: Progress callback taking one string
+
+    Returns:
+        The EmbeddingCheckpoint; checkpoint.vectors[i] embeds texts[i]
+    """
+    if model is None:
+        model = load_encoder(model_name, backend, onnx_file)
+    model_id = f"{model_name}|{backend}|{onnx_file or ''}"
+    checkpoint = EmbeddingCheckpoint(checkpoint_dir, [text_hash(t) for t in texts],
+                                     model.get_sentence_embedding_dimension(), model_id)
+    if checkpoint.resumed:
+        log(f"♻️  Resuming: {checkpoint.resumed}/{len(texts)} embeddings already in the checkpoint")
+
+    pending = checkpoint.pending()
+    if not len(pending):
+        return checkpoint
+
+    # One checkpoint write per step; with a pool every worker gets a batch
+    step = batch_size * max(1, processes)
+    batches = [pending[b] for b in length_batches([texts[i] for i in pending], step)]
+    pool = model.start_multi_process_pool(["cpu"] * processes) if processes > 1 else None
+
+    start, encoded = time.perf_counter(), 0
+    try:
+        for rows in batches:
+            batch = [texts[i] for i in rows]
+            if pool is not None:
+                vectors = model.encode_multi_process(batch, pool, batch_size=batch_size,
+                                                     chunk_size=batch_size)
+            else:
+                vectors = model.encode(batch, batch_size=batch_size, convert_to_numpy=True)
+            checkpoint.write(rows, np.asarray(vectors, dtype=np.float32))
+
+            encoded += len(rows)
+            rate = encoded / (time.perf_counter() - start)
+            log(f"✔ Embedded {checkpoint.resumed + encoded}/{len(texts)} ({rate:.0f} chunks/s)")
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    return checkpoint
+
+
+def bulk_upsert(collection, ids, documents, metadatas, vectors,
+                batch_size=INSERT_BATCH_SIZE, log=print):
+    """Insert precomputed vectors; upsert, so re-running after a crash is safe"""
+    for start in range(0, len(ids), batch_size):
+        end = min(start + batch_size, len(ids))
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=np.asarray(vectors[start:end]).tolist(),
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+        )
+        log(f"✔ Indexed {end}/{len(ids)}")
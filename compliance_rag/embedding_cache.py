@@ -0,0 +1,194 @@
+# compliance_rag/embedding_cache.py
+"""
+Content-addressed cache from normalized query text to embedding vector.
+
+Two tiers:
+    memory - LRU of the most recent vectors (per process)
+    disk   - SQLite table of float32 blobs, shared across Streamlit
+             reruns, worker processes and restarts
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import EMBEDDING_MODEL, QUERY_EMBEDDING_CACHE_FILE
+
+
+def normalize_query(text):
+    """
+    Lowercase and collapse whitespace.
+
+    all-MiniLM-L6-v2 uses an uncased tokenizer, so this does not change
+    the embedding - it only lets trivially different spellings of the
+    same question share a cache entry.
+    """
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier (memory LRU + SQLite) cache of query embeddings.
+
+    Args:
+        embed_fn: Callable taking a list of texts and returning vectors
+        model_name: Part of the cache key, so switching models never
+            returns stale vectors
+        path: SQLite file for the disk tier (None = memory only)
+        max_memory_items: Size of the in-memory LRU tier
+    """
+
+    def __init__(self, embed_fn, model_name=EMBEDDING_MODEL,
+                 path=QUERY_EMBEDDING_CACHE_FILE, max_memory_items=1024):
+        self.embed_fn = embed_fn
+        self.model_name = model_name
+        self.path = path
+        self.max_memory_items = max_memory_items
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False,
+                                         timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------
+    # Keys and tiers
+    # ------------------------------------------------------------
+    def key(self, query):
+        text = f"{self.model_name}\x00{normalize_query(query)}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _write_disk(self, items):
+        if self._conn is None or not items:
+            return
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?)",
+            [(key, len(vec), vec.tobytes(), now) for key, vec in items],
+        )
+        self._conn.commit()
+
+    def get(self, query):
+        """Return the cached vector for `query`, or None"""
+        key = self.key(query)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+
+            vector = self._read_disk(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.disk_hits += 1
+            return vector
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def embed(self, query):
+        """Embedding for `query`, computed only on a cache miss"""
+        vector = self.get(query)
+        if vector is not None:
+            return vector
+
+        vector = np.asarray(self.embed_fn([normalize_query(query)])[0],
+                            dtype=np.float32)
+        key = self.key(query)
+        with self._lock:
+            self.misses += 1
+            self._remember(key, vector)
+            self._write_disk([(key, vector)])
+        return vector
+
+    def embed_many(self, queries):
+        """
+        Embeddings for a list of queries (one row each).
+
+        Cache misses are encoded together in a single model call and
+        written to disk in one transaction.
+        """
+        vectors = [self.get(query) for query in queries]
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(normalize_query(queries[i]), []).append(i)
+
+        if missing:
+            texts = list(missing)
+            encoded = self.embed_fn(texts)
+            new_items = []
+            for text, vector in zip(texts, encoded):
+                vector = np.asarray(vector, dtype=np.float32)
+                for i in missing[text]:
+                    vectors[i] = vector
+                new_items.append((self.key(text), vector))
+            with self._lock:
+                self.misses += len(texts)
+                for key, vector in new_items:
+                    self._remember(key, vector)
+                self._write_disk(new_items)
+
+        return vectors
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            'hits': hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_items': len(self._memory),
+        }
+
+    def clear(self):
+        """Drop both tiers and reset counters"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM query_embeddings")
+                self._conn.commit()
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
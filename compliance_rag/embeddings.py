@@ -0,0 +1,44 @@
+# compliance_rag/embeddings.py
+import threading
+
+import numpy as np
+
+from .config import EMBEDDING_MODEL
+
+
+class LazyEmbeddingFunction:
+    """
+    ChromaDB-compatible embedding function that loads the
+    sentence-transformers model on first use.
+
+    Opening the index should not pay for a model load when every query
+    is answered from the embedding cache.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL, device="cpu"):
+        self.model_name = model_name
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def encode(self, texts, batch_size=32):
+        """Encode texts into a float32 matrix (one row per text)"""
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def __call__(self, input):
+        # ChromaDB inspects the parameter name, so it has to be `input`
+        return list(self.encode(input))
@@ -0,0 +1,229 @@
+# compliance_rag/fusion.py
+"""
+Score fusion strategies for hybrid search.
+
+Dense similarities (1 / (1 + distance)) and max-normalized BM25 scores
+live on very different scales. Every strategy here turns the two
+candidate lists into aligned numpy arrays and fuses them in one
+vectorized step:
+
+    weighted  alpha * dense + beta * sparse (the original behaviour)
+    rrf       reciprocal rank fusion: sum of w / (RRF_K + rank)
+    zscore    standardize each list over its candidates, then weight
+    minmax    rescale each list to [0, 1] over its candidates, then weight
+    learned   linear model over per-candidate features, fitted offline
+              (benchmarks/eval_recall.py --fit-fusion)
+
+A candidate missing from one list scores 0 there (weighted, rrf) or
+the list's minimum (zscore, minmax).
+"""
+import json
+
+import numpy as np
+
+from .config import FUSION_WEIGHTS_FILE
+
+RRF_K = 60
+FUSION_METHODS = ("weighted", "rrf", "zscore", "minmax", "learned")
+
+
+# ============================================================
+# CANDIDATE ARRAYS
+# ============================================================
+def candidate_arrays(dense_scores, sparse_scores):
+    """
+    Align two {chunk index: score} dicts.
+
+    Returns:
+        (indices, dense, sparse) - sorted int64 chunk indices and two
+        float arrays with NaN where a candidate is missing
+    """
+    indices = np.union1d(
+        np.fromiter(dense_scores.keys(), dtype=np.int64, count=len(dense_scores)),
+        np.fromiter(sparse_scores.keys(), dtype=np.int64, count=len(sparse_scores)),
+    )
+    return indices, _align(indices, dense_scores), _align(indices, sparse_scores)
+
+
+def _align(indices, scores):
+    aligned = np.full(len(indices), np.nan)
+    if scores:
+        keys = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        aligned[np.searchsorted(indices, keys)] = values
+    return aligned
+
+
+def ranks(scores):
+    """1-based rank of each score (higher is better), NaN stays NaN"""
+    present = ~np.isnan(scores)
+    result = np.full(len(scores), np.nan)
+    order = np.argsort(-scores[present], kind="stable")
+    positions = np.empty(len(order))
+    positions[order] = np.arange(1, len(order) + 1)
+    result[present] = positions
+    return result
+
+
+def _fill_missing(scores, value=None):
+    present = ~np.isnan(scores)
+    if not present.any():
+        return np.zeros(len(scores))
+    fill = scores[present].min() if value is None else value
+    return np.where(present, scores, fill)
+
+
+# ============================================================
+# STRATEGIES
+# ============================================================
+def fuse_weighted(dense, sparse, alpha, beta):
+    return alpha * np.nan_to_num(dense) + beta * np.nan_to_num(sparse)
+
+
+def fuse_rrf(dense, sparse, alpha, beta, k=RRF_K):
+    dense_rrf = np.nan_to_num(1.0 / (k + ranks(dense)))
+    sparse_rrf = np.nan_to_num(1.0 / (k + ranks(sparse)))
+    return alpha * dense_rrf + beta * sparse_rrf
+
+
+def minmax(scores):
+    filled = _fill_missing(scores)
+    low, high = filled.min(), filled.max()
+    if high <= low:
+        return np.where(np.isnan(scores), 0.0, 1.0)
+    return (filled - low) / (high - low)
+
+
+def zscore(scores):
+    filled = _fill_missing(scores)
+    present = scores[~np.isnan(scores)]
+    std = present.std() if len(present) else 0.0
+    if std == 0:
+        return np.where(np.isnan(scores), -1.0, 0.0)
+    return (filled - present.mean()) / std
+
+
+def fuse_minmax(dense, sparse, alpha, beta):
+    return alpha * minmax(dense) + beta * minmax(sparse)
+
+
+def fuse_zscore(dense, sparse, alpha, beta):
+    return alpha * zscore(dense) + beta * zscore(sparse)
+
+
+# ============================================================
+# LEARNED LINEAR FUSION
+# ============================================================
+FEATURE_NAMES = (
+    "dense", "sparse",
+    "dense_minmax", "sparse_minmax",
+    "dense_rrf", "sparse_rrf",
+    "dense_present", "sparse_present",
+)
+
+
+def fusion_features(dense, sparse):
+    """Per-candidate feature matrix (n_candidates x len(FEATURE_NAMES))"""
+    return np.column_stack([
+        np.nan_to_num(dense),
+        np.nan_to_num(sparse),
+        minmax(dense),
+        minmax(sparse),
+        np.nan_to_num(1.0 / (RRF_K + ranks(dense))) * RRF_K,
+        np.nan_to_num(1.0 / (RRF_K + ranks(sparse))) * RRF_K,
+        ~np.isnan(dense),
+        ~np.isnan(sparse),
+    ]).astype(np.float64)
+
+
+class LinearFusion:
+    """
+    score = features @ weights + bias, fitted by ridge regression on
+    relevance labels (1 = relevant candidate, 0 = not).
+
+    Args:
+        weights: One weight per FEATURE_NAMES entry
+        bias: Intercept (does not change the ranking)
+    """
+
+    def __init__(self, weights, bias=0.0):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+
+    def __call__(self, dense, sparse):
+        return fusion_features(dense, sparse) @ self.weights + self.bias
+
+    @classmethod
+    def fit(cls, features, labels, l2=1.0):
+        """
+        Args:
+            features: Stacked fusion_features rows of all training candidates
+            labels: 1 / 0 relevance per row
+            l2: Ridge penalty (keeps the weights stable on small label sets)
+        """
+        X = np.asarray(features, dtype=np.float64)
+        y = np.asarray(labels, dtype=np.float64)
+        mean_x, mean_y = X.mean(axis=0), y.mean()
+        Xc = X - mean_x
+        weights = np.linalg.solve(Xc.T @ Xc + l2 * np.eye(X.shape[1]), Xc.T @ (y - mean_y))
+        return cls(weights, mean_y - mean_x @ weights)
+
+    def save(self, path=FUSION_WEIGHTS_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                'features': list(FEATURE_NAMES),
+                'weights': self.weights.tolist(),
+                'bias': self.bias,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path=FUSION_WEIGHTS_FILE):
+        if not path.exists():
+            raise FileNotFoundError(
+                f"{path} not found - run benchmarks/eval_recall.py --fit-fusion"
+            )
+        with open(path) as f:
+            data = json.load(f)
+        if tuple(data['features']) != FEATURE_NAMES:
+            raise ValueError(f"{path} was fitted on different features - refit it")
+        return cls(data['weights'], data['bias'])
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+_FUSERS = {
+    "weighted": fuse_weighted,
+    "rrf": fuse_rrf,
+    "zscore": fuse_zscore,
+    "minmax": fuse_minmax,
+}
+
+
+def fuse(method, dense_scores, sparse_scores, alpha, model=None):
+    """
+    Fuse two candidate dicts.
+
+    Args:
+        method: One of FUSION_METHODS
+        dense_scores, sparse_scores: {chunk index: score}
+        alpha: Dense weight (sparse gets 1 - alpha); unused by "learned"
+        model: LinearFusion for method="learned"
+
+    Returns:
+        (indices, scores) - aligned arrays over the candidate union
+    """
+    indices, dense, sparse = candidate_arrays(dense_scores, sparse_scores)
+    if not len(indices):
+        return indices, np.empty(0)
+
+    if method == "learned":
+        if model is None:
+            raise ValueError("learned fusion needs a fitted LinearFusion model")
+        return indices, model(dense, sparse)
+
+    fuser = _FUSERS.get(method)
+    if fuser is None:
+        raise ValueError(f"unknown fusion method {method!r} - use one of {FUSION_METHODS}")
+    return indices, fuser(dense, sparse, alpha, 1 - alpha)
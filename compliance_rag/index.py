@@ -0,0 +1,235 @@
+# compliance_rag/index.py
+"""
+Building and loading the retrieval index.
+
+Nothing in this module touches disk or ChromaDB at import time:
+`build_index()` is the explicit (slow) build step run by
+`python hybrid_search.py`, and `load_index()` only reads the
+prebuilt artifacts.
+"""
+import hashlib
+import json
+import pickle
+import time
+
+from .config import (
+    BM25_FILE,
+    BM25_TERM_CACHE_FILE,
+    CHROMA_DIR,
+    CHUNK_STORE_DIR,
+    CHUNKS_FILE,
+    COLLECTION_NAME,
+    DENSE_INDEX_DIR,
+    DENSE_WEIGHT,
+    EMBEDDING_MODEL,
+    INDEX_META_FILE,
+    QUERY_EMBEDDING_CACHE_FILE,
+    QUERY_EMBEDDING_MEMORY_ITEMS,
+    RETRIEVER_FILE,
+    SPARSE_WEIGHT,
+)
+
+
+def tokenize(text):
+    """Tokenizer shared by index building and querying"""
+    return text.lower().split()
+
+
+def load_chunks(store_dir=CHUNK_STORE_DIR, chunks_file=CHUNKS_FILE):
+    """
+    Open the chunk store written by process_pdfs.py.
+
+    A chunks.pkl from before the columnar store is migrated once.
+    """
+    from .chunk_store import ChunkStore, migrate_pickle
+
+    if not (store_dir / "meta.json").exists():
+        if not chunks_file.exists():
+            raise FileNotFoundError(
+                f"{store_dir} not found - run process_pdfs.py first"
+            )
+        migrate_pickle(chunks_file, store_dir)
+    return ChunkStore(store_dir)
+
+
+def corpus_fingerprint(chunks):
+    """Hash of every chunk's source and content; changes on any rebuild that alters the corpus"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk['source'].encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(chunk['content'].encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()[:16]
+
+
+def read_index_meta(meta_file=INDEX_META_FILE):
+    """Metadata written by build_index(), or {} for older builds"""
+    if not meta_file.exists():
+        return {}
+    with open(meta_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_term_cache(term_cache_file):
+    if not term_cache_file.exists():
+        return {}
+    with open(term_cache_file, "rb") as f:
+        return pickle.load(f)
+
+
+def build_index(chunks=None, bm25_file=BM25_FILE, retriever_file=RETRIEVER_FILE,
+                meta_file=INDEX_META_FILE, term_cache_file=BM25_TERM_CACHE_FILE):
+    """
+    Tokenize chunks, build the BM25 index and save it to disk.
+
+    Term frequencies are cached per stable chunk ID, so after an
+    incremental ingest only chunks of added or changed PDFs are
+    re-tokenized (IDF still covers the whole corpus).
+
+    Returns:
+        (bm25, chunks)
+    """
+    from .bm25 import SparseBM25, term_frequencies
+
+    if chunks is None:
+        chunks = load_chunks()
+
+    cache = _load_term_cache(term_cache_file)
+    new_cache, frequencies, reused = {}, [], 0
+    for chunk in chunks:
+        chunk_id = chunk.get('chunk_id')
+        freqs = cache.get(chunk_id) if chunk_id else None
+        if freqs is None:
+            freqs = term_frequencies(tokenize(chunk['content']))
+        else:
+            reused += 1
+        if chunk_id:
+            new_cache[chunk_id] = freqs
+        frequencies.append(freqs)
+
+    bm25 = SparseBM25.from_term_frequencies(frequencies)
+
+    # Only live chunk IDs are kept, so deleted PDFs drop out of the cache
+    with open(term_cache_file, "wb") as f:
+        pickle.dump(new_cache, f)
+
+    with open(bm25_file, "wb") as f:
+        pickle.dump(bm25, f)
+
+    retriever_data = {
+        'bm25': bm25,
+        'chunks': chunks,
+        'config': {
+            'dense_weight': DENSE_WEIGHT,
+            'sparse_weight': SPARSE_WEIGHT
+        }
+    }
+    with open(retriever_file, "wb") as f:
+        pickle.dump(retriever_data, f)
+
+    meta = {
+        'corpus_id': corpus_fingerprint(chunks),
+        'num_chunks': len(chunks),
+        'retokenized_chunks': len(chunks) - reused,
+        'built_at': time.time(),
+    }
+    with open(meta_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    return bm25, chunks
+
+
+def get_collection(chroma_dir=CHROMA_DIR, collection_name=COLLECTION_NAME,
+                   embedding_function=None):
+    """Open the persisted ChromaDB collection"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(chroma_dir))
+    if embedding_function is None:
+        return client.get_collection(name=collection_name)
+    return client.get_collection(name=collection_name,
+                                 embedding_function=embedding_function)
+
+
+def _load_dense_index(index_dir, chunks, corpus_id):
+    """The local dense index if it matches the chunks, else None (use ChromaDB)"""
+    from .dense_index import load_dense_index, read_dense_meta
+
+    meta = read_dense_meta(index_dir)
+    if not meta:
+        return None
+    if meta.get('count') != len(chunks) or meta.get('corpus_id') != corpus_id:
+        print(f"⚠️  Dense index in {index_dir} is stale - using ChromaDB "
+              f"(re-run create_embeddings.py --dense-backend {meta.get('backend')})")
+        return None
+    try:
+        return load_dense_index(index_dir)
+    except ImportError:
+        print("⚠️  hnswlib not installed - using ChromaDB for dense search")
+        return None
+
+
+def load_index(alpha=DENSE_WEIGHT, chunk_store_dir=CHUNK_STORE_DIR, bm25_file=BM25_FILE,
+               chroma_dir=CHROMA_DIR, collection_name=COLLECTION_NAME,
+               embedding_cache=True, embedding_cache_file=QUERY_EMBEDDING_CACHE_FILE,
+               embedding_fn=None, dense_index_dir=DENSE_INDEX_DIR,
+               meta_file=INDEX_META_FILE):
+    """
+    Create a HybridRetriever from prebuilt artifacts.
+
+    Only reads chunks, the pickled BM25 index and the ChromaDB
+    collection - run `python hybrid_search.py` to (re)build them.
+
+    Args:
+        embedding_cache: True to cache query embeddings (memory + disk),
+            False to let ChromaDB encode every query, or an existing
+            QueryEmbeddingCache to share between retrievers
+        embedding_cache_file: SQLite file for the disk tier (None = memory only)
+        embedding_fn: Existing LazyEmbeddingFunction to reuse (keeps the
+            loaded model when the index is reloaded)
+        dense_index_dir: Local dense index built by create_embeddings.py
+            --dense-backend exact|hnsw (None = always query ChromaDB);
+            ignored when it was built for another corpus
+        meta_file: Metadata (corpus_id) written by build_index() with bm25_file
+    """
+    from .embedding_cache import QueryEmbeddingCache
+    from .embeddings import LazyEmbeddingFunction
+    from .retriever import HybridRetriever
+
+    if not bm25_file.exists():
+        raise FileNotFoundError(
+            f"{bm25_file} not found - run hybrid_search.py to build the index"
+        )
+
+    chunks = load_chunks(chunk_store_dir)
+    with open(bm25_file, "rb") as f:
+        bm25 = pickle.load(f)
+
+    if embedding_fn is None:
+        embedding_fn = LazyEmbeddingFunction(EMBEDDING_MODEL)
+    collection = get_collection(chroma_dir, collection_name, embedding_fn)
+
+    if embedding_cache is True:
+        embedding_cache = QueryEmbeddingCache(
+            embedding_fn,
+            model_name=EMBEDDING_MODEL,
+            path=embedding_cache_file,
+            max_memory_items=QUERY_EMBEDDING_MEMORY_ITEMS,
+        )
+    elif embedding_cache is False:
+        embedding_cache = None
+
+    corpus_id = read_index_meta(meta_file).get('corpus_id') or corpus_fingerprint(chunks)
+    dense_index = _load_dense_index(dense_index_dir, chunks, corpus_id) if dense_index_dir else None
+
+    return HybridRetriever(
+        collection=collection,
+        bm25=bm25,
+        chunks=chunks,
+        alpha=alpha,
+        embedding_cache=embedding_cache,
+        corpus_id=corpus_id,
+        dense_index=dense_index,
+        embedding_fn=embedding_fn
+    )
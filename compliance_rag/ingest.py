@@ -0,0 +1,320 @@
+# compliance_rag/ingest.py
+"""
+PDF text extraction and chunking used by process_pdfs.py.
+
+Extraction is split into (file, page range) tasks so a process pool can
+spread the work across files and across page ranges of one large PDF.
+Results are re-assembled in (file, page) order, so the chunks - and
+their chunk_number / total_chunks - are the same for any worker count.
+Pages are handed to the chunker as they are extracted (iter_extracted),
+with a bounded number of page ranges in flight, and both chunkers
+consume them as a stream - peak memory does not grow with the size of a
+document or the corpus (apart from the chunks themselves).
+
+Two chunkers:
+    structured  section- and sentence-aware, token-budgeted (chunker.py)
+    window      the original 1,500-character sliding window
+"""
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    from PyPDF2 import PdfReader
+
+from .chunker import CHUNK_TOKENS, iter_structured_chunks
+from .manifest import make_chunk_id
+
+CHUNK_SIZE = 1500  # Characters per chunk (window chunker)
+OVERLAP = 200      # Overlap between chunks (window chunker)
+PAGES_PER_TASK = 50
+CHUNKERS = ("structured", "window")
+DEFAULT_CHUNKER = "structured"
+
+
+# ============================================================
+# METADATA
+# ============================================================
+def detect_regulator(filename: str):
+    f = filename.lower()
+    if "rbi" in f:
+        return "Reserve Bank of India", "India"
+    if "fatf" in f:
+        return "FATF", "International"
+    if "basel" in f:
+        return "Basel Committee", "International"
+    if "uae" in f or "cbuae" in f:
+        return "UAE Central Bank", "UAE"
+    return "Unknown", "Unknown"
+
+
+# ============================================================
+# EXTRACTION
+# ============================================================
+def count_pages(pdf_path):
+    return len(PdfReader(pdf_path, strict=False).pages)
+
+
+def iter_pages(pdf_path, start=0, end=None):
+    """Yield the text of pages [start, end) one at a time ("" without text)"""
+    reader = PdfReader(pdf_path, strict=False)
+    for page in reader.pages[start:end]:
+        yield page.extract_text() or ""
+
+
+def extract_page_range(pdf_path, start, end):
+    """Text of pages [start, end) - empty string for pages without text"""
+    return list(iter_pages(pdf_path, start, end))
+
+
+def iter_pages_with_progress(pdf_path, pages_per_task=PAGES_PER_TASK, progress=print):
+    """
+    In-process page iterator for sequential ingestion.
+
+    Reports progress every `pages_per_task` pages in the same format as
+    the process-pool workers.
+    """
+    total = count_pages(pdf_path)
+    started = time.perf_counter()
+    for i, text in enumerate(iter_pages(pdf_path), 1):
+        yield text
+        if i % pages_per_task == 0 or i == total:
+            progress(f"   [worker {os.getpid()}] {pdf_path.name} pages "
+                     f"{(i - 1) // pages_per_task * pages_per_task + 1}-{i} "
+                     f"({i}/{total} pages, {time.perf_counter() - started:.1f}s)")
+
+
+def _extract_task(task):
+    """Process-pool entry point: (file_idx, path, start, end) -> result"""
+    file_idx, pdf_path, start, end = task
+    started = time.perf_counter()
+    try:
+        texts = extract_page_range(pdf_path, start, end)
+        error = None
+    except Exception as e:
+        texts, error = [], f"{type(e).__name__}: {e}"
+    return {
+        'task': task,
+        'texts': texts,
+        'error': error,
+        'worker': os.getpid(),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def plan_tasks(pdf_files, pages_per_task=PAGES_PER_TASK):
+    """
+    Split every PDF into page-range tasks.
+
+    Returns:
+        (tasks, page_counts) - tasks as (file_idx, path, start, end),
+        page_counts[file_idx] is None when the PDF could not be opened
+    """
+    tasks, page_counts = [], []
+    for file_idx, pdf_path in enumerate(pdf_files):
+        try:
+            total = count_pages(pdf_path)
+        except Exception:
+            page_counts.append(None)
+            continue
+        page_counts.append(total)
+        for start in range(0, total, pages_per_task):
+            tasks.append((file_idx, pdf_path, start, min(start + pages_per_task, total)))
+    return tasks, page_counts
+
+
+def _ordered_results(tasks, workers):
+    """Task results in task order, with at most 2 * workers tasks running ahead"""
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _extract_task(task)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+    try:
+        queued = iter(tasks)
+        pending = deque(pool.submit(_extract_task, task)
+                        for task in itertools.islice(queued, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for task in itertools.islice(queued, 1):
+                pending.append(pool.submit(_extract_task, task))
+            yield result
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def iter_extracted(pdf_files, workers=None, pages_per_task=PAGES_PER_TASK, progress=print):
+    """
+    Extract page texts of every PDF, in parallel when workers > 1.
+
+    Yields one page iterator per PDF, in file order. Pages come out as
+    soon as their range is extracted, and the pool runs at most
+    2 * workers ranges ahead of the caller, so memory stays flat however
+    large the corpus or a single PDF is. Each iterator should be
+    consumed before the next one is requested (what is left of it is
+    drained).
+
+    Args:
+        pdf_files: Ordered list of PDF paths
+        workers: Process count (None = all cores, 1 = in-process)
+        pages_per_task: Page-range size of one task
+        progress: Callable receiving one status line per finished task
+
+    Yields:
+        One item per PDF: an iterator of page texts in page order, or
+        None when the file could not be opened. The iterator raises
+        RuntimeError after its last page when any page range failed.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks, page_counts = plan_tasks(pdf_files, pages_per_task)
+    results = _ordered_results(tasks, workers)
+    done = 0
+
+    def document_pages(n):
+        nonlocal done
+        error = None
+        for _ in range(0, n, pages_per_task):
+            result = next(results)
+            done += 1
+            _, pdf_path, start, end = result['task']
+            if result['error'] and error is None:
+                error = f"pages {start + 1}-{end}: {result['error']}"
+                progress(f"   ❌ [worker {result['worker']}] {pdf_path.name} {error}")
+            progress(f"   [worker {result['worker']}] {pdf_path.name} pages {start + 1}-{end} "
+                     f"({done}/{len(tasks)} tasks, {result['seconds']:.1f}s)")
+            if error is None:
+                yield from result['texts']
+        if error is not None:
+            raise RuntimeError(f"page extraction failed ({error})")
+
+    try:
+        for file_idx, n in enumerate(page_counts):
+            if n is None:
+                progress(f"   ❌ {pdf_files[file_idx].name}: could not open PDF")
+                yield None
+                continue
+            pages = document_pages(n)
+            yield pages
+            try:
+                for _ in pages:   # the caller stopped early
+                    pass
+            except RuntimeError:
+                pass
+    finally:
+        results.close()
+
+
+def extract_all(pdf_files, workers=None, pages_per_task=PAGES_PER_TASK, progress=print):
+    """
+    iter_extracted() as a list - keeps every page of every PDF in memory.
+
+    Returns:
+        List aligned with pdf_files: page texts in page order, or None
+        when the file (or any of its page ranges) failed
+    """
+    documents = []
+    for pages in iter_extracted(pdf_files, workers, pages_per_task, progress):
+        try:
+            documents.append(list(pages) if pages is not None else None)
+        except RuntimeError:
+            documents.append(None)
+    return documents
+
+
+def assemble_text(page_texts):
+    """Join page texts the way the sequential extractor always did"""
+    return "".join(page_stream(page_texts))
+
+
+def page_stream(page_texts):
+    """Document text as a stream of pieces: every non-empty page + blank line"""
+    for text in page_texts:
+        if text:
+            yield text + "\n\n"
+
+
+# ============================================================
+# CHUNKING
+# ============================================================
+def stream_chunks(pieces, chunk_size=CHUNK_SIZE, overlap=OVERLAP):
+    """
+    Sliding-window chunker over a stream of text pieces.
+
+    Yields exactly the chunks `simple_chunk("".join(pieces))` returns,
+    as soon as each window is complete. Only the unfinished window (at
+    most chunk_size characters plus the newest piece) is kept, so memory
+    stays flat however long the document is, and every character is
+    copied a constant number of times.
+    """
+    step = chunk_size - overlap
+    buffer = ""
+
+    for piece in pieces:
+        buffer += piece
+        pos = 0
+        while len(buffer) - pos >= chunk_size:
+            chunk = buffer[pos:pos + chunk_size].strip()
+            if len(chunk) > 100:  # Only add non-empty chunks
+                yield chunk
+            pos += step
+        if pos:
+            buffer = buffer[pos:]
+
+    # Tail windows (shorter than chunk_size)
+    pos = 0
+    while pos < len(buffer):
+        chunk = buffer[pos:pos + chunk_size].strip()
+        if len(chunk) > 100:
+            yield chunk
+        pos += step
+
+
+def simple_chunk(text, chunk_size=CHUNK_SIZE, overlap=OVERLAP):
+    """Simple sliding window chunking"""
+    return list(stream_chunks([text], chunk_size, overlap))
+
+
+def chunk_document(page_texts, chunker=DEFAULT_CHUNKER, token_budget=CHUNK_TOKENS):
+    """
+    Chunk one document's page texts (any iterable; pages are streamed
+    through either chunker).
+
+    Returns:
+        window: list of strings
+        structured: list of dicts with content and section metadata
+    """
+    if chunker == "window":
+        return list(stream_chunks(page_stream(page_texts)))
+    if chunker == "structured":
+        return list(iter_structured_chunks(page_stream(page_texts), token_budget))
+    raise ValueError(f"unknown chunker {chunker!r} - use one of {CHUNKERS}")
+
+
+def make_chunks(pdf_path, text_chunks, file_hash, chunker="window"):
+    """
+    Attach metadata (and stable chunk IDs) to the chunks of one PDF.
+
+    Args:
+        text_chunks: chunk_document() output - strings, or dicts whose
+            extra fields (section_title, ...) are kept
+    """
+    regulator, jurisdiction = detect_regulator(pdf_path.name)
+    chunks = []
+    for i, item in enumerate(text_chunks, 1):
+        fields = item if isinstance(item, dict) else {"content": item}
+        chunks.append({
+            "chunk_id": make_chunk_id(pdf_path.name, file_hash, i, chunker),
+            "content": fields["content"],
+            "source": pdf_path.name,
+            "regulator": regulator,
+            "jurisdiction": jurisdiction,
+            "chunk_number": i,
+            "total_chunks": len(text_chunks),
+            **{k: v for k, v in fields.items() if k != "content"},
+        })
+    return chunks
@@ -0,0 +1,109 @@
+# compliance_rag/llm.py
+"""
+LLM backends for rag.py.
+
+create_llm() picks the client from RAG_LLM_BACKEND (config.LLM_BACKEND):
+
+    groq    ChatGroq (needs GROQ_API_KEY)
+    stub    StubLLM - deterministic, local, no network
+    none    no client: retrieval-only mode
+
+StubLLM follows the parts of the LangChain chat-model interface that
+rag.py uses (invoke / ainvoke / stream), answers deterministically by
+echoing the retrieved context and simulates latency and a token rate,
+so load tests measure our code instead of the network.
+"""
+import asyncio
+import re
+import time
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from .config import LLM_BACKEND, STUB_LLM_LATENCY, STUB_LLM_TOKENS_PER_SECOND
+
+LLM_BACKENDS = ("groq", "stub", "none")
+
+CONTEXT_MARKER = "CONTEXT FROM REGULATORY DOCUMENTS:"
+QUESTION_MARKER = "USER QUESTION:"
+
+
+def _prompt_text(messages):
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(getattr(m, "content", m)) for m in messages)
+
+
+class StubLLM:
+    """
+    Deterministic local chat model.
+
+    Args:
+        latency: Seconds to wait before the first token
+        max_words: Length of the echoed answer
+        tokens_per_second: Simulated generation speed, one word per
+            token (0 = the whole answer at once)
+    """
+
+    model_name = "stub"
+
+    def __init__(self, latency=STUB_LLM_LATENCY, max_words=100,
+                 tokens_per_second=STUB_LLM_TOKENS_PER_SECOND):
+        self.latency = latency
+        self.max_words = max_words
+        self.tokens_per_second = tokens_per_second
+
+    def _respond(self, messages):
+        prompt = _prompt_text(messages)
+        context = prompt
+        if CONTEXT_MARKER in prompt:
+            context = prompt.split(CONTEXT_MARKER, 1)[1].split(QUESTION_MARKER, 1)[0]
+        words = re.findall(r"\S+", context)[:self.max_words]
+        return AIMessage(content=" ".join(words))
+
+    def _generation_seconds(self, words):
+        return len(words) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def invoke(self, messages, **kwargs):
+        response = self._respond(messages)
+        delay = self.latency + self._generation_seconds(response.content.split())
+        if delay:
+            time.sleep(delay)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        response = self._respond(messages)
+        delay = self.latency + self._generation_seconds(response.content.split())
+        if delay:
+            await asyncio.sleep(delay)
+        return response
+
+    def stream(self, messages, **kwargs):
+        """Yield the answer word by word, after the simulated latency"""
+        if self.latency:
+            time.sleep(self.latency)
+        words = self._respond(messages).content.split(" ")
+        for i, word in enumerate(words):
+            if i and self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+
+
+def create_llm(backend=LLM_BACKEND, groq_factory=None):
+    """
+    LLM client for a backend name.
+
+    Args:
+        backend: "groq", "stub" or "none" (retrieval-only)
+        groq_factory: Callable creating the Groq client (rag.py owns the
+            model settings and API key handling)
+
+    Returns:
+        The client; None for "none" (or Groq without an API key)
+    """
+    if backend == "none":
+        return None
+    if backend == "stub":
+        return StubLLM()
+    if backend == "groq":
+        return groq_factory() if groq_factory else None
+    raise ValueError(f"unknown LLM backend {backend!r} - use one of {LLM_BACKENDS}")
@@ -0,0 +1,83 @@
+# compliance_rag/manifest.py
+"""
+Per-PDF content hashes for incremental re-ingestion.
+
+The manifest records the SHA-256 of every ingested PDF and what changed
+in the last run, so each pipeline stage only redoes the work for added
+or changed files:
+
+    {
+      "files":   {"rbi_kyc.pdf": {"sha256": "...", "size": 123, "num_chunks": 42,
+                                "chunker": "structured"}},
+      "changes": {"added": [...], "changed": [...], "removed": [...], "unchanged": [...]},
+      "updated_at": 1700000000.0
+    }
+"""
+import hashlib
+import json
+import time
+
+from .config import MANIFEST_FILE
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_chunk_id(source, file_hash, chunk_number, chunker="window"):
+    """
+    Stable chunk ID: unchanged files keep their IDs across re-ingestion,
+    a changed file gets new ones (its old chunks are deleted). So does
+    a file re-chunked with another chunker.
+    """
+    if chunker == "window":
+        return f"{source}::{file_hash[:12]}::chunk_{chunk_number}"
+    return f"{source}::{file_hash[:12]}::{chunker}::chunk_{chunk_number}"
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    if not manifest_file.exists():
+        return {'files': {}, 'changes': {}}
+    with open(manifest_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(files, changes, manifest_file=MANIFEST_FILE):
+    manifest = {
+        'files': files,
+        'changes': changes,
+        'updated_at': time.time(),
+    }
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def diff_files(current_hashes, previous_files):
+    """
+    Classify PDFs against the previous manifest.
+
+    Args:
+        current_hashes: {filename: sha256} of the PDFs on disk
+        previous_files: manifest['files'] of the last run
+    """
+    added, changed, unchanged = [], [], []
+    for name, sha in sorted(current_hashes.items()):
+        old = previous_files.get(name)
+        if old is None:
+            added.append(name)
+        elif old['sha256'] != sha:
+            changed.append(name)
+        else:
+            unchanged.append(name)
+    removed = sorted(set(previous_files) - set(current_hashes))
+    return {
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unchanged': unchanged,
+    }
@@ -0,0 +1,125 @@
+# compliance_rag/metadata_index.py
+"""
+Posting lists per metadata value, used to push filters down into search.
+
+For every filterable field (regulator, jurisdiction, source) the index
+maps each value to the sorted array of chunk indices carrying it. A
+filter like {"regulator": "Reserve Bank of India"} becomes one array
+lookup, and multi-key filters intersect the posting lists.
+
+A chunk that stands for collapsed duplicates (see dedup.py) is also
+posted under every source listed in its `sources` field. ChromaDB only
+stores a chunk's own source, so shared_only() lists the chunks a source
+filter reaches through `sources` alone.
+"""
+import threading
+
+import numpy as np
+
+from .chunk_store import ChunkStore
+from .dedup import SOURCES_SEPARATOR
+
+# Fields stored as ChromaDB metadata (see create_embeddings.py)
+FILTERABLE_FIELDS = ("source", "regulator", "jurisdiction")
+
+
+def chroma_where(filter_metadata, fields=FILTERABLE_FIELDS):
+    """
+    ChromaDB `where` clause for the pushable part of a filter.
+
+    Args:
+        fields: Keys that may be pushed down
+
+    Returns None when no key can be pushed down.
+    """
+    clauses = [{key: value} for key, value in filter_metadata.items()
+               if key in fields]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+class MetadataIndex:
+    """
+    Lazily built {field: {value: sorted chunk indices}} postings.
+
+    Args:
+        chunks: ChunkStore (postings come straight from the dictionary
+            codes) or list of chunk dicts
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self._postings = {}
+        self._shared_only = {}
+        self._lock = threading.Lock()
+
+    def _build_field(self, field):
+        if isinstance(self.chunks, ChunkStore) and field in self.chunks.dictionaries:
+            codes = np.asarray(self.chunks.codes(field))
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(self.chunks.dictionaries[field]) + 1))
+            return {
+                value: order[bounds[code]:bounds[code + 1]].astype(np.int64)
+                for code, value in enumerate(self.chunks.dictionaries[field])
+            }
+
+        postings = {}
+        for i, chunk in enumerate(self.chunks):
+            value = chunk.get(field)
+            try:
+                postings.setdefault(value, []).append(i)
+            except TypeError:
+                # Unhashable values (lists) cannot be filtered on
+                continue
+        return {value: np.asarray(ids, dtype=np.int64) for value, ids in postings.items()}
+
+    def _shared_sources(self):
+        """{source: chunk indices} from the `sources` field of canonical chunks"""
+        if isinstance(self.chunks, ChunkStore):
+            if 'sources' not in self.chunks.dictionaries:
+                return {}
+            codes = np.asarray(self.chunks.codes('sources'))
+            values = self.chunks.dictionaries['sources']
+            pairs = ((int(i), values[codes[i]]) for i in np.flatnonzero(codes >= 0))
+        else:
+            pairs = ((i, chunk['sources']) for i, chunk in enumerate(self.chunks)
+                     if chunk.get('sources'))
+
+        shared = {}
+        for i, sources in pairs:
+            for source in sources.split(SOURCES_SEPARATOR):
+                shared.setdefault(source, []).append(i)
+        return shared
+
+    def postings(self, field):
+        if field not in self._postings:
+            with self._lock:
+                if field not in self._postings:
+                    postings = self._build_field(field)
+                    if field == 'source':
+                        for source, ids in self._shared_sources().items():
+                            own = postings.get(source, np.empty(0, dtype=np.int64))
+                            self._shared_only[source] = np.setdiff1d(ids, own).astype(np.int64)
+                            postings[source] = np.union1d(own, ids).astype(np.int64)
+                    self._postings[field] = postings
+        return self._postings[field]
+
+    def shared_only(self, source):
+        """Sorted indices posted under `source` only through their `sources` field"""
+        self.postings('source')
+        return self._shared_only.get(source, np.empty(0, dtype=np.int64))
+
+    def match(self, filter_metadata):
+        """Sorted indices of chunks matching every key of the filter"""
+        allowed = None
+        for field, value in filter_metadata.items():
+            ids = self.postings(field).get(value)
+            if ids is None:
+                return np.empty(0, dtype=np.int64)
+            allowed = ids if allowed is None else np.intersect1d(allowed, ids, assume_unique=True)
+            if not len(allowed):
+                break
+        return allowed
@@ -0,0 +1,371 @@
+# compliance_rag/metrics.py
+"""
+Hot-path instrumentation: spans, counters and latency histograms.
+
+    with metrics.span("dense_search", queries=3) as span:
+        ...
+        span.set("results", n)
+    metrics.count("rag_results_total", n, stage="dense_search")
+
+Every span is timed with the monotonic clock and observed in the
+rag_stage_duration_seconds histogram under its name. The registry is
+exported as:
+
+    prometheus_text()   Prometheus text format (serve.py GET /metrics)
+    stage_summary()     per-stage count / p50 / p95 / buckets (app.py sidebar)
+    RAG_TRACE_FILE      optional OpenTelemetry traces, one OTLP/JSON
+                        line per finished trace (the collector's file
+                        exporter format)
+
+With RAG_METRICS=0 the module uses NullMetrics: span() returns one
+shared no-op object and count() / observe() return immediately, so the
+instrumentation costs a function call per site.
+"""
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+
+from .config import LATENCY_BUCKETS, METRICS_ENABLED, TRACE_FILE
+
+STAGE_HISTOGRAM = "rag_stage_duration_seconds"
+
+HELP = {
+    STAGE_HISTOGRAM: "Time spent per pipeline stage",
+    "rag_stage_errors_total": "Pipeline stages that raised an exception",
+    "rag_results_total": "Results returned per stage",
+    "rag_llm_tokens_total": "LLM prompt / completion tokens",
+    "rag_cache_hits_total": "Cache hits",
+    "rag_cache_misses_total": "Cache misses",
+}
+
+_current_span = contextvars.ContextVar("rag_current_span", default=None)
+_collectors = []   # survive configure(), see add_collector()
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def histogram_quantile(q, bounds, counts):
+    """
+    Quantile estimate from bucket counts (linear within a bucket, like
+    Prometheus' histogram_quantile).
+
+    Args:
+        bounds: Upper bounds of the finite buckets
+        counts: Per-bucket (not cumulative) counts, len(bounds) + 1
+    """
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if seen + count >= rank and count:
+            if i == len(bounds):
+                return bounds[-1]
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / count
+        seen += count
+    return bounds[-1]
+
+
+# ============================================================
+# SPANS
+# ============================================================
+class Span:
+    """One timed stage; also an OpenTelemetry span when tracing is on"""
+
+    __slots__ = ("registry", "name", "attributes", "trace_id", "span_id", "parent",
+                 "spans", "start_ns", "wall_ns", "_token")
+
+    def __init__(self, registry, name, attributes):
+        self.registry = registry
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        if self.registry.trace_file:
+            self.parent = _current_span.get()
+            self.trace_id = self.parent.trace_id if self.parent else os.urandom(16).hex()
+            self.span_id = os.urandom(8).hex()
+            # Finished spans of one trace are collected on its root span
+            self.spans = self.parent.spans if self.parent else []
+            self._token = _current_span.set(self)
+            self.wall_ns = time.time_ns()
+        else:
+            self._token = None
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        registry = self.registry
+        registry._observe((STAGE_HISTOGRAM, (("stage", self.name),)), duration_ns / 1e9)
+        if exc_type is not None:
+            registry.count("rag_stage_errors_total", stage=self.name)
+
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self.spans.append(self._otlp(duration_ns, exc))
+            if self.parent is None:
+                registry.write_trace(self.spans)
+        return False
+
+    def _otlp(self, duration_ns, exc):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,   # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.wall_ns),
+            'endTimeUnixNano': str(self.wall_ns + duration_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': repr(exc)} if exc is not None else {'code': 1},
+        }
+        if self.parent is not None:
+            span['parentSpanId'] = self.parent.span_id
+        return span
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+class Metrics:
+    """
+    Thread-safe counters and histograms, plus optional trace export.
+
+    Args:
+        buckets: Histogram upper bounds in seconds
+        trace_file: Append OTLP/JSON traces here (None = no tracing)
+        service_name: OpenTelemetry service.name resource attribute
+    """
+
+    enabled = True
+
+    def __init__(self, buckets=LATENCY_BUCKETS, trace_file=TRACE_FILE,
+                 service_name="compliance-rag"):
+        self.buckets = tuple(buckets)
+        self.trace_file = os.fspath(trace_file) if trace_file else None
+        self.service_name = service_name
+        self._counters = {}      # (name, labels) -> value
+        self._histograms = {}    # (name, labels) -> [bucket counts, sum]
+        self._lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+
+    def span(self, name, **attributes):
+        return Span(self, name, attributes)
+
+    def count(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        self._observe((name, _labels_key(labels)), value)
+
+    def _observe(self, key, value):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][slot] += 1
+            histogram[1] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # --------------------------------------------------------
+    # Export
+    # --------------------------------------------------------
+    def _snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(counts), total)
+                          for key, (counts, total) in self._histograms.items()}
+        for collector in _collectors:
+            for name, labels, value in collector():
+                key = (name, _labels_key(labels))
+                counters[key] = counters.get(key, 0) + value
+        return counters, histograms
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        counters, histograms = self._snapshot()
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for (metric, key), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, key), (counts, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self):
+        """
+        Per-stage latency for dashboards.
+
+        Returns:
+            {stage: {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'buckets'}} -
+            buckets maps each upper bound label ("<= 5 ms", "> 30 s") to
+            its (non-cumulative) count
+        """
+        _, histograms = self._snapshot()
+        labels = [f"<= {b * 1000:g} ms" if b < 1 else f"<= {b:g} s" for b in self.buckets]
+        labels.append(f"> {self.buckets[-1]:g} s")
+        summary = {}
+        for (name, key), (counts, total) in sorted(histograms.items()):
+            if name != STAGE_HISTOGRAM:
+                continue
+            stage = dict(key).get('stage', "")
+            n = sum(counts)
+            summary[stage] = {
+                'count': n,
+                'mean_ms': total / n * 1000 if n else 0.0,
+                'p50_ms': histogram_quantile(0.5, self.buckets, counts) * 1000,
+                'p95_ms': histogram_quantile(0.95, self.buckets, counts) * 1000,
+                'buckets': dict(zip(labels, counts)),
+            }
+        return summary
+
+    def write_trace(self, spans):
+        """Append one finished trace as an OTLP/JSON ExportTraceServiceRequest line"""
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute("service.name", self.service_name)]},
+            'scopeSpans': [{'scope': {'name': "compliance_rag"}, 'spans': spans}],
+        }]}
+        line = json.dumps(request, separators=(",", ":"))
+        with self._trace_lock:
+            with open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class NullMetrics:
+    """Disabled registry: same interface, nothing recorded"""
+
+    enabled = False
+    trace_file = None
+
+    def span(self, name, **attributes):
+        return _NULL_SPAN
+
+    def count(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+    def reset(self):
+        pass
+
+    def prometheus_text(self):
+        return ""
+
+    def stage_summary(self):
+        return {}
+
+
+# ============================================================
+# MODULE API
+# ============================================================
+_registry = Metrics() if METRICS_ENABLED else NullMetrics()
+
+
+def configure(enabled=True, trace_file=TRACE_FILE, buckets=LATENCY_BUCKETS):
+    """Replace the process-wide registry (e.g. to turn metrics off in a benchmark)"""
+    global _registry
+    _registry = Metrics(buckets, trace_file) if enabled else NullMetrics()
+    return _registry
+
+
+def registry():
+    return _registry
+
+
+def span(name, **attributes):
+    return _registry.span(name, **attributes)
+
+
+def count(name, value=1, **labels):
+    _registry.count(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    _registry.observe(name, value, **labels)
+
+
+def add_collector(collector):
+    """
+    Register a callable read at export time. It returns
+    [(name, labels dict, value)] counter samples - for counts that are
+    already kept elsewhere (e.g. cache stats), so the hot path pays nothing.
+    """
+    _collectors.append(collector)
+
+
+def prometheus_text():
+    return _registry.prometheus_text()
+
+
+def stage_summary():
+    return _registry.stage_summary()
@@ -0,0 +1,131 @@
+# compliance_rag/quantization.py
+"""
+Compact codes for the dense index.
+
+    int8     one byte per dimension: per-dimension affine scale between
+             the min and max seen at build time (4x smaller than float32)
+    binary   one bit per dimension: the sign of each component, packed
+             with np.packbits and compared by Hamming distance (32x smaller)
+
+The codes only rank candidates. QuantizedIndex (dense_index.py) scans the
+codes, then rescores the best rescore_factor * k rows with the float
+vectors, which stay memory-mapped on disk - only the candidate rows are
+read.
+
+int8 saves memory, not latency: numpy has no BLAS kernel for integer
+matrix products, so the scan decodes each block of codes to float32 and
+is typically slower than ExactIndex over the float matrix.
+"""
+import numpy as np
+
+QUANTIZATION_METHODS = ("none", "int8", "binary")
+RESCORE_FACTOR = {'int8': 4, 'binary': 10}   # candidates rescored per result
+MAX_CODE_CELLS = 1 << 16                     # code bytes decoded per block (cache-sized)
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Int8Quantizer:
+    """
+    Scalar quantization to uint8 codes.
+
+    Args:
+        low: Per-dimension minimum (float32)
+        scale: Per-dimension step, (max - min) / 255
+    """
+
+    method = "int8"
+
+    def __init__(self, low, scale):
+        self.low = np.asarray(low, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors):
+        low = vectors.min(axis=0)
+        span = vectors.max(axis=0) - low
+        span[span == 0] = 1
+        return cls(low, span / 255)
+
+    def encode(self, vectors):
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def scores(self, codes, queries):
+        """
+        Approximate inner products, (len(queries), len(codes)).
+
+        q . (low + scale * c) = (q * scale) . c + q . low
+
+        Each block is cast to float32 for the BLAS product (an int8 x int8
+        -> int32 product in numpy is several times slower), so this costs
+        latency compared to scanning float32 vectors.
+        """
+        weighted = queries * self.scale
+        offsets = queries @ self.low
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        rows = max(1, MAX_CODE_CELLS // max(1, codes.shape[1]))
+        for start in range(0, len(codes), rows):
+            block = codes[start:start + rows].astype(np.float32)
+            out[:, start:start + rows] = weighted @ block.T
+        out += offsets[:, None]
+        return out
+
+    def state(self):
+        return {'low': self.low, 'scale': self.scale}
+
+
+class BinaryQuantizer:
+    """Sign-bit quantization to packed bits, scored by Hamming distance"""
+
+    method = "binary"
+
+    def __init__(self, dim):
+        self.dim = int(dim)
+
+    @classmethod
+    def fit(cls, vectors):
+        return cls(vectors.shape[1])
+
+    def encode(self, vectors):
+        return np.packbits(vectors > 0, axis=1)
+
+    def scores(self, codes, queries):
+        """dim - 2 * Hamming distance: the inner product of the ±1 sign vectors"""
+        query_codes = self.encode(queries)
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        rows = max(1, MAX_CODE_CELLS // max(1, codes.shape[1]))
+        for start in range(0, len(codes), rows):
+            block = codes[start:start + rows]
+            for q, query_code in enumerate(query_codes):
+                out[q, start:start + rows] = self.dim - 2 * hamming(block, query_code)
+        return out
+
+    def state(self):
+        return {'dim': np.array(self.dim)}
+
+
+def hamming(codes, query_code):
+    """Hamming distance between each row of packed `codes` and `query_code`"""
+    diff = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):          # numpy >= 2.0
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[diff].sum(axis=1, dtype=np.int32)
+
+
+_QUANTIZERS = {'int8': Int8Quantizer, 'binary': BinaryQuantizer}
+
+
+def fit_quantizer(method, vectors):
+    if method not in _QUANTIZERS:
+        raise ValueError(f"unknown quantization {method!r} - use one of {QUANTIZATION_METHODS}")
+    return _QUANTIZERS[method].fit(vectors)
+
+
+def load_quantizer(method, state):
+    """Rebuild a quantizer from the arrays returned by state()"""
+    if method == "int8":
+        return Int8Quantizer(state['low'], state['scale'])
+    if method == "binary":
+        return BinaryQuantizer(int(state['dim']))
+    raise ValueError(f"unknown quantization {method!r} - use one of {QUANTIZATION_METHODS}")
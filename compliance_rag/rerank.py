@@ -0,0 +1,126 @@
+# compliance_rag/rerank.py
+"""
+Cross-encoder reranking of hybrid search candidates.
+
+hybrid_search returns a wide candidate list cheaply; a small CPU
+cross-encoder then scores every (question, chunk) pair jointly and only
+the best few chunks go into the LLM prompt. Scores are cached per
+(normalized question, chunk text), so repeated questions skip the model.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .answer_cache import text_hash
+from .config import RERANK_BATCH_SIZE, RERANK_CACHE_ITEMS, RERANK_MODEL
+from .embedding_cache import normalize_query
+
+
+class CrossEncoderReranker:
+    """
+    Lazily loaded sentence-transformers CrossEncoder with a score cache.
+
+    Args:
+        model_name: Cross-encoder checkpoint
+        device: "cpu" (default) or any torch device string
+        batch_size: Pairs per forward pass
+        max_length: Token limit per (question, chunk) pair
+        cache_size: Entries in the (question, chunk) score LRU
+    """
+
+    def __init__(self, model_name=RERANK_MODEL, device="cpu", batch_size=RERANK_BATCH_SIZE,
+                 max_length=512, cache_size=RERANK_CACHE_ITEMS):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.model_seconds = 0.0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device=self.device,
+                                               max_length=self.max_length)
+        return self._model
+
+    def score(self, query, texts):
+        """Relevance score of each text for `query` (higher is better)"""
+        query = normalize_query(query)
+        keys = [(query, text_hash(text)) for text in texts]
+        scores = np.empty(len(texts), dtype=np.float32)
+
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            start = time.perf_counter()
+            predicted = self.model.predict(
+                [(query, texts[i]) for i in missing],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.model_seconds += elapsed
+                for i, value in zip(missing, np.asarray(predicted, dtype=np.float32).ravel()):
+                    scores[i] = value
+                    self._cache[keys[i]] = float(value)
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def rerank(self, query, docs, top_n):
+        """
+        Reorder hybrid_search results by cross-encoder score.
+
+        Returns:
+            The best `top_n` docs (copies) with an added 'rerank_score';
+            the fused 'score' is kept
+        """
+        if not docs:
+            return []
+        scores = self.score(query, [doc['content'] for doc in docs])
+        order = np.argsort(-scores, kind="stable")[:top_n]
+        return [{**docs[i], 'rerank_score': float(scores[i])} for i in order]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'model_seconds': self.model_seconds,
+                'cache_items': len(self._cache),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,198 @@
+# compliance_rag/resources.py
+"""
+Process-wide holder for the heavy resources: retriever (chunks, BM25,
+ChromaDB), embedding model and LLM client.
+
+Everything is created once and shared by all threads / Streamlit
+sessions. reload() builds a new retriever next to the current one and
+swaps it in, so queries never see a half-loaded index and in-flight
+queries finish on the retriever they started with.
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from .config import EMBEDDING_MODEL, QUERY_EMBEDDING_CACHE_FILE, QUERY_EMBEDDING_MEMORY_ITEMS
+from .index import load_index
+
+
+def process_memory():
+    """Resident memory of this process in bytes (None if unknown)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak, not current, RSS - the best we get without psutil or /proc
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ResourceManager:
+    """
+    Thread-safe, lazily initialized retriever + LLM client.
+
+    Args:
+        llm_factory: Callable returning the LLM client (or None)
+        index_loader: Callable building a HybridRetriever; receives
+            embedding_fn / embedding_cache keyword arguments so the
+            model and query cache survive reloads
+    """
+
+    def __init__(self, llm_factory=None, index_loader=load_index):
+        self._llm_factory = llm_factory
+        self._index_loader = index_loader
+
+        self._retriever = None
+        self._llm = None
+        self._llm_loaded = False
+
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+        self._embedding_fn = None
+        self._embedding_cache = None
+        self._reranker = None
+
+        self.loaded_at = None
+        self.load_seconds = None
+        self.reloads = 0
+
+    # --------------------------------------------------------
+    # Resources
+    # --------------------------------------------------------
+    @property
+    def embedding_fn(self):
+        if self._embedding_fn is None:
+            from .embeddings import LazyEmbeddingFunction
+            self._embedding_fn = LazyEmbeddingFunction(EMBEDDING_MODEL)
+        return self._embedding_fn
+
+    @property
+    def reranker(self):
+        """Cross-encoder reranker (its model loads on first use)"""
+        if self._reranker is None:
+            with self._lock:
+                if self._reranker is None:
+                    from .rerank import CrossEncoderReranker
+                    self._reranker = CrossEncoderReranker()
+        return self._reranker
+
+    @property
+    def retriever(self):
+        if self._retriever is None:
+            with self._reload_lock:
+                if self._retriever is None:
+                    self._publish(*self._load())
+        return self._retriever
+
+    @property
+    def llm(self):
+        if not self._llm_loaded:
+            with self._lock:
+                if not self._llm_loaded:
+                    self._llm = self._llm_factory() if self._llm_factory else None
+                    self._llm_loaded = True
+        return self._llm
+
+    def set_llm(self, llm):
+        """Replace the LLM client (e.g. with compliance_rag.llm.StubLLM)"""
+        with self._lock:
+            self._llm = llm
+            self._llm_loaded = True
+
+    def warm(self, load_model=False):
+        """
+        Load everything up front instead of on the first query.
+
+        Args:
+            load_model: Also load the sentence-transformers model, which
+                is otherwise skipped while queries hit the embedding cache
+        """
+        self.retriever
+        self.llm
+        if load_model:
+            self.embedding_fn.model
+        return self
+
+    # --------------------------------------------------------
+    # Hot reload
+    # --------------------------------------------------------
+    def reload(self):
+        """
+        Build a fresh retriever from the artifacts on disk and swap it in.
+
+        The embedding model and query cache are reused. Raises whatever
+        the loader raises; the current retriever stays in place then.
+        """
+        with self._reload_lock:
+            retriever, seconds = self._load()
+            self._publish(retriever, seconds)
+            self.reloads += 1
+        return self.status()
+
+    def _load(self):
+        from .embedding_cache import QueryEmbeddingCache
+
+        if self._embedding_cache is None:
+            self._embedding_cache = QueryEmbeddingCache(
+                self.embedding_fn,
+                model_name=EMBEDDING_MODEL,
+                path=QUERY_EMBEDDING_CACHE_FILE,
+                max_memory_items=QUERY_EMBEDDING_MEMORY_ITEMS,
+            )
+
+        start = time.perf_counter()
+        retriever = self._index_loader(
+            embedding_fn=self.embedding_fn,
+            embedding_cache=self._embedding_cache,
+        )
+        return retriever, time.perf_counter() - start
+
+    def _publish(self, retriever, seconds):
+        with self._lock:
+            self._retriever = retriever
+            self.loaded_at = datetime.now()
+            self.load_seconds = seconds
+
+    # --------------------------------------------------------
+    # Status
+    # --------------------------------------------------------
+    def cache_stats(self):
+        """{cache name: stats()} for the caches created so far"""
+        caches = {'query_embedding': self._embedding_cache, 'rerank': self._reranker}
+        return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+    def status(self):
+        """Snapshot for dashboards: load time, index size, memory"""
+        retriever = self._retriever
+        chunks = getattr(retriever, "chunks", None)
+        nbytes = getattr(chunks, "nbytes", None)
+        model_loaded = (self._embedding_fn is not None
+                        and self._embedding_fn._model is not None)
+
+        return {
+            'loaded': retriever is not None,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'reloads': self.reloads,
+            'num_chunks': len(chunks) if chunks is not None else 0,
+            'corpus_id': getattr(retriever, "corpus_id", None),
+            'chunk_store_bytes': nbytes() if callable(nbytes) else None,
+            'model_loaded': model_loaded,
+            'llm': getattr(self._llm, "model_name", None) if self._llm_loaded else None,
+            'memory_bytes': process_memory(),
+        }
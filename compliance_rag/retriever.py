@@ -0,0 +1,421 @@
+# compliance_rag/retriever.py
+import asyncio
+
+import numpy as np
+
+from . import metrics
+from .bm25 import top_k_indices
+from .chunk_store import ChunkStore
+from .config import CANDIDATE_K, DENSE_WEIGHT, FUSION_METHOD
+from .fusion import LinearFusion, fuse
+from .index import tokenize
+from .metadata_index import FILTERABLE_FIELDS, MetadataIndex, chroma_where
+
+
+def _chunk_id_index(chunks):
+    """{chunk_id: chunk index}, read from a single column when possible"""
+    if isinstance(chunks, ChunkStore):
+        if 'chunk_id' not in chunks.fields:
+            return {}
+        return {cid: i for i, cid in enumerate(chunks.strings('chunk_id'))}
+    return {
+        chunk['chunk_id']: i
+        for i, chunk in enumerate(chunks)
+        if 'chunk_id' in chunk
+    }
+
+
+class HybridRetriever:
+    """
+    Combines Dense (semantic) and Sparse (keyword) search
+    """
+
+    def __init__(self, collection, bm25, chunks, alpha=DENSE_WEIGHT,
+                 embedding_cache=None, corpus_id=None, fusion=FUSION_METHOD,
+                 candidate_k=CANDIDATE_K, fusion_model=None, dense_index=None,
+                 embedding_fn=None):
+        """
+        Args:
+            collection: ChromaDB collection
+            bm25: BM25 index
+            chunks: List of document chunks
+            alpha: Weight for dense search (0.5 = equal weight)
+            embedding_cache: Optional QueryEmbeddingCache; when set, query
+                vectors come from the cache instead of being re-encoded
+            corpus_id: Fingerprint of the chunk corpus (changes on rebuild)
+            fusion: Default fusion method (see compliance_rag.fusion)
+            candidate_k: Default number of dense and sparse candidates
+            fusion_model: LinearFusion for fusion="learned" (loaded from
+                FUSION_WEIGHTS_FILE on first use when not given)
+            dense_index: Local ExactIndex / HNSWIndex (compliance_rag.dense_index);
+                when set, dense search runs in-process instead of in ChromaDB
+            embedding_fn: Encodes queries for the dense index when there
+                is no embedding cache
+        """
+        self.collection = collection
+        self.bm25 = bm25
+        self.chunks = chunks
+        self.alpha = alpha
+        self.beta = 1 - alpha
+        self.embedding_cache = embedding_cache
+        self.corpus_id = corpus_id
+        self.fusion = fusion
+        self.candidate_k = candidate_k
+        self.fusion_model = fusion_model
+        self.dense_index = dense_index
+        self.embedding_fn = embedding_fn
+        self._id_to_index = _chunk_id_index(chunks)
+        self.metadata_index = MetadataIndex(chunks)
+        self.pushable_fields = FILTERABLE_FIELDS
+
+    def _filter(self, filter_metadata, allowed=None):
+        """Sorted indices allowed by the filter (None = no filter)"""
+        if filter_metadata and allowed is None:
+            allowed = self.metadata_index.match(filter_metadata)
+        return allowed
+
+    def _embed(self, queries):
+        with metrics.span("embed", queries=len(queries)):
+            if self.embedding_cache is not None:
+                return self.embedding_cache.embed_many(queries)
+            return self.embedding_fn.encode(queries)
+
+    def _query_dense_index(self, vectors, n_results, allowed):
+        """Dense search in the local index -> {chunk index: similarity} per query"""
+        indices, similarities = self.dense_index.search(vectors, n_results, allowed)
+        # Same scale as ChromaDB's squared L2 distance on normalized vectors
+        return [
+            {int(idx): 1 / (1 + (2 - 2 * float(sim))) for idx, sim in zip(rows, sims)}
+            for rows, sims in zip(indices, similarities)
+        ]
+
+    def _query_collection(self, queries, n_results, filter_metadata, embeddings=None):
+        """One ChromaDB round-trip for any number of queries"""
+        query_args = {'n_results': n_results}
+        where = chroma_where(filter_metadata, self.pushable_fields) if filter_metadata else None
+        if where is not None:
+            query_args['where'] = where
+
+        if embeddings is None and self.embedding_cache is not None:
+            embeddings = self.embedding_cache.embed_many(queries)
+        if embeddings is not None:
+            return self.collection.query(
+                query_embeddings=[vector.tolist() for vector in embeddings],
+                **query_args
+            )
+        return self.collection.query(
+            query_texts=list(queries),
+            **query_args
+        )
+
+    def _dense_scores(self, ids, distances, filter_metadata, allowed):
+        # Keys ChromaDB does not know about are checked against the postings
+        if filter_metadata and any(key not in self.pushable_fields for key in filter_metadata):
+            allowed_set = set(allowed.tolist())
+        else:
+            allowed_set = None
+
+        scores = {}
+        for i, doc_id in enumerate(ids):
+            idx = self._resolve_id(doc_id, i)
+            if allowed_set is not None and idx not in allowed_set:
+                continue
+
+            # Convert distance to similarity
+            distance = distances[i] if distances is not None else 0
+            similarity = 1 / (1 + distance)
+            scores[idx] = similarity
+
+        return scores
+
+    def dense_search(self, query, top_k=20, filter_metadata=None, allowed=None):
+        """
+        Semantic search using ChromaDB embeddings (or the local dense
+        index when one is loaded)
+
+        The filter is pushed into the search (a ChromaDB `where` clause
+        or the allowed rows of the dense index), so the top_k results are
+        all matching chunks.
+        """
+        return self.dense_search_batch([query], top_k, filter_metadata, allowed)[0]
+
+    def dense_search_batch(self, queries, top_k=20, filter_metadata=None, allowed=None,
+                           embeddings=None):
+        """
+        dense_search for many queries: one embedding call, one ChromaDB query
+
+        Args:
+            embeddings: Query vectors when they are already encoded (the
+                model is not called)
+        """
+        with metrics.span("dense_search", queries=len(queries), top_k=top_k) as span:
+            scores = self._dense_search_batch(queries, top_k, filter_metadata, allowed,
+                                              embeddings)
+            results = sum(map(len, scores))
+            span.set("results", results)
+        metrics.count("rag_results_total", results, stage="dense_search")
+        return scores
+
+    def _dense_search_batch(self, queries, top_k, filter_metadata, allowed, embeddings):
+        allowed = self._filter(filter_metadata, allowed)
+        n_results = min(top_k, len(self.chunks) if allowed is None else len(allowed))
+        if n_results <= 0 or not queries:
+            return [{} for _ in queries]
+
+        if self.dense_index is not None:
+            if embeddings is None:
+                embeddings = self._embed(list(queries))
+            return self._query_dense_index(embeddings, n_results, allowed)
+
+        # ChromaDB matches a source filter on each chunk's own source;
+        # collapsed duplicates shared into that source are scored here
+        shared = self._shared_candidates(filter_metadata, allowed)
+        if len(shared) and embeddings is None:
+            embeddings = self._embed(list(queries))
+
+        results = self._query_collection(queries, n_results, filter_metadata, embeddings)
+        distances = results.get('distances')
+        scores = [
+            self._dense_scores(ids, distances[q] if distances else None,
+                               filter_metadata, allowed)
+            for q, ids in enumerate(results['ids'])
+        ]
+        if len(shared):
+            scores = self._add_shared_scores(scores, embeddings, shared, n_results)
+        return scores
+
+    def _shared_candidates(self, filter_metadata, allowed):
+        """Allowed chunks the ChromaDB `where` misses (their own source differs)"""
+        if not filter_metadata or 'source' not in filter_metadata:
+            return np.empty(0, dtype=np.int64)
+        shared = self.metadata_index.shared_only(filter_metadata['source'])
+        return np.intersect1d(shared, allowed, assume_unique=True) if len(shared) else shared
+
+    def _add_shared_scores(self, scores, embeddings, shared, n_results):
+        """Score the shared chunks from their stored vectors and keep the top n_results"""
+        ids = [self.chunks[i]['chunk_id'] for i in shared.tolist()]
+        stored = self.collection.get(ids=ids, include=["embeddings"])
+        rows = [self._id_to_index[cid] for cid in stored['ids']]
+        if not rows:
+            return scores
+        vectors = np.asarray(stored['embeddings'], dtype=np.float32)
+        queries = np.asarray(embeddings, dtype=np.float32)
+        # Squared L2, the distance ChromaDB reports
+        distances = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+
+        merged = []
+        for query_scores, query_distances in zip(scores, distances):
+            query_scores = dict(query_scores)
+            for idx, distance in zip(rows, query_distances.tolist()):
+                query_scores[idx] = 1 / (1 + distance)
+            best = sorted(query_scores.items(), key=lambda item: -item[1])[:n_results]
+            merged.append(dict(best))
+        return merged
+
+    def _resolve_id(self, doc_id, position):
+        """Map a ChromaDB ID back to its chunk index"""
+        # Stable IDs: "filename.pdf::<file hash>::chunk_3"
+        idx = self._id_to_index.get(doc_id)
+        if idx is not None:
+            return idx
+        try:
+            # Legacy formats with a global position
+            if '::chunk_' in doc_id:
+                # Format: "filename.pdf::chunk_123"
+                return int(doc_id.split('::chunk_')[1])
+            if 'chunk_' in doc_id:
+                # Format: "chunk_123"
+                return int(doc_id.split('_')[-1])
+        except (ValueError, IndexError):
+            pass
+        # If all parsing fails, use position
+        return position
+
+    @staticmethod
+    def _sparse_scores(bm25_scores, candidates, top_k):
+        # Get top k indices (argpartition - only the winners are sorted)
+        top_indices = top_k_indices(bm25_scores, top_k)
+
+        # Normalize scores to 0-1 range (the best hit holds the max score)
+        best = bm25_scores[top_indices[0]] if len(top_indices) else 0
+        max_score = best if best > 0 else 1
+
+        if candidates is None:
+            return {int(idx): bm25_scores[idx] / max_score for idx in top_indices}
+        return {int(candidates[idx]): bm25_scores[idx] / max_score for idx in top_indices}
+
+    def sparse_search(self, query, top_k=20, filter_metadata=None, allowed=None):
+        """
+        Keyword search using BM25
+
+        With a filter, only the matching chunks (from the metadata
+        postings) are scored.
+        """
+        with metrics.span("sparse_search", queries=1, top_k=top_k) as span:
+            allowed = self._filter(filter_metadata, allowed)
+            if allowed is not None and not len(allowed):
+                return {}
+
+            tokenized_query = tokenize(query)
+            if allowed is None:
+                bm25_scores = self.bm25.get_scores(tokenized_query)
+            elif hasattr(self.bm25, 'top_n'):
+                bm25_scores = self.bm25.get_scores(tokenized_query, doc_ids=allowed)
+            else:
+                # rank_bm25 index from an older build: score everything, then restrict
+                bm25_scores = self.bm25.get_scores(tokenized_query)[allowed]
+
+            scores = self._sparse_scores(bm25_scores, allowed, top_k)
+            span.set("results", len(scores))
+        metrics.count("rag_results_total", len(scores), stage="sparse_search")
+        return scores
+
+    def sparse_search_batch(self, queries, top_k=20, filter_metadata=None, allowed=None):
+        """
+        sparse_search for many queries as sparse matrix products.
+
+        Results are identical to calling sparse_search per query.
+        """
+        allowed = self._filter(filter_metadata, allowed)
+        if allowed is not None and not len(allowed):
+            return [{} for _ in queries]
+        if not hasattr(self.bm25, 'get_scores_batch'):
+            return [self.sparse_search(q, top_k, filter_metadata, allowed) for q in queries]
+
+        results = []
+        with metrics.span("sparse_search", queries=len(queries), top_k=top_k) as span:
+            tokenized = [tokenize(q) for q in queries]
+            for block in self.bm25.iter_scores_batch(tokenized, doc_ids=allowed):
+                for bm25_scores in block:
+                    results.append(self._sparse_scores(bm25_scores, allowed, top_k))
+            count = sum(map(len, results))
+            span.set("results", count)
+        metrics.count("rag_results_total", count, stage="sparse_search")
+        return results
+
+    def _fuse(self, dense_scores, sparse_scores, top_k, fusion=None):
+        """Fuse dense and sparse candidates -> formatted results"""
+        method = fusion or self.fusion
+        if method == "learned" and self.fusion_model is None:
+            self.fusion_model = LinearFusion.load()
+
+        with metrics.span("fusion", method=method):
+            return self._fuse_results(method, dense_scores, sparse_scores, top_k)
+
+    def _fuse_results(self, method, dense_scores, sparse_scores, top_k):
+        indices, combined = fuse(method, dense_scores, sparse_scores,
+                                 self.alpha, self.fusion_model)
+
+        # Make sure indices are valid
+        valid = indices < len(self.chunks)
+        indices, combined = indices[valid], combined[valid]
+
+        # Get top k (argpartition - only the winners are sorted)
+        top = top_k_indices(combined, top_k)
+
+        # Format results
+        results = []
+        for idx, score in zip(indices[top].tolist(), combined[top].tolist()):
+            chunk = self.chunks[idx]
+            results.append({
+                'content': chunk['content'],
+                'source': chunk['source'],
+                'regulator': chunk['regulator'],
+                'jurisdiction': chunk['jurisdiction'],
+                'score': score,
+                'chunk_index': idx,
+                'chunk_number': chunk.get('chunk_number'),
+                'chunk_id': chunk.get('chunk_id')
+            })
+
+        return results
+
+    def hybrid_search(self, query, top_k=5, filter_metadata=None, fusion=None,
+                      candidate_k=None):
+        """
+        Combine dense and sparse search
+
+        Args:
+            query: Search query string
+            top_k: Number of results to return
+            filter_metadata: Dict to filter by (e.g., {"regulator": "Reserve Bank of India"});
+                applied inside both searches, so every candidate matches
+            fusion: "weighted", "rrf", "zscore", "minmax" or "learned"
+                (default: the retriever's fusion setting)
+            candidate_k: Candidates taken from each search before fusion
+
+        Returns:
+            List of results with scores
+        """
+
+        with metrics.span("hybrid_search", queries=1, top_k=top_k) as span:
+            allowed = self._filter(filter_metadata)
+            if allowed is not None and not len(allowed):
+                return []
+
+            # Get scores from both methods
+            candidate_k = candidate_k or self.candidate_k
+            dense_scores = self.dense_search(query, top_k=candidate_k,
+                                             filter_metadata=filter_metadata, allowed=allowed)
+            sparse_scores = self.sparse_search(query, top_k=candidate_k,
+                                               filter_metadata=filter_metadata, allowed=allowed)
+
+            results = self._fuse(dense_scores, sparse_scores, top_k, fusion)
+            span.set("results", len(results))
+        metrics.count("rag_results_total", len(results), stage="hybrid_search")
+        return results
+
+    def hybrid_search_batch(self, queries, top_k=5, filter_metadata=None, fusion=None,
+                            candidate_k=None):
+        """
+        hybrid_search for many queries at once.
+
+        All queries are embedded in one model call, sent to ChromaDB in
+        one multi-query request and BM25-scored as one matrix product.
+
+        Returns:
+            One result list per query, same format as hybrid_search
+        """
+        queries = list(queries)
+        with metrics.span("hybrid_search", queries=len(queries), top_k=top_k) as span:
+            allowed = self._filter(filter_metadata)
+            if allowed is not None and not len(allowed):
+                return [[] for _ in queries]
+
+            candidate_k = candidate_k or self.candidate_k
+            dense = self.dense_search_batch(queries, top_k=candidate_k,
+                                            filter_metadata=filter_metadata, allowed=allowed)
+            sparse = self.sparse_search_batch(queries, top_k=candidate_k,
+                                              filter_metadata=filter_metadata, allowed=allowed)
+
+            results = [self._fuse(d, s, top_k, fusion) for d, s in zip(dense, sparse)]
+            count = sum(map(len, results))
+            span.set("results", count)
+        metrics.count("rag_results_total", count, stage="hybrid_search")
+        return results
+
+    async def ahybrid_search(self, query, top_k=5, filter_metadata=None, fusion=None,
+                             candidate_k=None):
+        """
+        hybrid_search for asyncio callers.
+
+        The ChromaDB query and BM25 scoring run concurrently in worker
+        threads, so latency is close to max(dense, sparse) instead of
+        their sum and the event loop stays free for other requests.
+        """
+        with metrics.span("hybrid_search", queries=1, top_k=top_k) as span:
+            allowed = self._filter(filter_metadata)
+            if allowed is not None and not len(allowed):
+                return []
+
+            candidate_k = candidate_k or self.candidate_k
+            # to_thread copies the context, so both searches join this trace
+            dense_scores, sparse_scores = await asyncio.gather(
+                asyncio.to_thread(self.dense_search, query, candidate_k, filter_metadata, allowed),
+                asyncio.to_thread(self.sparse_search, query, candidate_k, filter_metadata, allowed),
+            )
+
+            results = self._fuse(dense_scores, sparse_scores, top_k, fusion)
+            span.set("results", len(results))
+        metrics.count("rag_results_total", len(results), stage="hybrid_search")
+        return results
@@ -0,0 +1,44 @@
+# compliance_rag/tokens.py
+"""
+Prompt token counting.
+
+Uses tiktoken's cl100k_base encoding when tiktoken is installed (close
+to the Llama tokenizer Groq bills for on English text). Otherwise falls
+back to a regex estimate: one token per word or punctuation mark, plus
+one per 4 characters beyond the first 4 of a long word.
+
+The encoding is loaded on the first count, not at import: on a cold
+cache tiktoken downloads it, and importing rag must stay side-effect
+free.
+"""
+import re
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+_UNLOADED = object()
+_encoding = _UNLOADED
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is _UNLOADED:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:   # not installed, or no cached encoding offline
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text):
+    """Number of tokens in `text` (exact with tiktoken, estimated without)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(1 + max(0, len(piece) - 4) // 4 for piece in _WORD.findall(text))
+
+
+def token_counter_name():
+    return "tiktoken/cl100k_base" if _get_encoding() is not None else "regex estimate"
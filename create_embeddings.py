@@ -1,68 +1,225 @@
 # create_embeddings.py
-import pickle
-from pathlib import Path
-import chromadb
-from chromadb.utils import embedding_functions
+"""
+Create / update vector embeddings in ChromaDB.
+
+The collection is synced against the current chunks by stable chunk
+ID: chunks of deleted or changed PDFs are removed and only chunks that
+are not in the collection yet get embedded.
+
+Embedding is its own stage (compliance_rag.embedding_build): chunks are
+length-bucketed, encoded in large batches on all cores and written to a
+checkpoint in data/processed/embedding_checkpoint/. Then the vectors
+are upserted into ChromaDB in bulk. If the run is interrupted, running
+it again resumes from the checkpoint.
+
+    python create_embeddings.py            # incremental sync
+    python create_embeddings.py --full     # drop and re-embed everything
+    python create_embeddings.py --processes 4 --batch-size 256
+    python create_embeddings.py --embed-backend onnx \
+        --onnx-file onnx/model_qint8_avx512_vnni.onnx  # quantized ONNX model
 
-print("=" * 70)
-print("🧠 PHASE 2: CREATING VECTOR EMBEDDINGS")
-print("=" * 70)
+    # Also write a local dense index (dense search then skips ChromaDB)
+    python create_embeddings.py --dense-backend exact
+    python create_embeddings.py --dense-backend hnsw --hnsw-m 16 --hnsw-ef-search 64
+    python create_embeddings.py --dense-backend exact --quantization int8
+"""
+import argparse
+import time
 
-BASE_DIR = BASE_DIR = Path(__file__).parent
-PROCESSED_DIR = BASE_DIR / "data" / "processed"
-CHROMA_DIR = BASE_DIR / "data" / "chroma_db"
+import numpy as np
+
+import chromadb
+
+from compliance_rag.config import (
+    CHROMA_DIR,
+    COLLECTION_NAME,
+    DENSE_INDEX_DIR,
+    EMBED_BACKEND,
+    EMBED_BATCH_SIZE,
+    EMBEDDING_MODEL,
+    INSERT_BATCH_SIZE,
+)
+from compliance_rag.dense_index import DENSE_BACKENDS, build_dense_index
+from compliance_rag.embedding_build import EMBED_BACKENDS, bulk_upsert, embed_texts
+from compliance_rag.embeddings import LazyEmbeddingFunction
+from compliance_rag.index import corpus_fingerprint, load_chunks
+from compliance_rag.manifest import load_manifest
+from compliance_rag.quantization import QUANTIZATION_METHODS
 
-COLLECTION_NAME = "banking_compliance"
-EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # ✅ FIX
 BATCH_SIZE = 100
 
-print(f"\n📁 Using ChromaDB path: {CHROMA_DIR}")
 
-# Load chunks
-chunks_file = PROCESSED_DIR / "chunks.pkl"
-with open(chunks_file, "rb") as f:
-    chunks = pickle.load(f)
+def chunk_id(chunk, i):
+    # Chunks written before the manifest existed carry no stable ID
+    return chunk.get("chunk_id") or f"{chunk['source']}::chunk_{i}"
 
-print(f"✅ Loaded {len(chunks)} chunks")
 
-# Init Chroma
-client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+def collection_vectors(collection, chunks):
+    """Embeddings from the collection, row i = chunk i"""
+    wanted = {chunk_id(chunk, i): i for i, chunk in enumerate(chunks)}
+    result = collection.get(include=["embeddings"])
+    if not len(result['ids']):
+        raise RuntimeError(f"collection has 0 of {len(chunks)} chunk embeddings")
+    vectors = np.zeros((len(chunks), len(result['embeddings'][0])), dtype=np.float32)
+    found = 0
+    for cid, vector in zip(result['ids'], result['embeddings']):
+        i = wanted.get(cid)
+        if i is not None:
+            vectors[i] = vector
+            found += 1
+    if found != len(chunks):
+        raise RuntimeError(f"collection has {found} of {len(chunks)} chunk embeddings")
+    return vectors
 
-print("Loading embedding model (lightweight)...")
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name=EMBEDDING_MODEL
-)
-print("✅ Embedding model loaded")
 
-collection = client.get_or_create_collection(
-    name=COLLECTION_NAME,
-    embedding_function=embedding_fn
-)
+def write_dense_index(collection, chunks, args):
+    if not chunks:
+        print(f"\n⚠️ No chunks - skipping the {args.dense_backend} dense index")
+        return
+    quantized = f" ({args.quantization})" if args.quantization != "none" else ""
+    print(f"\n🧭 Building {args.dense_backend}{quantized} dense index in {DENSE_INDEX_DIR}")
+    index = build_dense_index(
+        collection_vectors(collection, chunks),
+        backend=args.dense_backend,
+        corpus_id=corpus_fingerprint(chunks),
+        quantization=args.quantization,
+        rescore_factor=args.rescore_factor,
+        M=args.hnsw_m,
+        ef_construction=args.hnsw_ef_construction,
+        ef_search=args.hnsw_ef_search,
+    )
+    print(f"✅ {len(index)} vectors, {index.nbytes() / 1e6:.1f} MB, "
+          f"built in {index.meta['build_seconds']:.1f}s {index.meta['params'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create vector embeddings")
+    parser.add_argument("--full", action="store_true",
+                        help="Delete the collection and re-embed every chunk")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help="Texts per model call (length-bucketed)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Encoding worker processes (default 1: one process, all cores)")
+    parser.add_argument("--embed-backend", choices=EMBED_BACKENDS, default=EMBED_BACKEND,
+                        help="sentence-transformers backend for the build")
+    parser.add_argument("--onnx-file", default=None,
+                        help="ONNX file in the model repo (e.g. a quantized variant)")
+    parser.add_argument("--insert-batch", type=int, default=INSERT_BATCH_SIZE,
+                        help="Precomputed vectors per ChromaDB upsert")
+    parser.add_argument("--dense-backend", choices=("chroma",) + DENSE_BACKENDS,
+                        default="chroma",
+                        help="Dense search backend: chroma (default) or a local "
+                             "exact / hnsw index written next to the chunk store")
+    parser.add_argument("--hnsw-m", type=int, default=None,
+                        help="HNSW links per node (default 16)")
+    parser.add_argument("--hnsw-ef-construction", type=int, default=None,
+                        help="HNSW build-time candidate list (default 200)")
+    parser.add_argument("--hnsw-ef-search", type=int, default=None,
+                        help="HNSW query-time candidate list (default 64)")
+    parser.add_argument("--quantization", choices=QUANTIZATION_METHODS, default="none",
+                        help="Store int8 or binary codes for the exact backend to save "
+                             "memory (float rows are only read to rescore candidates); "
+                             "int8 searches slower than the float32 scan")
+    parser.add_argument("--rescore-factor", type=int, default=None,
+                        help="Candidates rescored per result (default 4 int8, 10 binary)")
+    args = parser.parse_args()
+    if args.quantization != "none" and args.dense_backend != "exact":
+        parser.error("--quantization needs --dense-backend exact")
+
+    print("=" * 70)
+    print("🧠 PHASE 2: CREATING VECTOR EMBEDDINGS")
+    print("=" * 70)
+
+    print(f"\n📁 Using ChromaDB path: {CHROMA_DIR}")
+
+    # Load chunks
+    chunks = load_chunks()
+    print(f"✅ Loaded {len(chunks)} chunks")
 
-# Prepare data
-documents, metadatas, ids = [], [], []
-
-for i, chunk in enumerate(chunks):
-    documents.append(chunk["content"])
-    metadatas.append({
-        "source": chunk["source"],
-        "regulator": chunk["regulator"],
-        "jurisdiction": chunk["jurisdiction"],
-    })
-    ids.append(f"{chunk['source']}::chunk_{i}")
-
-# Insert
-for start in range(0, len(documents), BATCH_SIZE):
-    end = min(start + BATCH_SIZE, len(documents))
-    collection.add(
-        documents=documents[start:end],
-        metadatas=metadatas[start:end],
-        ids=ids[start:end]
+    changes = load_manifest().get('changes', {})
+    if changes:
+        print(f"   Manifest: {len(changes.get('added', []))} added, "
+              f"{len(changes.get('changed', []))} changed, "
+              f"{len(changes.get('removed', []))} removed PDFs")
+
+    # Init Chroma
+    client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+
+    # Vectors are computed by the embedding stage; the collection's own
+    # function only loads the model if something asks it to embed text
+    embedding_fn = LazyEmbeddingFunction(EMBEDDING_MODEL)
+
+    if args.full:
+        try:
+            client.delete_collection(COLLECTION_NAME)
+            print("🗑️  Deleted existing collection")
+        except Exception:
+            pass
+
+    collection = client.get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=embedding_fn
     )
-    print(f"✔ Indexed {end}/{len(documents)}")
 
-# Verify
-print("\nFINAL COUNT:", collection.count())
-print("COLLECTIONS:", client.list_collections())
+    # Diff current chunk IDs against the collection
+    wanted = {chunk_id(chunk, i): i for i, chunk in enumerate(chunks)}
+    existing = set(collection.get(include=[])['ids'])
+
+    stale = sorted(existing - set(wanted))
+    missing = [i for cid, i in wanted.items() if cid not in existing]
+
+    print(f"\n🔄 Sync plan: {len(missing)} to add, {len(stale)} to delete, "
+          f"{len(existing) - len(stale)} unchanged")
+
+    # Delete chunks of removed / changed PDFs
+    for start in range(0, len(stale), BATCH_SIZE):
+        collection.delete(ids=stale[start:start + BATCH_SIZE])
+    if stale:
+        print(f"🗑️  Deleted {len(stale)} stale chunks")
+
+    # Prepare data
+    documents, metadatas, ids = [], [], []
+
+    for i in missing:
+        chunk = chunks[i]
+        documents.append(chunk["content"])
+        metadatas.append({
+            "source": chunk["source"],
+            "regulator": chunk["regulator"],
+            "jurisdiction": chunk["jurisdiction"],
+        })
+        ids.append(chunk_id(chunk, i))
+
+    if documents:
+        # Embed (resumable), then insert the precomputed vectors
+        print(f"\n🧮 Embedding {len(documents)} chunks "
+              f"({args.embed_backend}, batch {args.batch_size}, {args.processes} process(es))...")
+        start = time.perf_counter()
+        checkpoint = embed_texts(
+            documents,
+            backend=args.embed_backend,
+            onnx_file=args.onnx_file,
+            batch_size=args.batch_size,
+            processes=args.processes,
+        )
+        seconds = time.perf_counter() - start
+        print(f"✅ Embedded {len(documents)} chunks in {seconds:.1f}s "
+              f"({len(documents) / seconds:.0f} chunks/s)")
+
+        max_batch = getattr(client, "get_max_batch_size", lambda: args.insert_batch)()
+        bulk_upsert(collection, ids, documents, metadatas, checkpoint.vectors,
+                    batch_size=min(args.insert_batch, max_batch))
+        checkpoint.remove()
+
+    # Verify
+    print("\nFINAL COUNT:", collection.count())
+    print("COLLECTIONS:", client.list_collections())
+
+    if args.dense_backend != "chroma":
+        write_dense_index(collection, chunks, args)
+
+    print("\n🎉 Embeddings created successfully")
+
 
-print("\n🎉 Embeddings created successfully")
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,21 @@
 # diagnose.py
-from pathlib import Path
-import pickle
+from compliance_rag.config import CHROMA_DIR, CHUNK_STORE_DIR
+from compliance_rag.index import load_chunks
 
 print("🔍 DIAGNOSING THE ISSUE...\n")
 
-BASE_DIR = BASE_DIR = Path(__file__).parent
-PROCESSED_DIR = BASE_DIR / "data" / "processed"
-CHROMA_DIR = BASE_DIR / "data" / "chroma_db"
-
-# Check 1: Chunks file
-chunks_file = PROCESSED_DIR / "chunks.pkl"
-print(f"1. Checking chunks file: {chunks_file}")
-if chunks_file.exists():
-    with open(chunks_file, "rb") as f:
-        chunks = pickle.load(f)
-    print(f"   ✅ File exists")
-    print(f"   ✅ Contains {len(chunks)} chunks")
+# Check 1: Chunk store
+print(f"1. Checking chunk store: {CHUNK_STORE_DIR}")
+try:
+    chunks = load_chunks()
+    print(f"   ✅ Store exists")
+    print(f"   ✅ Contains {len(chunks)} chunks ({chunks.nbytes() / 1e6:.1f} MB on disk)")
+    print(f"   Columns: {', '.join(f'{name} ({kind})' for name, kind in chunks.kinds.items())}")
     print(f"\n   Sample chunk:")
     print(f"   Source: {chunks[0]['source']}")
     print(f"   Content length: {len(chunks[0]['content'])} chars")
-else:
-    print(f"   ❌ File NOT found!")
+except FileNotFoundError:
+    print(f"   ❌ Store NOT found (and no chunks.pkl to migrate)!")
 
 # Check 2: ChromaDB directory
 print(f"\n2. Checking ChromaDB directory: {CHROMA_DIR}")
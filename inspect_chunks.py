@@ -1,12 +1,7 @@
 # inspect_chunks.py
-import pickle
-from pathlib import Path
+from compliance_rag.index import load_chunks
 
-BASE_DIR = BASE_DIR = Path(__file__).parent
-CHUNKS_FILE = BASE_DIR / "data" / "processed" / "chunks.pkl"
-
-with open(CHUNKS_FILE, "rb") as f:
-    chunks = pickle.load(f)
+chunks = load_chunks()
 
 print(f"Total chunks loaded: {len(chunks)}")
 
@@ -17,7 +12,12 @@ for i, chunk in enumerate(chunks[:3], 1):
     print("=" * 80)
     print(f"Source      : {chunk['source']}")
     print(f"Regulator   : {chunk['regulator']}")
-    print(f"Section     : {chunk['section_title']}")
-    print(f"Chunk index : {chunk['chunk_in_section']} / {chunk['total_section_chunks']}")
+    # Window-chunked stores (process_pdfs.py --chunker window) have no sections
+    if 'section_title' in chunk:
+        print(f"Section     : {chunk['section_title'] or '(front matter)'}")
+        print(f"Chunk index : {chunk['chunk_in_section']} / {chunk['total_section_chunks']}")
+    else:
+        print(f"Section     : -")
+        print(f"Chunk index : {chunk.get('chunk_number')} / {chunk.get('total_chunks')}")
     print("\n--- CONTENT PREVIEW ---\n")
     print(chunk["content"][:800])
@@ -1,186 +1,306 @@
-# process_pdfs_fast.py
-import re
-import pickle
-from pathlib import Path
+# process_pdfs.py
+"""
+PDF text extraction & chunking.
+
+Only PDFs that were added or changed since the last run (per the
+content-hash manifest) are extracted; chunks of unchanged PDFs are
+carried over and chunks of deleted PDFs are dropped.
+
+    python process_pdfs.py                 # incremental, every core
+    python process_pdfs.py --full          # re-extract everything
+    python process_pdfs.py --workers 1     # sequential
+    python process_pdfs.py --pages-per-task 25
+    python process_pdfs.py --chunker window   # old 1,500-character windows
+    python process_pdfs.py --no-dedup         # keep near-duplicate chunks
+
+Running headers / footers are stripped from every page before chunking,
+and near-duplicate chunks across the corpus are collapsed into one
+canonical chunk listing all of its sources (compliance_rag.dedup). The
+chunks before de-duplication are kept in chunk_store_raw/, so
+incremental runs de-duplicate the whole corpus again.
+
+Switching chunkers (or --keep-furniture) re-chunks every PDF; the
+manifest records the settings that produced each file's chunks.
+"""
+import argparse
+import json
 import sys
+import time
 
-try:
-    from pypdf import PdfReader
-except ImportError:
-    from PyPDF2 import PdfReader
-
-# ============================================================
-# CONFIGURATION
-# ============================================================
-BASE_DIR = Path(__file__).parent
-DATA_DIR = BASE_DIR / "data"
-PROCESSED_DIR = DATA_DIR / "processed"
-
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-
-CHUNK_SIZE = 1500  # Characters per chunk
-OVERLAP = 200      # Overlap between chunks
-
-# ============================================================
-# UTILITY FUNCTIONS
-# ============================================================
-def detect_regulator(filename: str):
-    f = filename.lower()
-    if "rbi" in f:
-        return "Reserve Bank of India", "India"
-    if "fatf" in f:
-        return "FATF", "International"
-    if "basel" in f:
-        return "Basel Committee", "International"
-    if "uae" in f or "cbuae" in f:
-        return "UAE Central Bank", "UAE"
-    return "Unknown", "Unknown"
-
-
-def extract_text_fast(pdf_path: Path):
-    """Fast text extraction"""
-    print(f"   → Reading PDF...", end="", flush=True)
-    
-    try:
-        reader = PdfReader(pdf_path, strict=False)
-        total_pages = len(reader.pages)
-        print(f" {total_pages} pages")
-        
-        full_text = ""
-        for i, page in enumerate(reader.pages):
-            if i % 25 == 0 and i > 0:
-                print(f"      Progress: {i}/{total_pages} pages", flush=True)
-            
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n\n"
-        
-        print(f"   → ✅ Extracted {len(full_text):,} characters")
-        return full_text
-        
-    except Exception as e:
-        print(f"\n   ❌ ERROR: {e}")
-        return ""
-
-
-def simple_chunk(text, chunk_size=CHUNK_SIZE, overlap=OVERLAP):
-    """Simple sliding window chunking"""
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        
-        if len(chunk.strip()) > 100:  # Only add non-empty chunks
-            chunks.append(chunk.strip())
-        
-        start += (chunk_size - overlap)
-    
-    return chunks
-
-
-# ============================================================
-# MAIN PIPELINE
-# ============================================================
-print("=" * 70)
-print("📄 FAST PDF PROCESSING")
-print("=" * 70)
-
-print(f"\n📁 Looking for PDFs in: {DATA_DIR}")
-pdf_files = list(DATA_DIR.glob("*.pdf"))
-
-if not pdf_files:
-    print(f"\n❌ No PDF files found")
-    sys.exit(1)
-
-print(f"\n✅ Found {len(pdf_files)} PDFs:")
-for i, pdf in enumerate(pdf_files, 1):
-    size_mb = pdf.stat().st_size / (1024 * 1024)
-    print(f"   {i}. {pdf.name} ({size_mb:.2f} MB)")
-
-print("\n" + "=" * 70)
-print("PROCESSING")
-print("=" * 70)
-
-all_chunks = []
-
-for file_num, pdf_path in enumerate(pdf_files, 1):
-    print(f"\n[{file_num}/{len(pdf_files)}] 📘 {pdf_path.name}")
-    
+from compliance_rag.chunk_store import ChunkStore, write_chunk_store
+from compliance_rag.config import (
+    CHUNK_STORE_DIR,
+    DATA_DIR,
+    DEDUP_REPORT_FILE,
+    MANIFEST_FILE,
+    PROCESSED_DIR,
+    RAW_CHUNK_STORE_DIR,
+)
+from compliance_rag.dedup import DEDUP_THRESHOLD, deduplicate_chunks, iter_strip_page_furniture
+from compliance_rag.index import load_chunks
+from compliance_rag.ingest import (
+    CHUNKERS,
+    DEFAULT_CHUNKER,
+    PAGES_PER_TASK,
+    chunk_document,
+    detect_regulator,
+    iter_extracted,
+    iter_pages_with_progress,
+    make_chunks,
+)
+from compliance_rag.manifest import diff_files, file_sha256, load_manifest, save_manifest
+
+
+def write_summary(summary_file, pdf_files, all_chunks, dedup_report=None):
+    with open(summary_file, "w", encoding="utf-8") as f:
+        f.write(f"Total PDFs: {len(pdf_files)}\n")
+        f.write(f"Total chunks: {len(all_chunks)}\n\n")
+
+        f.write("Chunks by Source:\n")
+        sources = {}
+        for c in all_chunks:
+            sources[c["source"]] = sources.get(c["source"], 0) + 1
+
+        for source, count in sorted(sources.items()):
+            f.write(f"{source}: {count} chunks\n")
+
+        f.write("\nChunks by Regulator:\n")
+        regulators = {}
+        for c in all_chunks:
+            regulators[c["regulator"]] = regulators.get(c["regulator"], 0) + 1
+
+        for r, count in sorted(regulators.items()):
+            f.write(f"{r}: {count} chunks\n")
+
+        if dedup_report:
+            f.write("\nDuplicates removed by Source:\n")
+            for source, stats in sorted(dedup_report.items()):
+                f.write(f"{source}: {stats['removed']} of {stats['chunks']} chunks, "
+                        f"{stats['furniture_lines']} furniture lines stripped\n")
+
+
+def print_dedup_report(report):
+    print(f"\n{'source':<40} {'chunks':>7} {'removed':>8} {'kept':>6} {'furniture':>10}")
+    for source, stats in report.items():
+        print(f"{source[:40]:<40} {stats['chunks']:>7} {stats['removed']:>8} "
+              f"{stats['kept']:>6} {stats['furniture_lines']:>10}")
+    total = sum(stats['chunks'] for stats in report.values())
+    removed = sum(stats['removed'] for stats in report.values())
+    print(f"{'TOTAL':<40} {total:>7} {removed:>8} {total - removed:>6} "
+          f"{sum(stats['furniture_lines'] for stats in report.values()):>10}")
+
+
+def load_previous_chunks(full):
+    """Chunks of the last run grouped by source ({} when not reusable)"""
+    if full:
+        return {}
     try:
-        regulator, jurisdiction = detect_regulator(pdf_path.name)
-        print(f"   → Regulator: {regulator}")
-        
-        # Extract text
-        full_text = extract_text_fast(pdf_path)
+        # Carry over chunks from before de-duplication: a duplicate dropped
+        # last time may be the only copy left once the other file changes
+        if (RAW_CHUNK_STORE_DIR / "meta.json").exists():
+            chunks = ChunkStore(RAW_CHUNK_STORE_DIR)
+        else:
+            chunks = load_chunks()
+    except FileNotFoundError:
+        return {}
+    # Chunks written before the manifest existed have no stable IDs
+    if "chunk_id" not in chunks.fields:
+        chunks.close()
+        return {}
+    by_source = {}
+    for c in chunks:
+        by_source.setdefault(c["source"], []).append(c)
+    chunks.close()
+    return by_source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract and chunk regulatory PDFs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: all cores, 1 = sequential)")
+    parser.add_argument("--pages-per-task", type=int, default=PAGES_PER_TASK,
+                        help="Pages per extraction task; large PDFs are split into ranges")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-extract every PDF")
+    parser.add_argument("--chunker", choices=CHUNKERS, default=DEFAULT_CHUNKER,
+                        help="structured: section/sentence-aware, token-budgeted chunks; "
+                             "window: 1,500-character sliding window")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Keep near-duplicate chunks")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Estimated Jaccard similarity above which chunks are merged")
+    parser.add_argument("--keep-furniture", action="store_true",
+                        help="Do not strip repeated page headers / footers")
+    args = parser.parse_args()
+    strip_furniture = not args.keep_furniture
+
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+    print("=" * 70)
+    print("📄 FAST PDF PROCESSING")
+    print("=" * 70)
+    print(f"   Chunker: {args.chunker}")
+
+    print(f"\n📁 Looking for PDFs in: {DATA_DIR}")
+    # Sorted so chunk order never depends on directory listing order
+    pdf_files = sorted(DATA_DIR.glob("*.pdf"))
+
+    if not pdf_files:
+        print(f"\n❌ No PDF files found")
+        sys.exit(1)
+
+    print(f"\n✅ Found {len(pdf_files)} PDFs:")
+    for i, pdf in enumerate(pdf_files, 1):
+        size_mb = pdf.stat().st_size / (1024 * 1024)
+        regulator, _ = detect_regulator(pdf.name)
+        print(f"   {i}. {pdf.name} ({size_mb:.2f} MB) - {regulator}")
 
-        if not full_text or len(full_text) < 100:
+    # ============================================================
+    # DETECT CHANGES
+    # ============================================================
+    print("\n🔎 Hashing PDFs...")
+    hashes = {pdf.name: file_sha256(pdf) for pdf in pdf_files}
+    previous_chunks = load_previous_chunks(args.full)
+    previous_files = load_manifest()['files']
+    changes = diff_files(hashes, previous_files)
+
+    # Unchanged files whose chunks are not reusable (--full, old pickle,
+    # other chunker) are re-extracted
+    for name in list(changes['unchanged']):
+        previous = previous_files[name]
+        reusable = (name in previous_chunks or not previous.get('num_chunks'))
+        if (not reusable or previous.get('chunker', "window") != args.chunker
+                or previous.get('strip_furniture', False) != strip_furniture):
+            changes['unchanged'].remove(name)
+            changes['changed'].append(name)
+
+    for kind in ('added', 'changed', 'removed', 'unchanged'):
+        print(f"   {kind.capitalize():<10}: {len(changes[kind])}")
+
+    to_extract = [pdf for pdf in pdf_files if pdf.name not in changes['unchanged']]
+
+    print("\n" + "=" * 70)
+    print("PROCESSING")
+    print("=" * 70)
+
+    started = time.perf_counter()
+    progress = lambda line: print(line, flush=True)
+    if args.workers == 1:
+        # Pages are read lazily while they are chunked
+        pages = [iter_pages_with_progress(pdf, args.pages_per_task, progress)
+                 for pdf in to_extract]
+    else:
+        # Pages are chunked as soon as the pool has extracted them
+        pages = iter_extracted(
+            to_extract,
+            workers=args.workers,
+            pages_per_task=args.pages_per_task,
+            progress=progress,
+        )
+
+    new_chunks, failed, furniture = {}, set(), {}
+    for pdf_path, page_texts in zip(to_extract, pages):
+        print(f"\n📘 {pdf_path.name}")
+
+        try:
+            if page_texts is None:
+                raise RuntimeError("page extraction failed")
+            stripped = {}
+            if strip_furniture:
+                page_texts = iter_strip_page_furniture(page_texts, stripped)
+            text_chunks = chunk_document(page_texts, args.chunker)
+            furniture[pdf_path.name] = stripped.get('lines', 0)
+        except Exception as e:
+            print(f"   ⚠️ SKIPPED: {e} (will be retried next run)")
+            failed.add(pdf_path.name)
+            continue
+
+        if not text_chunks:
             print("   ⚠️ SKIPPED: No text extracted")
             continue
 
-        # Create chunks
-        print(f"   → Chunking...", flush=True)
-        text_chunks = simple_chunk(full_text)
-        
-        # Add metadata
-        for i, chunk_text in enumerate(text_chunks, 1):
-            all_chunks.append({
-                "content": chunk_text,
-                "source": pdf_path.name,
-                "regulator": regulator,
-                "jurisdiction": jurisdiction,
-                "chunk_number": i,
-                "total_chunks": len(text_chunks)
-            })
-
-        print(f"   → ✅ Created {len(text_chunks)} chunks")
-
-    except Exception as e:
-        print(f"   ❌ ERROR: {e}")
-        import traceback
-        traceback.print_exc()
-        continue
-
-# ============================================================
-# SAVE OUTPUT
-# ============================================================
-print("\n" + "=" * 70)
-print("💾 SAVING")
-print("=" * 70)
-
-chunks_file = PROCESSED_DIR / "chunks.pkl"
-with open(chunks_file, "wb") as f:
-    pickle.dump(all_chunks, f)
-
-summary_file = PROCESSED_DIR / "summary.txt"
-with open(summary_file, "w", encoding="utf-8") as f:
-    f.write(f"Total PDFs: {len(pdf_files)}\n")
-    f.write(f"Total chunks: {len(all_chunks)}\n\n")
-    
-    f.write("Chunks by Source:\n")
-    sources = {}
-    for c in all_chunks:
-        sources[c["source"]] = sources.get(c["source"], 0) + 1
-    
-    for source, count in sorted(sources.items()):
-        f.write(f"{source}: {count} chunks\n")
-    
-    f.write("\nChunks by Regulator:\n")
-    regulators = {}
-    for c in all_chunks:
-        regulators[c["regulator"]] = regulators.get(c["regulator"], 0) + 1
-    
-    for r, count in sorted(regulators.items()):
-        f.write(f"{r}: {count} chunks\n")
-
-print(f"\n✅ Saved to: {chunks_file}")
-print(f"✅ Summary: {summary_file}")
-
-print("\n" + "=" * 70)
-print("✅ COMPLETE!")
-print("=" * 70)
-print(f"📦 Total chunks: {len(all_chunks)}")
-print(f"📊 Average per PDF: {len(all_chunks)//len(pdf_files)}")
-print("\n🚀 READY FOR PHASE 2")
-print("=" * 70)
\ No newline at end of file
+        new_chunks[pdf_path.name] = make_chunks(
+            pdf_path, text_chunks, hashes[pdf_path.name], args.chunker
+        )
+        print(f"   → ✅ Created {len(text_chunks)} chunks"
+              + (f" ({furniture[pdf_path.name]} header/footer lines stripped)"
+                 if furniture.get(pdf_path.name) else ""))
+
+    if to_extract:
+        print(f"\n   → ✅ Extracted and chunked {len(to_extract)} PDFs "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    # Reassemble in file order: carried-over chunks + freshly extracted ones
+    all_chunks = []
+    files = {}
+    for pdf_path in pdf_files:
+        name = pdf_path.name
+        if name in changes['unchanged']:
+            file_chunks = previous_chunks.get(name, [])
+        else:
+            file_chunks = new_chunks.get(name, [])
+        all_chunks.extend(file_chunks)
+        if name in failed:
+            # Left out of the manifest so the next run retries it
+            continue
+        files[name] = {
+            'sha256': hashes[name],
+            'size': pdf_path.stat().st_size,
+            'num_chunks': len(file_chunks),
+            'chunker': args.chunker,
+            'strip_furniture': strip_furniture,
+            'furniture_lines': (previous_files[name].get('furniture_lines', 0)
+                                if name in changes['unchanged'] else furniture.get(name, 0)),
+        }
+
+    # ============================================================
+    # DE-DUPLICATE
+    # ============================================================
+    raw_chunks, dedup_report = all_chunks, None
+    if not args.no_dedup:
+        print("\n" + "=" * 70)
+        print("🧬 DE-DUPLICATING")
+        print("=" * 70)
+        dedup_started = time.perf_counter()
+        all_chunks, dedup_report = deduplicate_chunks(raw_chunks, args.dedup_threshold)
+        for source, stats in dedup_report.items():
+            stats['furniture_lines'] = files.get(source, {}).get('furniture_lines', 0)
+        print_dedup_report(dedup_report)
+        print(f"\n   → ✅ {len(raw_chunks) - len(all_chunks)} near-duplicate chunks removed "
+              f"in {time.perf_counter() - dedup_started:.1f}s")
+
+    # ============================================================
+    # SAVE OUTPUT
+    # ============================================================
+    print("\n" + "=" * 70)
+    print("💾 SAVING")
+    print("=" * 70)
+
+    write_chunk_store(raw_chunks, RAW_CHUNK_STORE_DIR)
+    write_chunk_store(all_chunks, CHUNK_STORE_DIR)
+
+    save_manifest(files, changes)
+
+    if dedup_report is not None:
+        with open(DEDUP_REPORT_FILE, "w", encoding="utf-8") as f:
+            json.dump(dedup_report, f, indent=2, sort_keys=True)
+
+    summary_file = PROCESSED_DIR / "summary.txt"
+    write_summary(summary_file, pdf_files, all_chunks, dedup_report)
+
+    print(f"\n✅ Saved to: {CHUNK_STORE_DIR}")
+    print(f"✅ Manifest: {MANIFEST_FILE}")
+    print(f"✅ Summary: {summary_file}")
+
+    print("\n" + "=" * 70)
+    print("✅ COMPLETE!")
+    print("=" * 70)
+    print(f"📦 Total chunks: {len(all_chunks)}")
+    print(f"📊 Average per PDF: {len(all_chunks)//len(pdf_files)}")
+    print(f"⏱️  Total time: {time.perf_counter() - started:.1f}s")
+    print("\n🚀 READY FOR PHASE 2")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
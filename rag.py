@@ -1,106 +1,52 @@
-# rag_pipeline_groq.py
+# rag.py
+import asyncio
 import os
-import pickle
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from dotenv import load_dotenv
-import chromadb
 
 # LangChain imports
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
+
+from compliance_rag import metrics
+from compliance_rag.answer_cache import AnswerCache, retrieval_fingerprint, text_hash
+from compliance_rag.context import pack_context
+from compliance_rag.config import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL_SECONDS,
+    CONTEXT_PACKING,
+    CONTEXT_TOKEN_BUDGET,
+    LLM_BACKEND,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+)
+from compliance_rag.llm import create_llm
+from compliance_rag.resources import ResourceManager
+from compliance_rag.tokens import count_tokens
 
 # Load environment variables
 load_dotenv()
 
-print("=" * 70)
-print("🤖 PHASE 3: RAG PIPELINE WITH GROQ (FREE!)")
-print("=" * 70)
-
 # ============================================================
 # CONFIGURATION
 # ============================================================
-BASE_DIR = BASE_DIR = Path(__file__).parent
-PROCESSED_DIR = BASE_DIR / "data" / "processed"
-CHROMA_DIR = BASE_DIR / "data" / "chroma_db"
-
 # Groq Configuration
 GROQ_MODEL = "llama-3.3-70b-versatile"  # Free, high quality
 TEMPERATURE = 0.1
 MAX_TOKENS = 2000
+LLM_MAX_CONCURRENCY = 4  # parallel LLM calls in rag_query_batch
 
-# ============================================================
-# STEP 1: LOAD HYBRID RETRIEVER
-# ============================================================
-print("\n📂 STEP 1: Loading retriever components...")
-
-chunks_file = PROCESSED_DIR / "chunks.pkl"
-with open(chunks_file, "rb") as f:
-    chunks = pickle.load(f)
-print(f"✅ Loaded {len(chunks)} chunks")
-
-bm25_file = PROCESSED_DIR / "bm25_index.pkl"
-with open(bm25_file, "rb") as f:
-    bm25 = pickle.load(f)
-print(f"✅ Loaded BM25 index")
-
-client = chromadb.PersistentClient(path=str(CHROMA_DIR))
-collection = client.get_collection(name="banking_compliance")
-print(f"✅ Connected to ChromaDB ({collection.count()} vectors)")
-
-# ============================================================
-# STEP 2: IMPORT HYBRID RETRIEVER
-# ============================================================
-print("\n🔧 STEP 2: Initializing Hybrid Retriever...")
-
-import sys
-sys.path.append(str(BASE_DIR))
-
-from hybrid_search import HybridRetriever
-
-retriever = HybridRetriever(
-    collection=collection,
-    bm25=bm25,
-    chunks=chunks,
-    alpha=0.5
-)
-
-print("✅ Hybrid Retriever ready")
-
-# ============================================================
-# STEP 3: INITIALIZE GROQ (FREE!)
-# ============================================================
-print("\n🤖 STEP 3: Initializing Groq (FREE API)...")
-
-api_key = "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"
-
-if not api_key or api_key == "your_groq_key_here":
-    print("❌ ERROR: No Groq API key found!")
-    print("\n📝 Steps to fix:")
-    print("   1. Get FREE API key at: https://console.groq.com/")
-    print("   2. Add to .env file: GROQ_API_KEY=gsk-your-key-here")
-    print("   3. Re-run this script")
-    llm = None
-else:
-    try:
-        llm = ChatGroq(
-            model=GROQ_MODEL,
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS,
-            api_key=api_key
-        )
-        print(f"✅ Groq initialized successfully!")
-        print(f"   Model: {GROQ_MODEL} (FREE)")
-        print(f"   Status: Unlimited free tier!")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        llm = None
+# The backend (groq / stub / none) comes from RAG_LLM_BACKEND, see
+# compliance_rag.llm
+NO_API_KEY_ANSWER = "[No API key - Add Groq key to .env file]"
+RETRIEVAL_ONLY_ANSWER = "[Retrieval-only mode - no answer generated]"
 
 # ============================================================
-# STEP 4: CREATE RAG PROMPT
+# RAG PROMPT
 # ============================================================
-print("\n📝 STEP 4: Creating RAG prompt template...")
-
-RAG_PROMPT = ChatPromptTemplate.from_template("""
+RAG_TEMPLATE = """
 You are a senior banking compliance advisor. Provide precise, professional answers about banking regulations, loan policies, KYC/AML compliance, Basel liquidity standards and FATF AML/CFT guidelines. Provide precise, professional answers.
 
 CONTEXT FROM REGULATORY DOCUMENTS:
@@ -124,16 +70,112 @@ GUIDELINES:
 - If information is insufficient, state it briefly
 
 CONCISE PROFESSIONAL ANSWER (80-120 words):
-""")
-
-print("✅ Prompt template created")
+"""
+
+RAG_PROMPT = ChatPromptTemplate.from_template(RAG_TEMPLATE)
+# Packing settings change the context, so they are part of the prompt identity
+PROMPT_HASH = text_hash(f"{RAG_TEMPLATE}|{CONTEXT_PACKING}|{CONTEXT_TOKEN_BUDGET}")
+
+# Answers are reused when the question, retrieved chunks, prompt, model
+# and temperature all match (or the question is a near-duplicate).
+ANSWER_CACHE = AnswerCache(
+    max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+    similarity_threshold=ANSWER_CACHE_SIMILARITY,
+)
 
 # ============================================================
-# STEP 5: CREATE RAG CHAIN
+# LAZY RESOURCES
 # ============================================================
-print("\n🔗 STEP 5: Building RAG chain...")
+# The retriever and the LLM client are created on first use so that
+# importing this module (app.py, test scripts, workers) stays cheap.
+# RESOURCES holds them once per process and is shared by all threads
+# and Streamlit sessions (see compliance_rag.resources).
+def get_retriever():
+    """Load the hybrid retriever from prebuilt artifacts (once)"""
+    return RESOURCES.retriever
+
+
+def get_llm():
+    """
+    Create the LLM client for RAG_LLM_BACKEND (once).
+
+    Returns None in retrieval-only mode or without a Groq API key.
+    """
+    return RESOURCES.llm
+
+
+def set_llm(llm):
+    """Replace the LLM client, e.g. with compliance_rag.llm.StubLLM for load tests"""
+    RESOURCES.set_llm(llm)
+
+
+def reload_index():
+    """Swap in a freshly loaded index without restarting the process"""
+    return RESOURCES.reload()
+
+def _create_groq():
+    api_key = os.getenv("GROQ_API_KEY")
+
+    if not api_key or api_key in ("your_groq_key_here", "your_groq_api_key_here"):
+        print("❌ ERROR: No Groq API key found!")
+        print("\n📝 Steps to fix:")
+        print("   1. Get FREE API key at: https://console.groq.com/")
+        print("   2. Add to .env file: GROQ_API_KEY=gsk-your-key-here")
+        return None
+
+    try:
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(
+            model=GROQ_MODEL,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            api_key=api_key
+        )
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return None
+
+def _create_llm():
+    return create_llm(LLM_BACKEND, groq_factory=_create_groq)
+
+RESOURCES = ResourceManager(llm_factory=_create_llm)
+
+def _cache_samples():
+    """Cache hit / miss counters, read when metrics are exported"""
+    caches = {'answer': ANSWER_CACHE.stats(), **RESOURCES.cache_stats()}
+    samples = []
+    for name, stats in caches.items():
+        hits = stats['hits'] + stats.get('near_hits', 0)
+        samples.append(("rag_cache_hits_total", {'cache': name}, hits))
+        samples.append(("rag_cache_misses_total", {'cache': name}, stats['misses']))
+    return samples
+
+metrics.add_collector(_cache_samples)
 
-def format_documents(docs):
+# ============================================================
+# RAG CHAIN
+# ============================================================
+def format_documents(docs, question="", token_budget=CONTEXT_TOKEN_BUDGET,
+                     pack=CONTEXT_PACKING):
+    """
+    Prompt context for the retrieved docs.
+
+    Args:
+        question: Used to keep the most relevant sentences when packing
+        token_budget: Max context tokens when packing (None = no limit)
+        pack: Merge neighbouring chunks and drop repeated text
+            (compliance_rag.context); False = one full block per chunk
+    """
+    with metrics.span("format_documents", docs=len(docs), packed=bool(pack)) as span:
+        if pack:
+            context, stats = pack_context(docs, question, token_budget)
+            span.set("context_tokens", stats['tokens'])
+            return context
+        return _format_blocks(docs)
+
+def _format_blocks(docs):
     formatted = []
     for i, doc in enumerate(docs, 1):
         formatted.append(f"""
@@ -148,15 +190,163 @@ Content:
 """)
     return "\n".join(formatted)
 
-def rag_query(question, top_k=3, filter_metadata=None):
-    print(f"\n🔍 Retrieving relevant documents...")
+def _messages(question, retrieved_docs):
+    return RAG_PROMPT.format_messages(
+        context=format_documents(retrieved_docs, question),
+        question=question
+    )
+
+def _usage(messages=None, answer="", usage_metadata=None):
+    """
+    Input / output tokens of one LLM call.
+
+    Taken from the response's usage_metadata when the client reports
+    it, otherwise counted locally ('estimated': True). No call (cached
+    or missing LLM) reports zeros.
+    """
+    if messages is None:
+        return {'input_tokens': 0, 'output_tokens': 0, 'estimated': False}
+    if usage_metadata:
+        return {
+            'input_tokens': usage_metadata.get('input_tokens', 0),
+            'output_tokens': usage_metadata.get('output_tokens', 0),
+            'estimated': False,
+        }
+    prompt = "\n".join(str(message.content) for message in messages)
+    return {
+        'input_tokens': count_tokens(prompt),
+        'output_tokens': count_tokens(answer),
+        'estimated': True,
+    }
+
+def _model_name(llm):
+    return getattr(llm, 'model_name', GROQ_MODEL)
+
+def _invoke(llm, messages):
+    """Blocking LLM call -> (answer, usage), timed as the "llm" stage"""
+    model = _model_name(llm)
+    with metrics.span("llm", model=model) as span:
+        response = llm.invoke(messages)
+        answer = response.content
+        usage = _usage(messages, answer, getattr(response, 'usage_metadata', None))
+        span.set("input_tokens", usage['input_tokens'])
+        span.set("output_tokens", usage['output_tokens'])
+    _record_usage(usage, model)
+    return answer, usage
+
+def _record_usage(usage, model):
+    metrics.count("rag_llm_tokens_total", usage['input_tokens'], kind="prompt", model=model)
+    metrics.count("rag_llm_tokens_total", usage['output_tokens'], kind="completion", model=model)
+
+def rag_query(question, top_k=3, filter_metadata=None, use_cache=True, rerank=None):
+    """
+    Args:
+        rerank: Rerank RERANK_CANDIDATES hybrid results with the
+            cross-encoder and keep the best top_k (default: RERANK_ENABLED)
+    """
+    with metrics.span("rag_query", top_k=top_k):
+        print(f"\n🔍 Retrieving relevant documents...")
+        
+        retriever, retrieved_docs = _retrieve(question, top_k, filter_metadata, rerank)
+        
+        return _answer(question, retriever, retrieved_docs, use_cache)
+
+def rag_query_batch(questions, top_k=3, filter_metadata=None, use_cache=True,
+                    max_concurrency=LLM_MAX_CONCURRENCY, rerank=None):
+    """
+    rag_query for many questions.
+
+    Retrieval runs as one batch (one embedding call, one ChromaDB query,
+    one BM25 matrix product); LLM calls run on at most
+    `max_concurrency` threads. Returns results in question order.
+    """
+    questions = list(questions)
+    print(f"\n🔍 Retrieving documents for {len(questions)} questions...")
+    
+    retriever = get_retriever()
+    rerank = RERANK_ENABLED if rerank is None else rerank
+    all_docs = retriever.hybrid_search_batch(
+        questions,
+        top_k=max(top_k, RERANK_CANDIDATES) if rerank else top_k,
+        filter_metadata=filter_metadata
+    )
+    if rerank:
+        reranker = RESOURCES.reranker
+        with metrics.span("rerank", queries=len(questions)):
+            all_docs = [reranker.rerank(q, docs, top_k) for q, docs in zip(questions, all_docs)]
+    get_llm()  # create the client once, before fanning out
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        return list(pool.map(
+            lambda item: _answer(item[0], retriever, item[1], use_cache),
+            zip(questions, all_docs)
+        ))
+
+def _retrieve(question, top_k, filter_metadata, rerank):
+    """hybrid_search, optionally followed by cross-encoder reranking"""
+    retriever = get_retriever()
+    if rerank is None:
+        rerank = RERANK_ENABLED
+    if not rerank:
+        return retriever, retriever.hybrid_search(
+            query=question,
+            top_k=top_k,
+            filter_metadata=filter_metadata
+        )
     
-    retrieved_docs = retriever.hybrid_search(
+    candidates = retriever.hybrid_search(
         query=question,
-        top_k=top_k,
+        top_k=max(top_k, RERANK_CANDIDATES),
         filter_metadata=filter_metadata
     )
+    with metrics.span("rerank", candidates=len(candidates)):
+        return retriever, RESOURCES.reranker.rerank(question, candidates, top_k)
+
+def _without_llm(question, retrieved_docs):
+    """
+    (answer, usage) when there is no LLM client.
+
+    In retrieval-only mode the prompt is still built and counted, so
+    offline runs measure the whole path up to the LLM call.
+    """
+    if LLM_BACKEND != "none":
+        return NO_API_KEY_ANSWER, _usage()
+    return RETRIEVAL_ONLY_ANSWER, _usage(_messages(question, retrieved_docs), "")
+
+def _sources(retrieved_docs):
+    return [
+        {
+            'source': doc['source'],
+            'regulator': doc['regulator'],
+            'score': doc['score']
+        }
+        for doc in retrieved_docs
+    ]
+
+def _cache_lookup(question, retriever, retrieved_docs, llm, use_cache):
+    """
+    Answer cache lookup (skipped without an LLM - nothing to save).
+
+    Returns:
+        (fingerprint, query_embedding, cached_answer)
+    """
+    if not use_cache or llm is None:
+        return None, None, None
     
+    ANSWER_CACHE.check_corpus(retriever.corpus_id)
+    fingerprint = retrieval_fingerprint(
+        [doc['chunk_index'] for doc in retrieved_docs],
+        PROMPT_HASH, _model_name(llm), TEMPERATURE,
+        corpus_id=retriever.corpus_id,
+    )
+    # The embedding is only needed to match differently worded questions
+    query_embedding = None
+    if ANSWER_CACHE.similarity_threshold is not None and retriever.embedding_cache is not None:
+        query_embedding = retriever.embedding_cache.embed(question)
+    return fingerprint, query_embedding, ANSWER_CACHE.get(question, fingerprint, query_embedding)
+
+def _answer(question, retriever, retrieved_docs, use_cache):
+    """Answer-cache lookup + LLM call for already retrieved documents"""
     if not retrieved_docs:
         return {
             'answer': "I couldn't find any relevant information.",
@@ -165,65 +355,222 @@ def rag_query(question, top_k=3, filter_metadata=None):
     
     print(f"✅ Retrieved {len(retrieved_docs)} documents")
     
-    context = format_documents(retrieved_docs)
+    sources = _sources(retrieved_docs)
+    llm = get_llm()
+    
+    fingerprint, query_embedding, cached_answer = _cache_lookup(
+        question, retriever, retrieved_docs, llm, use_cache
+    )
+    if cached_answer is not None:
+        print("✅ Answer served from cache")
+        return {'answer': cached_answer, 'sources': sources, 'cached': True,
+                'usage': _usage()}
     
     if llm is None:
-        answer = "[No API key - Add Groq key to .env file]"
+        answer, usage = _without_llm(question, retrieved_docs)
     else:
-        print(f"🤖 Generating answer with Groq (FREE!)...")
+        print(f"🤖 Generating answer with {_model_name(llm)}...")
         
-        messages = RAG_PROMPT.format_messages(
-            context=context,
-            question=question
-        )
+        messages = _messages(question, retrieved_docs)
         
-        response = llm.invoke(messages)
-        answer = response.content
-        print("✅ Answer generated")
+        answer, usage = _invoke(llm, messages)
+        print(f"✅ Answer generated ({usage['input_tokens']} tokens in, "
+              f"{usage['output_tokens']} out)")
+        
+        if fingerprint is not None:
+            ANSWER_CACHE.put(question, fingerprint, answer, query_embedding)
     
     return {
         'answer': answer,
-        'sources': [
-            {
-                'source': doc['source'],
-                'regulator': doc['regulator'],
-                'score': doc['score']
-            }
-            for doc in retrieved_docs
-        ]
+        'sources': sources,
+        'cached': False,
+        'usage': usage
     }
 
-print("✅ RAG chain ready")
+# ============================================================
+# STREAMING RAG
+# ============================================================
+def rag_query_stream(question, top_k=3, filter_metadata=None, use_cache=True, rerank=None):
+    """
+    rag_query as a stream of events, for progressive UIs.
+
+    Yields dicts in this order:
+        {'type': 'sources', 'sources': [...], 'retrieval_time': s}
+        {'type': 'token', 'text': '...'}            (zero or more)
+        {'type': 'done', 'answer': '...', 'sources': [...],
+         'cached': bool, 'timings': {'retrieval', 'ttft', 'total'},
+         'usage': {'input_tokens', 'output_tokens', 'estimated'}}
+
+    `ttft` (time to first token) and `total` are measured from the
+    start of the call.
+    """
+    started = time.perf_counter()
+    
+    retriever, retrieved_docs = _retrieve(question, top_k, filter_metadata, rerank)
+    retrieval_time = time.perf_counter() - started
+    
+    sources = _sources(retrieved_docs)
+    yield {'type': 'sources', 'sources': sources, 'retrieval_time': retrieval_time}
+    
+    ttft = None
+    cached = False
+    messages = None
+    usage = None
+    stream_usage = {}
+    llm = get_llm()
+    
+    if not retrieved_docs:
+        answer = "I couldn't find any relevant information."
+        pieces = [answer]
+    else:
+        fingerprint, query_embedding, cached_answer = _cache_lookup(
+            question, retriever, retrieved_docs, llm, use_cache
+        )
+        if cached_answer is not None:
+            answer, pieces, cached = cached_answer, [cached_answer], True
+        elif llm is None:
+            answer, usage = _without_llm(question, retrieved_docs)
+            pieces = [answer]
+        else:
+            messages = _messages(question, retrieved_docs)
+            llm_started = time.perf_counter()
+            pieces = _stream_text(llm.stream(messages), stream_usage)
+            answer = None
+    
+    parts = []
+    for text in pieces:
+        if not text:
+            continue
+        if ttft is None:
+            ttft = time.perf_counter() - started
+        parts.append(text)
+        yield {'type': 'token', 'text': text}
+    
+    if answer is None:
+        answer = "".join(parts)
+        if fingerprint is not None:
+            ANSWER_CACHE.put(question, fingerprint, answer, query_embedding)
+    if messages:
+        # A generator cannot hold a span across yields; time the stage directly
+        usage = _usage(messages, answer, stream_usage)
+        metrics.observe(metrics.STAGE_HISTOGRAM, time.perf_counter() - llm_started, stage="llm")
+        _record_usage(usage, _model_name(llm))
+    
+    total = time.perf_counter() - started
+    yield {
+        'type': 'done',
+        'answer': answer,
+        'sources': sources,
+        'cached': cached,
+        'timings': {
+            'retrieval': retrieval_time,
+            'ttft': ttft if ttft is not None else total,
+            'total': total,
+        },
+        'usage': usage or _usage(),
+    }
+
+def _stream_text(chunks, usage):
+    """Text of streamed message chunks; fills `usage` from usage_metadata"""
+    for chunk in chunks:
+        if getattr(chunk, 'usage_metadata', None):
+            usage.update(chunk.usage_metadata)
+        yield chunk.content
 
 # ============================================================
-# STEP 6: TEST
+# ASYNC RAG
 # ============================================================
-print("\n" + "=" * 70)
-print("🧪 TESTING RAG PIPELINE")
-print("=" * 70)
-
-test_questions = [
-    "What is the minimum CET1 capital adequacy ratio under Basel III?",
-    "What are the KYC requirements for opening a bank account?",
-]
-
-for i, question in enumerate(test_questions, 1):
-    print(f"\n{'='*70}")
-    print(f"❓ Question {i}: {question}")
-    print(f"{'='*70}")
-    
-    result = rag_query(question, top_k=3)
-    
-    print(f"\n💡 ANSWER:")
-    print(f"{result['answer']}")
-    
-    print(f"\n📚 SOURCES:")
-    for j, source in enumerate(result['sources'], 1):
-        print(f"   {j}. {source['source']} - Score: {source['score']:.3f}")
-
-print("\n" + "=" * 70)
-print("✅ PHASE 3 COMPLETE!")
-print("=" * 70)
-print("\n🎉 Using FREE Groq API - Unlimited queries!")
-print("🚀 Ready for Phase 4: Streamlit UI!")
-print("=" * 70)
\ No newline at end of file
+async def arag_query(question, top_k=3, filter_metadata=None, use_cache=True, rerank=None):
+    """
+    rag_query for asyncio servers.
+
+    Dense and sparse retrieval run concurrently (ahybrid_search) and the
+    LLM call uses the client's async API, so one process can keep many
+    questions in flight without a thread per request.
+    """
+    with metrics.span("rag_query", top_k=top_k):
+        return await _arag_query(question, top_k, filter_metadata, use_cache, rerank)
+
+async def _arag_query(question, top_k, filter_metadata, use_cache, rerank):
+    retriever = get_retriever()
+    rerank = RERANK_ENABLED if rerank is None else rerank
+    retrieved_docs = await retriever.ahybrid_search(
+        query=question,
+        top_k=max(top_k, RERANK_CANDIDATES) if rerank else top_k,
+        filter_metadata=filter_metadata
+    )
+    if rerank:
+        with metrics.span("rerank", candidates=len(retrieved_docs)):
+            retrieved_docs = await asyncio.to_thread(
+                RESOURCES.reranker.rerank, question, retrieved_docs, top_k
+            )
+    
+    if not retrieved_docs:
+        return {
+            'answer': "I couldn't find any relevant information.",
+            'sources': []
+        }
+    
+    sources = _sources(retrieved_docs)
+    llm = get_llm()
+    
+    fingerprint, query_embedding, cached_answer = _cache_lookup(
+        question, retriever, retrieved_docs, llm, use_cache
+    )
+    if cached_answer is not None:
+        return {'answer': cached_answer, 'sources': sources, 'cached': True,
+                'usage': _usage()}
+    
+    if llm is None:
+        answer, usage = _without_llm(question, retrieved_docs)
+    else:
+        messages = _messages(question, retrieved_docs)
+        model = _model_name(llm)
+        with metrics.span("llm", model=model) as span:
+            response = await llm.ainvoke(messages)
+            answer = response.content
+            usage = _usage(messages, answer, getattr(response, 'usage_metadata', None))
+            span.set("input_tokens", usage['input_tokens'])
+            span.set("output_tokens", usage['output_tokens'])
+        _record_usage(usage, model)
+        
+        if fingerprint is not None:
+            ANSWER_CACHE.put(question, fingerprint, answer, query_embedding)
+    
+    return {
+        'answer': answer,
+        'sources': sources,
+        'cached': False,
+        'usage': usage
+    }
+
+# ============================================================
+# TEST
+# ============================================================
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🧪 TESTING RAG PIPELINE")
+    print("=" * 70)
+
+    test_questions = [
+        "What is the minimum CET1 capital adequacy ratio under Basel III?",
+        "What are the KYC requirements for opening a bank account?",
+    ]
+
+    for i, question in enumerate(test_questions, 1):
+        print(f"\n{'='*70}")
+        print(f"❓ Question {i}: {question}")
+        print(f"{'='*70}")
+
+        result = rag_query(question, top_k=3)
+
+        print(f"\n💡 ANSWER:")
+        print(f"{result['answer']}")
+
+        print(f"\n📚 SOURCES:")
+        for j, source in enumerate(result['sources'], 1):
+            print(f"   {j}. {source['source']} - Score: {source['score']:.3f}")
+
+    print("\n" + "=" * 70)
+    print("✅ PHASE 3 COMPLETE!")
+    print("=" * 70)
@@ -0,0 +1,389 @@
+# serve.py
+"""
+HTTP/JSON query service in front of the shared, preloaded index.
+
+    python serve.py                         # Groq (GROQ_API_KEY from .env)
+    python serve.py --stub-llm              # fully offline
+    RAG_LLM_BACKEND=none python serve.py    # retrieval-only
+    python serve.py --workers 8 --queue-size 32 --port 8000
+
+Endpoints:
+    GET  /health   index / process status, worker pool counters, stage latency
+    GET  /metrics  Prometheus text format (compliance_rag.metrics)
+    POST /search   {"query", "top_k", "filter", "fusion"}        -> hybrid_search
+    POST /ask      {"question", "top_k", "filter", "rerank"}     -> rag_query
+    POST /batch    {"questions", "top_k", "filter", "mode"}      -> batch of either
+    POST /reload   swap in the index currently on disk
+
+Requests run on a fixed pool of worker threads. When all workers are
+busy and the queue is full, new requests get 503 + Retry-After straight
+away instead of piling up; past SERVICE_REJECT_QUEUE_SIZE pending 503s
+the connection is closed outright. Every response carries Server-Timing
+(queue, app, total) and X-Queue-Time-Ms headers.
+
+Use compliance_rag.client.RAGClient (or RAG_SERVICE_URL for app.py)
+to talk to it.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import rag
+from compliance_rag import metrics
+from compliance_rag.config import (
+    LLM_BACKEND,
+    SERVICE_HOST,
+    SERVICE_MAX_BODY_BYTES,
+    SERVICE_PORT,
+    SERVICE_QUEUE_SIZE,
+    SERVICE_REJECT_QUEUE_SIZE,
+    SERVICE_REJECT_TIMEOUT,
+    SERVICE_WORKERS,
+    STUB_LLM_LATENCY,
+)
+
+MAX_BATCH = 64
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "item"):   # numpy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _field(body, name, kind, default=None, required=False):
+    value = body.get(name, default)
+    if value is None:
+        if required:
+            raise BadRequest(f"'{name}' is required")
+        return default
+    if not isinstance(value, kind) or isinstance(value, bool) and kind is int:
+        raise BadRequest(f"'{name}' has the wrong type")
+    return value
+
+
+def _filter_field(body):
+    """The optional 'filter' object - metadata field -> string value"""
+    filter_metadata = _field(body, 'filter', dict)
+    if filter_metadata is not None and not all(
+            isinstance(key, str) and isinstance(value, str)
+            for key, value in filter_metadata.items()):
+        raise BadRequest("'filter' must map field names to string values")
+    return filter_metadata
+
+
+# ============================================================
+# SERVER
+# ============================================================
+class QueryServer(HTTPServer):
+    """
+    HTTPServer whose requests are handled by a bounded thread pool.
+
+    Args:
+        workers: Requests processed concurrently
+        queue_size: Requests allowed to wait for a worker; beyond
+            workers + queue_size the server answers 503
+    """
+
+    def __init__(self, address, handler_class, workers=SERVICE_WORKERS,
+                 queue_size=SERVICE_QUEUE_SIZE):
+        super().__init__(address, handler_class)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-worker")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._reject_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-reject")
+        self._reject_slots = threading.BoundedSemaphore(SERVICE_REJECT_QUEUE_SIZE)
+        self._counter_lock = threading.Lock()
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+
+    def process_request(self, request, client_address):
+        # Runs on the accept thread - must not block
+        if not self._slots.acquire(blocking=False):
+            with self._counter_lock:
+                self.rejected += 1
+            if self._reject_slots.acquire(blocking=False):
+                self._reject_pool.submit(self._reject, request, client_address)
+            else:
+                # Too many 503s queued already - do not let them pile up either
+                self.shutdown_request(request)
+            return
+
+        with self._counter_lock:
+            self.pending += 1
+        self.pool.submit(self._work, request, client_address, time.perf_counter())
+
+    def _work(self, request, client_address, enqueued):
+        try:
+            self.RequestHandlerClass(request, client_address, self, enqueued=enqueued)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._counter_lock:
+                self.pending -= 1
+                self.served += 1
+            self._slots.release()
+
+    def _reject(self, request, client_address):
+        # The request is still read in full so that the client sees the
+        # 503 instead of a reset connection (a slow client only gets
+        # SERVICE_REJECT_TIMEOUT to send it)
+        try:
+            self.RequestHandlerClass(request, client_address, self, busy=True)
+        except Exception:
+            pass
+        finally:
+            self.shutdown_request(request)
+            self._reject_slots.release()
+
+    def pool_stats(self):
+        with self._counter_lock:
+            pending, served, rejected = self.pending, self.served, self.rejected
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': min(pending, self.workers),
+            'queued': max(0, pending - self.workers),
+            'served': served,
+            'rejected': rejected,
+        }
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self._reject_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================================
+# HANDLER
+# ============================================================
+class QueryHandler(BaseHTTPRequestHandler):
+    server_version = "ComplianceRAG/1.0"
+
+    timeout = 30   # seconds to wait for a slow client
+
+    def __init__(self, request, client_address, server, enqueued=None, busy=False):
+        self.enqueued = enqueued
+        self.busy = busy
+        if busy:
+            self.timeout = SERVICE_REJECT_TIMEOUT
+        super().__init__(request, client_address, server)
+
+    # --------------------------------------------------------
+    # Routes
+    # --------------------------------------------------------
+    def do_GET(self):
+        if self.busy:
+            self._send_busy()
+        elif self.path == "/health":
+            self._dispatch(self._health)
+        elif self.path == "/metrics":
+            self._send_text(200, metrics.prometheus_text())
+        else:
+            self._send_error(404, f"unknown path {self.path}")
+
+    def do_POST(self):
+        routes = {
+            "/search": self._search,
+            "/ask": self._ask,
+            "/batch": self._batch,
+            "/reload": self._reload,
+        }
+        route = routes.get(self.path)
+        if self.busy:
+            self._send_busy()
+        elif route is None:
+            self._send_error(404, f"unknown path {self.path}")
+        else:
+            self._dispatch(route, with_body=True)
+
+    def _health(self):
+        return {
+            'status': "ok",
+            'index': rag.RESOURCES.status(),
+            'pool': self.server.pool_stats(),
+            'stages': metrics.stage_summary(),
+        }
+
+    def _search(self, body):
+        query = _field(body, 'query', str, required=True)
+        top_k = _field(body, 'top_k', int, 5)
+        filter_metadata = _filter_field(body)
+        results = rag.get_retriever().hybrid_search(
+            query, top_k=top_k, filter_metadata=filter_metadata,
+            fusion=_field(body, 'fusion', str),
+            candidate_k=_field(body, 'candidate_k', int),
+        )
+        return {'results': results}
+
+    def _ask(self, body):
+        question = _field(body, 'question', str, required=True)
+        return rag.rag_query(
+            question,
+            top_k=_field(body, 'top_k', int, 3),
+            filter_metadata=_filter_field(body),
+            use_cache=_field(body, 'use_cache', bool, True),
+            rerank=_field(body, 'rerank', bool),
+        )
+
+    def _batch(self, body):
+        questions = _field(body, 'questions', list, required=True)
+        if not all(isinstance(q, str) for q in questions):
+            raise BadRequest("'questions' must be a list of strings")
+        if len(questions) > MAX_BATCH:
+            raise BadRequest(f"at most {MAX_BATCH} questions per batch")
+
+        mode = _field(body, 'mode', str, "ask")
+        filter_metadata = _filter_field(body)
+        if mode == "search":
+            results = rag.get_retriever().hybrid_search_batch(
+                questions,
+                top_k=_field(body, 'top_k', int, 5),
+                filter_metadata=filter_metadata,
+            )
+        elif mode == "ask":
+            results = rag.rag_query_batch(
+                questions,
+                top_k=_field(body, 'top_k', int, 3),
+                filter_metadata=filter_metadata,
+                use_cache=_field(body, 'use_cache', bool, True),
+                rerank=_field(body, 'rerank', bool),
+            )
+        else:
+            raise BadRequest("'mode' must be 'ask' or 'search'")
+        return {'results': results}
+
+    def _reload(self, body):
+        return {'status': "reloaded", 'index': rag.reload_index()}
+
+    # --------------------------------------------------------
+    # Plumbing
+    # --------------------------------------------------------
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > SERVICE_MAX_BODY_BYTES:
+            raise BadRequest("request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise BadRequest("request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise BadRequest("request body must be a JSON object")
+        return body
+
+    def _dispatch(self, route, with_body=False):
+        started = time.perf_counter()
+        queue_ms = (started - self.enqueued) * 1000 if self.enqueued else 0.0
+        try:
+            payload = route(self._read_json()) if with_body else route()
+            status = 200
+        except (BadRequest, ValueError) as e:
+            payload, status = {'error': str(e)}, 400
+        except FileNotFoundError as e:
+            payload, status = {'error': str(e)}, 503
+        except Exception as e:
+            self.log_error("%s failed: %r", self.path, e)
+            payload, status = {'error': f"{type(e).__name__}: {e}"}, 500
+        app_ms = (time.perf_counter() - started) * 1000
+        self._send_json(status, payload, queue_ms, app_ms)
+
+    def _send_json(self, status, payload, queue_ms=0.0, app_ms=0.0):
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header(
+            "Server-Timing",
+            f"queue;dur={queue_ms:.1f}, app;dur={app_ms:.1f}, total;dur={queue_ms + app_ms:.1f}",
+        )
+        self.send_header("X-Queue-Time-Ms", f"{queue_ms:.1f}")
+        self.send_header("X-Process-Time-Ms", f"{app_ms:.1f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {'error': message})
+
+    def _send_busy(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if 0 < length <= SERVICE_MAX_BODY_BYTES:
+            self.rfile.read(length)
+        body = json.dumps({'error': "server busy, retry later"}).encode("utf-8")
+        self.send_response(503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="HTTP query service for the compliance RAG")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS,
+                        help="Requests processed concurrently")
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE,
+                        help="Requests waiting for a worker before answering 503")
+    parser.add_argument("--stub-llm", action="store_true",
+                        help="Answer with the local StubLLM (no network, no API key); "
+                             "same as RAG_LLM_BACKEND=stub")
+    parser.add_argument("--stub-latency", type=float, default=STUB_LLM_LATENCY,
+                        help="Simulated StubLLM latency in seconds")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🌐 COMPLIANCE RAG QUERY SERVICE")
+    print("=" * 70)
+
+    if args.stub_llm:
+        from compliance_rag.llm import StubLLM
+        rag.set_llm(StubLLM(latency=args.stub_latency))
+        print("🤖 Using local StubLLM")
+    else:
+        print(f"🤖 LLM backend: {LLM_BACKEND}")
+
+    print("\n📚 Loading index...")
+    status = rag.RESOURCES.warm(load_model=True).status()
+    print(f"✅ {status['num_chunks']:,} chunks loaded in {status['load_seconds']:.1f}s")
+
+    server = QueryServer(
+        (args.host, args.port), QueryHandler,
+        workers=args.workers, queue_size=args.queue_size,
+    )
+    print(f"\n🚀 Serving on http://{args.host}:{args.port} "
+          f"({args.workers} workers, queue {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,28 @@
 # test_rag_questions.py
+"""
+Run the custom question sets through the RAG pipeline.
+
+    python test_rag_questions.py                                  # in-process
+    python test_rag_questions.py --service-url http://127.0.0.1:8000   # via serve.py
+
+RAG_SERVICE_URL is used when --service-url is not given. In-process runs
+use the LLM backend from RAG_LLM_BACKEND, so they can run offline:
+
+    RAG_LLM_BACKEND=stub python test_rag_questions.py   # local echo LLM
+    RAG_LLM_BACKEND=none python test_rag_questions.py   # retrieval only
+"""
+import argparse
 import sys
 from pathlib import Path
 
 # Add project to path
-BASE_DIR = BASE_DIR = Path(__file__).parent
+BASE_DIR = Path(__file__).parent
 sys.path.append(str(BASE_DIR))
 
-# Import from your pipeline
-from rag import rag_query
-
-print("=" * 70)
-print("🧪 TESTING RAG WITH CUSTOM QUESTIONS")
-print("=" * 70)
+from compliance_rag.config import LLM_BACKEND, SERVICE_URL
 
 # Test questions organized by document
-test_sets = {
+TEST_SETS = {
     "Basel LCR": [
         "What is the Liquidity Coverage Ratio?",
         "What are high-quality liquid assets?",
@@ -39,34 +47,60 @@ test_sets = {
     ]
 }
 
-# Run tests
-for category, questions in test_sets.items():
-    print(f"\n{'='*70}")
-    print(f"📋 CATEGORY: {category}")
-    print(f"{'='*70}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the custom RAG test questions")
+    parser.add_argument("--service-url", default=SERVICE_URL,
+                        help="Query the HTTP service (serve.py) instead of loading the index")
+    args = parser.parse_args()
     
-    for i, question in enumerate(questions, 1):
-        print(f"\n❓ Question {i}: {question}")
-        print("-" * 70)
+    if args.service_url:
+        from compliance_rag.client import RAGClient
+        ask = RAGClient(args.service_url).ask
+    else:
+        # Import from your pipeline
+        from rag import rag_query as ask
+    
+    print("=" * 70)
+    print("🧪 TESTING RAG WITH CUSTOM QUESTIONS")
+    if args.service_url:
+        print(f"   (via {args.service_url})")
+    else:
+        print(f"   (LLM backend: {LLM_BACKEND})")
+    print("=" * 70)
+    
+    # Run tests
+    for category, questions in TEST_SETS.items():
+        print(f"\n{'='*70}")
+        print(f"📋 CATEGORY: {category}")
+        print(f"{'='*70}")
+    
+        for i, question in enumerate(questions, 1):
+            print(f"\n❓ Question {i}: {question}")
+            print("-" * 70)
         
-        try:
-            result = rag_query(question, top_k=3)
+            try:
+                result = ask(question, top_k=3)
             
-            print(f"\n💡 ANSWER:")
-            # Print first 300 characters
-            answer = result['answer']
-            if len(answer) > 300:
-                print(f"{answer[:300]}...")
-            else:
-                print(answer)
+                print(f"\n💡 ANSWER:")
+                # Print first 300 characters
+                answer = result['answer']
+                if len(answer) > 300:
+                    print(f"{answer[:300]}...")
+                else:
+                    print(answer)
             
-            print(f"\n📚 SOURCES:")
-            for j, source in enumerate(result['sources'], 1):
-                print(f"   {j}. {source['source']} - {source['regulator']}")
+                print(f"\n📚 SOURCES:")
+                for j, source in enumerate(result['sources'], 1):
+                    print(f"   {j}. {source['source']} - {source['regulator']}")
         
-        except Exception as e:
-            print(f"❌ Error: {e}")
+            except Exception as e:
+                print(f"❌ Error: {e}")
+
+    print("\n" + "=" * 70)
+    print("✅ TESTING COMPLETE!")
+    print("=" * 70)
+
 
-print("\n" + "=" * 70)
-print("✅ TESTING COMPLETE!")
-print("=" * 70)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
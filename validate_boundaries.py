@@ -1,42 +1,129 @@
 # validate_boundaries.py
-import pickle
+"""
+Chunk boundary quality (and chunker throughput).
+
+    python validate_boundaries.py              # check the stored chunks
+    python validate_boundaries.py --compare    # re-chunk the PDFs in data/
+                                               # with every chunker
+
+--compare extracts the PDFs once, then times each chunker on the same
+page texts and reports chunks, average tokens, stored text size,
+throughput and boundary issues side by side.
+"""
+import argparse
 import re
-from pathlib import Path
+import time
+
+from compliance_rag.config import DATA_DIR
+from compliance_rag.index import load_chunks
+from compliance_rag.ingest import CHUNKERS, assemble_text, chunk_document, extract_all
+from compliance_rag.tokens import count_tokens, token_counter_name
+
+REASONS = ("Starts with lowercase", "Starts with conjunction", "Ends mid-sentence")
+
+
+def boundary_issues(texts):
+    """(index, reason) for every boundary problem"""
+    issues = []
+    for idx, content in enumerate(texts):
+        content = content.strip()
+
+        # Skip very small chunks
+        if len(content) < 300:
+            continue
+
+        first_line = content.splitlines()[0]
+        last_char = content[-1]
+
+        # Heuristics
+        if first_line[:1].islower():
+            issues.append((idx, "Starts with lowercase"))
+
+        if re.match(r"^(and|or|but|however)\b", first_line.lower()):
+            issues.append((idx, "Starts with conjunction"))
+
+        if last_char not in ".;:":
+            issues.append((idx, "Ends mid-sentence"))
+    return issues
+
+
+def issue_summary(texts, issues):
+    checked = sum(1 for text in texts if len(text.strip()) >= 300)
+    counts = {reason: 0 for reason in REASONS}
+    for _, reason in issues:
+        counts[reason] += 1
+    return checked, counts
+
+
+def check_stored():
+    chunks = load_chunks()
+    texts = [chunk["content"] for chunk in chunks]
+    issues = boundary_issues(texts)
+    checked, counts = issue_summary(texts, issues)
+
+    print(f"Total chunks checked: {len(chunks)} ({checked} of 300+ characters)")
+    print(f"Boundary issues found: {len(issues)}")
+    for reason, count in counts.items():
+        print(f"   {reason:<24} {count:>6} ({count / max(checked, 1):.1%})")
+
+    tokens = [count_tokens(text) for text in texts]
+    print(f"Average chunk: {sum(tokens) / max(len(tokens), 1):.0f} tokens "
+          f"({token_counter_name()}), {sum(map(len, texts)) / 1e6:.2f} MB of text")
+    if len(chunks) and "section_title" in chunks.fields:
+        sections = {(chunk["source"], chunk.get("section_title")) for chunk in chunks}
+        print(f"Sections: {len(sections)}")
+
+    # Show a few problematic chunks
+    for i, reason in issues[:5]:
+        print("\n" + "-" * 70)
+        print(f"Chunk #{i} | Issue: {reason}")
+        print(texts[i][:300])
 
-BASE_DIR = BASE_DIR = Path(__file__).parent
-CHUNKS_FILE = BASE_DIR / "data" / "processed" / "chunks.pkl"
 
-with open(CHUNKS_FILE, "rb") as f:
-    chunks = pickle.load(f)
+def compare_chunkers():
+    pdf_files = sorted(DATA_DIR.glob("*.pdf"))
+    if not pdf_files:
+        print(f"❌ No PDF files found in {DATA_DIR}")
+        return
 
-boundary_issues = []
+    print(f"📄 Extracting {len(pdf_files)} PDFs...")
+    pages = [p for p in extract_all(pdf_files, progress=lambda _: None) if p is not None]
+    text_mb = sum(len(assemble_text(p)) for p in pages) / 1e6
 
-for idx, chunk in enumerate(chunks):
-    content = chunk["content"].strip()
+    print(f"\n{'chunker':<12} {'chunks':>7} {'avg tok':>8} {'text MB':>8} {'MB/s':>7} "
+          f"{'issues':>7} {'lower':>6} {'conj':>6} {'mid':>6}")
+    for chunker in CHUNKERS:
+        start = time.perf_counter()
+        texts = []
+        for page_texts in pages:
+            for item in chunk_document(page_texts, chunker):
+                texts.append(item["content"] if isinstance(item, dict) else item)
+        seconds = time.perf_counter() - start
 
-    # Skip very small chunks
-    if len(content) < 300:
-        continue
+        issues = boundary_issues(texts)
+        checked, counts = issue_summary(texts, issues)
+        avg_tokens = sum(count_tokens(text) for text in texts) / max(len(texts), 1)
+        rates = [counts[reason] / max(checked, 1) for reason in REASONS]
+        print(f"{chunker:<12} {len(texts):>7} {avg_tokens:>8.0f} "
+              f"{sum(map(len, texts)) / 1e6:>8.2f} {text_mb / seconds:>7.1f} "
+              f"{len(issues) / max(checked, 1):>7.1%} "
+              + " ".join(f"{rate:>6.1%}" for rate in rates))
 
-    first_line = content.splitlines()[0]
-    last_char = content[-1]
+    print(f"\n   {text_mb:.1f} MB of extracted text; issue rates are per chunk of 300+ "
+          f"characters; tokens: {token_counter_name()}")
 
-    # Heuristics
-    if first_line[:1].islower():
-        boundary_issues.append((idx, "Starts with lowercase"))
 
-    if re.match(r"^(and|or|but|however)\b", first_line.lower()):
-        boundary_issues.append((idx, "Starts with conjunction"))
+def main():
+    parser = argparse.ArgumentParser(description="Chunk boundary validation")
+    parser.add_argument("--compare", action="store_true",
+                        help="Re-chunk the PDFs with every chunker and compare")
+    args = parser.parse_args()
 
-    if last_char not in ".;:":
-        boundary_issues.append((idx, "Ends mid-sentence"))
+    if args.compare:
+        compare_chunkers()
+    else:
+        check_stored()
 
-print(f"Total chunks checked: {len(chunks)}")
-print(f"Boundary issues found: {len(boundary_issues)}")
 
-# Show a few problematic chunks
-for issue in boundary_issues[:5]:
-    i, reason = issue
-    print("\n" + "-" * 70)
-    print(f"Chunk #{i} | Issue: {reason}")
-    print(chunks[i]["content"][:300])
+if __name__ == "__main__":
+    main()